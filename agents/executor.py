@@ -1,37 +1,347 @@
-from typing import List, Dict, Any
+import asyncio
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, Dict, Any, Optional, Union
 from .base_agent import BaseAgent
 from tools.base_tool import BaseTool
+from tools.registry import ToolRegistry
 from rich.console import Console
+from core.tracing import span, bind, payload_size
+from core.jobs import current_job
 
 console = Console()
 
 class ExecutorAgent(BaseAgent):
-    def __init__(self, llm_client, tools: List[BaseTool]):
+    def __init__(self, llm_client, tools: Union[List[BaseTool], ToolRegistry], max_workers: int = 4, step_timeout: Optional[float] = 30.0, speculator=None):
         super().__init__(llm_client, "Executor Agent")
-        self.tool_map = {tool.name: tool for tool in tools}
-
-    def run(self, plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        results = []
-        for step in plan:
-            tool_name = step.get("tool")
-            tool_args = step.get("args", {})
-            
-            console.print(f"[bold yellow]Executing Step {step['step']}:[/bold yellow] Use [cyan]{tool_name}[/cyan]")
-            
-            tool = self.tool_map.get(tool_name)
-            if not tool:
-                error_msg = f"Tool '{tool_name}' not found."
-                console.print(f"[bold red]❌ {error_msg}[/bold red]")
-                results.append({"step": step['step'], "tool": tool_name, "status": "error", "error": error_msg})
-                continue
+        # A registry is looked up live, so tools registered later are usable
+        self.tool_map = tools if isinstance(tools, ToolRegistry) else {tool.name: tool for tool in tools}
+        # max_workers=1 gives the old strictly sequential behaviour
+        self.max_workers = max(1, max_workers)
+        self.step_timeout = step_timeout
+        # Optional Speculator; run_flow starts it before planning
+        self.speculator = speculator
+
+    def _start_step(self, step: Dict[str, Any]):
+        """
+        Announces the step and resolves its tool. Returns (tool, None) or
+        (None, error_result) when the tool does not exist.
+        """
+        tool_name = step.get("tool")
+        current_job().step(step["step"], tool_name, "running")
+        console.print(f"[bold yellow]Executing Step {step['step']}:[/bold yellow] Use [cyan]{tool_name}[/cyan]")
+
+        tool = self.tool_map.get(tool_name)
+        if not tool:
+            error_msg = f"Tool '{tool_name}' not found."
+            console.print(f"[bold red]❌ {error_msg}[/bold red]")
+            return None, self._error(step, error_msg)
+        return tool, None
+
+    @staticmethod
+    def _success(step: Dict[str, Any], output: Any) -> Dict[str, Any]:
+        current_job().step(step["step"], step.get("tool"), "done")
+        console.print(f"[bold green]✅ Result:[/bold green] {str(output)[:200]}..." if len(str(output)) > 200 else f"[bold green]✅ Result:[/bold green] {output}")
+        return {"step": step['step'], "tool": step.get("tool"), "status": "success", "output": output}
+
+    @staticmethod
+    def _error(step: Dict[str, Any], error_msg: str) -> Dict[str, Any]:
+        current_job().step(step["step"], step.get("tool"), "error")
+        return {"step": step['step'], "tool": step.get("tool"), "status": "error", "error": error_msg}
+
+    def _execute_step(self, step: Dict[str, Any], speculation=None) -> Dict[str, Any]:
+        with span(f"tool:{step.get('tool')}", step=step["step"], request_bytes=payload_size(step.get("args", {}))) as s:
+            tool, error = self._start_step(step)
+            if error:
+                return error
+
+            try:
+                # Adopt the call if it was already started speculatively
+                prefetched = speculation.take(step) if speculation else None
+                if prefetched is not None:
+                    s.set(speculative=True)
+                    output = prefetched.result()
+                else:
+                    output = tool.execute(**step.get("args", {}))
+                s.set(response_bytes=payload_size(output))
+                return self._success(step, output)
+            except Exception as e:
+                s.set(error=str(e))
+                console.print(f"[bold red]❌ Error:[/bold red] {str(e)}")
+                return self._error(step, str(e))
+
+    def _timed_step(self, step: Dict[str, Any], speculation, started: Future) -> Dict[str, Any]:
+        started.set_result(time.monotonic())
+        return self._execute_step(step, speculation)
+
+    async def _aexecute_step(self, step: Dict[str, Any], speculation=None) -> Dict[str, Any]:
+        with span(f"tool:{step.get('tool')}", step=step["step"], request_bytes=payload_size(step.get("args", {}))) as s:
+            tool, error = self._start_step(step)
+            if error:
+                return error
 
             try:
-                # Execute the tool
-                output = tool.execute(**tool_args)
-                console.print(f"[bold green]✅ Result:[/bold green] {str(output)[:200]}..." if len(str(output)) > 200 else f"[bold green]✅ Result:[/bold green] {output}")
-                results.append({"step": step['step'], "tool": tool_name, "status": "success", "output": output})
+                prefetched = speculation.take(step) if speculation else None
+                if prefetched is not None:
+                    s.set(speculative=True)
+                    coro = asyncio.wrap_future(prefetched)
+                else:
+                    coro = tool.aexecute(**step.get("args", {}))
+                output = await asyncio.wait_for(coro, timeout=self.step_timeout)
+                s.set(response_bytes=payload_size(output))
+                return self._success(step, output)
+            except asyncio.TimeoutError:
+                error_msg = f"Step timed out after {self.step_timeout}s"
+                s.set(error=error_msg)
+                console.print(f"[bold red]❌ Step {step['step']}: {error_msg}[/bold red]")
+                return self._error(step, error_msg)
             except Exception as e:
+                s.set(error=str(e))
                 console.print(f"[bold red]❌ Error:[/bold red] {str(e)}")
-                results.append({"step": step['step'], "tool": tool_name, "status": "error", "error": str(e)})
-                
-        return results
+                return self._error(step, str(e))
+
+    @staticmethod
+    def _normalize_step(step: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """
+        A copy of the step with an id (its 1-based position if it has none)
+        and `depends_on` always a list.
+        """
+        step = dict(step)
+        step.setdefault("step", index)
+        depends_on = step.get("depends_on") or []
+        if not isinstance(depends_on, list):
+            depends_on = [depends_on]
+        step["depends_on"] = depends_on
+        return step
+
+    @classmethod
+    def _normalize_plan(cls, plan: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Returns the plan keyed by step id, with `depends_on` always a list of
+        known step ids.
+        """
+        steps = {}
+        for index, step in enumerate(plan, start=1):
+            step = cls._normalize_step(step, index)
+            steps[step["step"]] = step
+        for step in steps.values():
+            step["depends_on"] = [d for d in step["depends_on"] if d in steps]
+        return steps
+
+    def _intake(self, step: Dict[str, Any], known: Dict[Any, Dict[str, Any]], pending: Dict[Any, Dict[str, Any]]):
+        """
+        Adds a step that just arrived from a streamed plan.
+        """
+        step = self._normalize_step(step, len(known) + 1)
+        if step["step"] in known:
+            console.print(f"[dim]Ignoring duplicate step id {step['step']}[/dim]")
+            return
+        known[step["step"]] = step
+        pending[step["step"]] = step
+        current_job().step(step["step"], step.get("tool"), "pending")
+
+    def _blocked(self, step: Dict[str, Any], results: Dict[Any, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Returns an error result if one of the step's dependencies failed.
+        """
+        failed = [d for d in step["depends_on"] if d in results and results[d]["status"] != "success"]
+        if not failed:
+            return None
+        error_msg = f"Skipped: dependency step(s) {failed} did not succeed."
+        console.print(f"[bold red]❌ Step {step['step']}: {error_msg}[/bold red]")
+        return self._error(step, error_msg)
+
+    def _unresolvable(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        error_msg = f"Unresolvable dependencies: {step['depends_on']}"
+        console.print(f"[bold red]❌ Step {step['step']}: {error_msg}[/bold red]")
+        return self._error(step, error_msg)
+
+    @staticmethod
+    def _ordered(results: Dict[Any, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [results[step_id] for step_id in sorted(results, key=_step_sort_key)]
+
+    def _ready(self, pending: Dict[Any, Dict[str, Any]], results: Dict[Any, Dict[str, Any]], known: Dict[Any, Dict[str, Any]], streaming: bool) -> List[Dict[str, Any]]:
+        """
+        Takes every step whose dependencies are settled out of `pending`:
+        those with a failed dependency go straight into `results`, the rest
+        are returned to be run. While the plan is still streaming, a
+        dependency on a step that has not arrived yet is waited for.
+        """
+        runnable = []
+        for step_id, step in list(pending.items()):
+            if not streaming:
+                step["depends_on"] = [d for d in step["depends_on"] if d in known]
+            blocked = self._blocked(step, results)
+            if blocked:
+                results[step_id] = blocked
+                del pending[step_id]
+            elif all(d in results for d in step["depends_on"]):
+                runnable.append(step)
+                del pending[step_id]
+        return runnable
+
+    def run(self, plan: List[Dict[str, Any]], speculation=None) -> List[Dict[str, Any]]:
+        """
+        Executes the plan as a DAG. Steps without `depends_on` are independent
+        and run concurrently on a bounded worker pool; results are returned
+        ordered by step so the verifier always sees the same layout. Steps
+        matching a call in `speculation` adopt its result instead of running.
+        """
+        return self._run(self._normalize_plan(plan), None, speculation)
+
+    def run_stream(self, steps: Iterator[Dict[str, Any]], speculation=None) -> List[Dict[str, Any]]:
+        """
+        Like run, for a plan that is still being generated: each step from
+        `steps` is scheduled as soon as it arrives and its dependencies are
+        done, so early tool calls overlap the rest of the planner output.
+        """
+        return self._run({}, steps, speculation)
+
+    def _run(self, steps: Dict[Any, Dict[str, Any]], incoming: Optional[Iterator[Dict[str, Any]]], speculation) -> List[Dict[str, Any]]:
+        results: Dict[Any, Dict[str, Any]] = {}
+        known = dict(steps)
+        pending = dict(steps)
+        job = current_job()
+        for step_id, step in steps.items():
+            job.step(step_id, step.get("tool"), "pending")
+        running = {}  # future -> (step_id, started), `started` resolving when a worker picks the step up
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="executor")
+        feeder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-feed") if incoming is not None else None
+        # The iterator always resumes in this one context, so spans it opens
+        # and closes across steps stay consistent
+        feed_ctx = contextvars.copy_context()
+        arrival = feeder.submit(feed_ctx.run, next, incoming, None) if feeder else None
+        try:
+            while pending or running or arrival is not None:
+                # Schedule every step whose dependencies are satisfied
+                for step in self._ready(pending, results, known, streaming=arrival is not None):
+                    started = Future()
+                    running[pool.submit(bind(self._timed_step), step, speculation, started)] = (step["step"], started)
+
+                if not running and arrival is None:
+                    # Whatever is left waits on itself (cycle)
+                    for step_id, step in pending.items():
+                        results[step_id] = self._unresolvable(step)
+                    break
+
+                # A step's timeout counts from when a worker starts it, not
+                # from when it was queued behind other steps
+                deadlines = [started.result() + self.step_timeout for _, started in running.values() if self.step_timeout and started.done()]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                waiting = list(running) + ([arrival] if arrival is not None else [])
+                if self.step_timeout:
+                    waiting += [started for _, started in running.values() if not started.done()]
+                done, _ = wait(waiting, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if arrival in done:
+                    step = self._arrived(arrival)
+                    arrival = None
+                    if step is not None:
+                        self._intake(step, known, pending)
+                        arrival = feeder.submit(feed_ctx.run, next, incoming, None)
+
+                for future in done:
+                    if future in running:
+                        step_id, _ = running.pop(future)
+                        results[step_id] = future.result()
+
+                now = time.monotonic()
+                for future, (step_id, started) in list(running.items()):
+                    if self.step_timeout and started.done() and now >= started.result() + self.step_timeout:
+                        # The worker thread cannot be killed; abandon it and move on
+                        running.pop(future)
+                        future.cancel()
+                        error_msg = f"Step timed out after {self.step_timeout}s"
+                        console.print(f"[bold red]❌ Step {step_id}: {error_msg}[/bold red]")
+                        results[step_id] = self._error(known[step_id], error_msg)
+        finally:
+            for future in running:
+                future.cancel()
+            pool.shutdown(wait=False)
+            if feeder is not None:
+                feeder.shutdown(wait=False)
+
+        return self._ordered(results)
+
+    @staticmethod
+    def _arrived(arrival) -> Optional[Dict[str, Any]]:
+        """
+        The next streamed step, or None once the stream ended or failed.
+        """
+        try:
+            return arrival.result()
+        except Exception as e:
+            console.print(f"[bold red]❌ Plan stream failed: {e}[/bold red]")
+            return None
+
+    async def arun(self, plan: List[Dict[str, Any]], speculation=None) -> List[Dict[str, Any]]:
+        """
+        Async counterpart of run. Tools are driven through `aexecute`, so one
+        event loop can keep many steps (and many plans) in flight at once.
+        """
+        return await self._arun(self._normalize_plan(plan), None, speculation)
+
+    async def arun_stream(self, steps: Iterator[Dict[str, Any]], speculation=None) -> List[Dict[str, Any]]:
+        """
+        Async counterpart of run_stream. The step iterator is advanced on a
+        worker thread so it never blocks the event loop.
+        """
+        return await self._arun({}, steps, speculation)
+
+    async def _arun(self, steps: Dict[Any, Dict[str, Any]], incoming: Optional[Iterator[Dict[str, Any]]], speculation) -> List[Dict[str, Any]]:
+        results: Dict[Any, Dict[str, Any]] = {}
+        known = dict(steps)
+        pending = dict(steps)
+        job = current_job()
+        for step_id, step in steps.items():
+            job.step(step_id, step.get("tool"), "pending")
+        running = {}  # task -> step_id
+        semaphore = asyncio.Semaphore(self.max_workers)
+        loop = asyncio.get_running_loop()
+        feeder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-feed") if incoming is not None else None
+        feed_ctx = contextvars.copy_context()
+        arrival = loop.run_in_executor(feeder, feed_ctx.run, next, incoming, None) if feeder else None
+
+        async def bounded(step):
+            async with semaphore:
+                return await self._aexecute_step(step, speculation)
+
+        try:
+            while pending or running or arrival is not None:
+                for step in self._ready(pending, results, known, streaming=arrival is not None):
+                    running[asyncio.ensure_future(bounded(step))] = step["step"]
+
+                if not running and arrival is None:
+                    for step_id, step in pending.items():
+                        results[step_id] = self._unresolvable(step)
+                    break
+
+                waiting = list(running) + ([arrival] if arrival is not None else [])
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if arrival in done:
+                    step = self._arrived(arrival)
+                    arrival = None
+                    if step is not None:
+                        self._intake(step, known, pending)
+                        arrival = loop.run_in_executor(feeder, feed_ctx.run, next, incoming, None)
+
+                for task in done:
+                    if task in running:
+                        results[running.pop(task)] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if feeder is not None:
+                feeder.shutdown(wait=False)
+
+        return self._ordered(results)
+
+def _step_sort_key(step_id):
+    # Planner ids are normally ints, but tolerate "2" or other odd values
+    try:
+        return (0, float(step_id), "")
+    except (TypeError, ValueError):
+        return (1, 0.0, str(step_id))
@@ -0,0 +1,257 @@
+import copy
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from tools.geocode_index import get_geocode_index
+from tools.stock_tool import CORRECTIONS
+from .router import SYMBOL
+
+# Longest entity a template slot may capture, to keep matches from swallowing whole sentences
+MAX_SLOT_WORDS = 6
+# A slot holds one entity; a list or a second clause means a differently shaped query
+SLOT_SEPARATORS = re.compile(r"[,;&/+]|\b(?:and|or|vs|versus|plus|then|also)\b", re.I)
+CLAUSE_WORDS = {
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "has", "have", "had", "will", "can",
+    "what", "who", "how", "why", "when", "where", "which", "tell", "show", "get", "give", "find",
+    "news", "headlines", "weather", "temperature", "price", "stock", "about",
+}
+# Argument names whose values must look like a place or a ticker
+PLACE_ARGS = {"city", "cities", "location"}
+SYMBOL_ARGS = {"symbol", "symbols", "ticker"}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Collapses whitespace and strips trailing punctuation, keeping case so
+    template slots can hand back the user's spelling.
+    """
+    return " ".join(query.split()).strip(" ?!.")
+
+
+class PlanTemplate:
+    """
+    A cached plan whose entity arguments were lifted out into slots, e.g.
+    "weather in {0}" -> weather_tool(city={0}).
+    """
+
+    def __init__(self, pattern: "re.Pattern", skeleton: List[Dict[str, Any]], originals: List[str], kinds: List[Optional[str]]):
+        self.pattern = pattern
+        self.skeleton = skeleton
+        # The entity each slot was built from, and "place"/"symbol"/None
+        self.originals = originals
+        self.kinds = kinds
+
+    @property
+    def slots(self) -> int:
+        return len(self.originals)
+
+    def match(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        m = self.pattern.fullmatch(query)
+        if not m:
+            return None
+        entities = [m.group(f"s{i}") for i in range(self.slots)]
+        if not all(_plausible(e, o, k) for e, o, k in zip(entities, self.originals, self.kinds)):
+            return None
+        return _fill(copy.deepcopy(self.skeleton), entities)
+
+
+def _plausible(entity: str, original: str, kind: Optional[str]) -> bool:
+    """
+    Whether a slot capture is one entity like the one the template was built
+    from, rather than a list or the rest of a compound question.
+    """
+    if len(entity.split()) > MAX_SLOT_WORDS:
+        return False
+    if SLOT_SEPARATORS.search(entity) and not SLOT_SEPARATORS.search(original):
+        return False
+    words = {w.casefold() for w in re.findall(r"[\w']+", entity)}
+    if (words - {w.casefold() for w in re.findall(r"[\w']+", original)}) & CLAUSE_WORDS:
+        return False
+    if kind == "place":
+        return get_geocode_index().lookup(entity) is not None
+    if kind == "symbol":
+        return entity.upper() in CORRECTIONS or bool(SYMBOL.match(entity.upper()))
+    return True
+
+
+class PlanCache:
+    """
+    Remembers plans by normalized query text so repeated queries skip the
+    planner LLM call. With `templates=True`, a second tier reuses the plan of
+    a same-shaped query ("weather in Pune" for "weather in Goa").
+    """
+
+    def __init__(self, max_entries: int = 512, templates: bool = True):
+        self.max_entries = max_entries
+        self.templates = templates
+        self._exact: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._templates: "OrderedDict[str, PlanTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "template_hits": 0, "misses": 0}
+        self._planner_seconds = 0.0
+        self._planner_calls = 0
+
+    def get(self, query: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        Returns (plan, tier) where tier is "exact" or "template", or
+        (None, None) on a miss.
+        """
+        normalized = normalize_query(query)
+        key = normalized.casefold()
+        with self._lock:
+            plan = self._exact.get(key)
+            if plan is not None:
+                self._exact.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return copy.deepcopy(plan), "exact"
+
+            if self.templates:
+                for template_key, template in reversed(self._templates.items()):
+                    plan = template.match(normalized)
+                    if plan is not None:
+                        self._templates.move_to_end(template_key)
+                        self._stats["template_hits"] += 1
+                        return plan, "template"
+
+            self._stats["misses"] += 1
+            return None, None
+
+    def put(self, query: str, plan: List[Dict[str, Any]], latency: Optional[float] = None):
+        """
+        Stores a freshly generated plan. `latency` is how long the planner
+        LLM call took and feeds the saved-time estimate.
+        """
+        if not plan:
+            return
+        normalized = normalize_query(query)
+        template = _build_template(normalized, plan) if self.templates else None
+        with self._lock:
+            if latency is not None:
+                self._planner_seconds += latency
+                self._planner_calls += 1
+            self._exact[normalized.casefold()] = copy.deepcopy(plan)
+            self._exact.move_to_end(normalized.casefold())
+            if template is not None:
+                self._templates[template.pattern.pattern] = template
+                self._templates.move_to_end(template.pattern.pattern)
+            for entries in (self._exact, self._templates):
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._templates.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["template_hits"]
+            lookups = hits + self._stats["misses"]
+            avg_latency = self._planner_seconds / self._planner_calls if self._planner_calls else 0.0
+            return dict(
+                self._stats,
+                hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                avg_planner_seconds=round(avg_latency, 3),
+                saved_seconds=round(hits * avg_latency, 3),
+                size=len(self._exact),
+                templates=len(self._templates),
+            )
+
+
+def _string_args(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _string_args(v)]
+    if isinstance(value, list):
+        return [s for v in value for s in _string_args(v)]
+    return []
+
+
+def _slot_args(value: Any, slots: Dict[str, int]) -> Any:
+    """
+    Replaces argument strings that are entities from the query with slot markers.
+    """
+    if isinstance(value, str) and value.casefold() in slots:
+        return {"$slot": slots[value.casefold()]}
+    if isinstance(value, dict):
+        return {k: _slot_args(v, slots) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_slot_args(v, slots) for v in value]
+    return value
+
+
+def _fill(value: Any, entities: List[str]) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"$slot"}:
+            return entities[value["$slot"]]
+        if set(value) == {"$text"}:
+            text = value["$text"]
+            for i, entity in enumerate(entities):
+                text = text.replace(f"{{{i}}}", entity)
+            return text
+        return {k: _fill(v, entities) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, entities) for v in value]
+    return value
+
+
+def _arg_kinds(value: Any, kinds: Dict[str, str], key: Optional[str] = None):
+    """
+    Records which entity strings are passed as places or tickers.
+    """
+    if isinstance(value, str) and key is not None:
+        if key in PLACE_ARGS:
+            kinds[value.casefold()] = "place"
+        elif key in SYMBOL_ARGS:
+            kinds[value.casefold()] = "symbol"
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            _arg_kinds(v, kinds, k)
+    elif isinstance(value, list):
+        for v in value:
+            _arg_kinds(v, kinds, key)
+
+
+def _build_template(normalized: str, plan: List[Dict[str, Any]]) -> Optional[PlanTemplate]:
+    # Entities are argument values the user typed verbatim; anything the
+    # planner rewrote (e.g. RELIANCE -> RELIANCE.NS) stays literal.
+    values = []
+    for step in plan:
+        for value in _string_args(step.get("args", {})):
+            if value.strip() and value.casefold() not in [v.casefold() for v in values]:
+                if re.search(rf"\b{re.escape(value)}\b", normalized, re.IGNORECASE):
+                    values.append(value)
+    if not values:
+        return None
+
+    # Longest first so "New Delhi" wins over "Delhi"
+    values.sort(key=len, reverse=True)
+    slots = {value.casefold(): i for i, value in enumerate(values)}
+    combined = re.compile("|".join(rf"\b{re.escape(v)}\b" for v in values), re.IGNORECASE)
+
+    pattern, seen, last = "", set(), 0
+    for m in combined.finditer(normalized):
+        index = slots[m.group(0).casefold()]
+        pattern += re.escape(normalized[last:m.start()])
+        pattern += f"(?P=s{index})" if index in seen else f"(?P<s{index}>.+?)"
+        seen.add(index)
+        last = m.end()
+    pattern += re.escape(normalized[last:])
+
+    # A template that is nothing but slots would match any query
+    if not re.search(r"\w", combined.sub("", normalized)):
+        return None
+
+    skeleton = []
+    for step in plan:
+        step = copy.deepcopy(step)
+        step["args"] = _slot_args(step.get("args", {}), slots)
+        if isinstance(step.get("reasoning"), str):
+            step["reasoning"] = {"$text": combined.sub(lambda m: f"{{{slots[m.group(0).casefold()]}}}", step["reasoning"])}
+        skeleton.append(step)
+    kinds: Dict[str, str] = {}
+    for step in plan:
+        _arg_kinds(step.get("args", {}), kinds)
+    return PlanTemplate(re.compile(pattern, re.IGNORECASE), skeleton, values, [kinds.get(v.casefold()) for v in values])
@@ -1,64 +1,209 @@
 import json
-from typing import List, Dict, Any
+import time
+from typing import Iterator, List, Dict, Any, Optional, Union
 from termcolor import colored
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 from .base_agent import BaseAgent
 from tools.base_tool import BaseTool
+from tools.registry import ToolRegistry
+from .plan_cache import PlanCache
+from .router import IntentRouter
+from .summarizer import compact_json, estimate_tokens
+from core.tracing import span
+from llm.json_stream import JSONArrayStreamParser
 
 console = Console()
 
+# Everything except the tool list is constant, and the tool list only
+# changes with the registry, so the whole system prompt is a stable
+# prefix that provider-side prompt caching can reuse across queries
+PLANNER_INSTRUCTIONS = """You are a Planner Agent. Your job is to break down the user's task into a step-by-step plan.
+Return the plan STRICTLY as a JSON object with a key "plan" containing the list of steps.
+Example format:
+{"plan":[{"step":1,"tool":"tool_name","args":{"arg":"value"},"depends_on":[],"reasoning":"explanation"}]}
+Steps run in parallel unless they list the step numbers they must wait for in "depends_on".
+Leave "depends_on" empty for steps that do not need another step to finish first.
+When a tool accepts a list argument (e.g. several stock symbols), use a single step for all items instead of one step per item.
+Return ONLY the JSON object.
+Available Tools (one JSON object per line):"""
+
 class PlannerAgent(BaseAgent):
-    def __init__(self, llm_client, tools: List[BaseTool]):
+    def __init__(self, llm_client, tools: Union[List[BaseTool], ToolRegistry], plan_cache: Optional[PlanCache] = None, router: Optional[IntentRouter] = None, stream: bool = False):
         super().__init__(llm_client, "Planner Agent")
-        self.tools = tools
+        self.tools = tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
+        self.plan_cache = plan_cache
+        self.router = router
+        # Whether run_flow should execute steps as the planner streams them
+        self.stream = stream
+        self._prompt = None
+        self._prompt_version = None
+        self.prompt_tokens = 0
+
+    def system_prompt(self) -> str:
+        """
+        The compiled system prompt, rebuilt only when the registry changes.
+        """
+        if self._prompt_version != self.tools.version:
+            lines = [PLANNER_INSTRUCTIONS]
+            for schema in self.tools.schemas():
+                function = schema.get("function", schema)
+                lines.append(compact_json({
+                    "name": function["name"],
+                    "description": function.get("description", ""),
+                    "parameters": function.get("parameters", {}).get("properties", {}),
+                    "required": function.get("parameters", {}).get("required", []),
+                }))
+            self._prompt = "\n".join(lines)
+            if self._prompt_version is not None and self.plan_cache is not None:
+                # Cached plans may name tools that no longer exist
+                self.plan_cache.clear()
+            self._prompt_version = self.tools.version
+            self.prompt_tokens = estimate_tokens(self._prompt)
+        return self._prompt
+
+    @staticmethod
+    def _render_plan(plan: List[Dict[str, Any]], title: str = "Execution Plan"):
+        # Beautified Plan Output
+        plan_text = ""
+        for step in plan:
+            plan_text += f"**Step {step['step']}**: Use `{step['tool']}`\n> {step.get('reasoning', '')}\n\n"
+        console.print(Panel(Markdown(plan_text), title=title, border_style="blue"))
+
+    @staticmethod
+    def _render_step(step: Dict[str, Any]):
+        console.print(f"[blue]Step {step.get('step', '?')}[/blue]: use [bold]{step.get('tool')}[/bold] [dim]{step.get('reasoning', '')}[/dim]")
+
+    @staticmethod
+    def _parse_plan(response: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            plan = json.loads(response.replace("```json", "").replace("```", "").strip())
+        except (AttributeError, json.JSONDecodeError):
+            console.print("[bold red]Error parsing plan JSON[/bold red]")
+            return None
+        # Support if LLM returns a dict with a key 'plan' or just a list
+        if isinstance(plan, dict):
+            plan = plan.get("plan", plan.get("steps", []))
+        return plan
 
     def run(self, user_query: str):
-        tool_schemas = [tool.to_schema() for tool in self.tools]
-        system_prompt = f"""
-        You are a Planner Agent. Your job is to break down the user's task into a step-by-step plan.
-        Available Tools: {json.dumps(tool_schemas, indent=2)}
-        
-        Return the plan STRICTLY as a JSON object with a key "plan" containing the list of steps.
-        Example format:
-        {{
-            "plan": [
-                {{
-                    "step": 1,
-                    "tool": "tool_name",
-                    "args": {{"arg": "value"}},
-                    "reasoning": "explanation"
-                }}
-            ]
-        }}
-
-        Return ONLY the JSON object.
+        with span("plan") as s:
+            plan = self._plan(user_query, s)
+            s.set(steps=len(plan) if plan else 0)
+            return plan
+
+    def stream_steps(self, user_query: str) -> Iterator[Dict[str, Any]]:
         """
-        
-        messages = [
-            {"role": "system", "content": system_prompt},
+        Yields the plan's steps one at a time, each as soon as its object
+        closes in the streamed planner response, so the executor can start
+        on it while the rest of the plan is still being generated.
+        Rule-routed and cached plans are yielded straight away.
+        """
+        with span("plan", streamed=True) as s:
+            count = 0
+            for step in self._stream_steps(user_query, s):
+                count += 1
+                yield step
+            s.set(steps=count)
+
+    def _known_plan(self, user_query: str, s) -> Optional[List[Dict[str, Any]]]:
+        """
+        A rule-routed or cached plan for the query, without calling the LLM.
+        """
+        if self.router is not None:
+            route = self.router.route(user_query)
+            s.set(routed=route is not None)
+            if route is not None:
+                console.print(Panel(f"Matched a rule for: [bold cyan]{user_query}[/bold cyan]", title="Planner"))
+                self._render_plan(route.plan, title="Execution Plan (rule-based)")
+                return route.plan
+
+        self.system_prompt()
+        s.set(prompt_version=self._prompt_version, prompt_tokens_est=self.prompt_tokens)
+        if self.plan_cache is not None:
+            plan, tier = self.plan_cache.get(user_query)
+            s.set(cache_hit=plan is not None, cache_tier=tier)
+            if plan is not None:
+                console.print(Panel(f"Reusing cached plan for: [bold cyan]{user_query}[/bold cyan]", title="Planner"))
+                self._render_plan(plan, title=f"Execution Plan (cached, {tier})")
+                return plan
+        return None
+
+    def _messages(self, user_query: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt()},
             {"role": "user", "content": user_query}
         ]
 
+    def _plan(self, user_query: str, s):
+        plan = self._known_plan(user_query, s)
+        if plan is not None:
+            return plan
+
+        messages = self._messages(user_query)
+
         console.print(Panel(f"Thinking about: [bold cyan]{user_query}[/bold cyan]", title="Planner"))
         
-        response = self.llm.chat_completion(messages, json_mode=True)
+        started = time.perf_counter()
+        try:
+            response = self.llm.complete(messages, json_mode=True)
+        except Exception as e:
+            # An outage must not look like an empty plan (or get cached as one)
+            s.set(error=str(e))
+            console.print(f"[bold red]Planner LLM failed: {e}[/bold red]")
+            return None
+        latency = time.perf_counter() - started
+        s.set(llm_ms=round(latency * 1000, 1))
+        console.print(f"[dim]Planner LLM: {latency * 1000:.0f} ms, system prompt ~{self.prompt_tokens} tokens[/dim]")
         # console.print(f"[dim]Debug raw response: {response}[/dim]")
         
+        plan = self._parse_plan(response)
+        if plan is None:
+            return None
+        self._render_plan(plan)
+        if self.plan_cache is not None and plan:
+            self.plan_cache.put(user_query, plan, latency)
+        return plan
+
+    def _stream_steps(self, user_query: str, s) -> Iterator[Dict[str, Any]]:
+        plan = self._known_plan(user_query, s)
+        if plan is not None:
+            yield from plan
+            return
+
+        messages = self._messages(user_query)
+
+        console.print(Panel(f"Thinking about: [bold cyan]{user_query}[/bold cyan]", title="Planner (streaming)"))
+
+        started = time.perf_counter()
+        parser = JSONArrayStreamParser("plan")
+        plan, response = [], ""
         try:
-            plan = json.loads(response)
-            # Support if LLM returns a dict with a key 'plan' or just a list
-            if isinstance(plan, dict):
-                plan = plan.get("plan", plan.get("steps", []))
-            
-            # Beautified Plan Output
-            plan_text = ""
+            for chunk in self.llm.stream(messages, json_mode=True):
+                response += chunk
+                for step in parser.feed(chunk):
+                    if not isinstance(step, dict):
+                        continue
+                    if not plan:
+                        s.set(first_step_ms=round((time.perf_counter() - started) * 1000, 1))
+                    plan.append(step)
+                    self._render_step(step)
+                    yield step
+        except Exception as e:
+            # Steps already yielded still run; the partial plan is not cached
+            s.set(error=str(e))
+            console.print(f"[bold red]Planner LLM failed: {e}[/bold red]")
+            return
+        latency = time.perf_counter() - started
+        s.set(llm_ms=round(latency * 1000, 1))
+        console.print(f"[dim]Planner LLM: {latency * 1000:.0f} ms, system prompt ~{self.prompt_tokens} tokens[/dim]")
+
+        if not plan:
+            # Not shaped {"plan": [...]}; fall back to parsing the whole response
+            plan = self._parse_plan(response) or []
             for step in plan:
-                plan_text += f"**Step {step['step']}**: Use `{step['tool']}`\n> {step['reasoning']}\n\n"
-            console.print(Panel(Markdown(plan_text), title="Execution Plan", border_style="blue"))
-            
-            return plan
-        except json.JSONDecodeError:
-            console.print("[bold red]Error parsing plan JSON[/bold red]")
-            return None
+                self._render_step(step)
+                yield step
+        if self.plan_cache is not None and plan:
+            self.plan_cache.put(user_query, plan, latency)
@@ -0,0 +1,224 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from tools.registry import ToolRegistry
+from tools.geocode_index import get_geocode_index
+from tools.stock_tool import CORRECTIONS
+
+# Queries mentioning another tool's domain are never sent to Wikipedia
+OTHER_TOOL_WORDS = re.compile(r"\b(weather|temperature|price|stock|shares?|news|headlines|github|repos?|repositories)\b", re.I)
+SYMBOL = re.compile(r"^[A-Z][A-Z0-9&-]{0,14}(\.(NS|BO))?$")
+LIST_SEPARATOR = re.compile(r"\s*(?:,|\band\b|&)\s*", re.I)
+# A subject with any of these is a question about something ("the time in
+# Tokyo", "the capital of France"), not the name of an article
+NOT_AN_ENTITY = re.compile(
+    r"\b(of|in|on|at|for|to|from|by|with|between|than|about|like|"
+    r"how|why|when|where|which|does|do|did|can|should|will|"
+    r"time|date|day|today|now|tomorrow|yesterday|best|latest|my|your|this|that)\b|\d",
+    re.I,
+)
+ARTICLE = re.compile(r"^(?:the|a|an) (?P<rest>.+)$", re.I)
+
+
+def _split_list(text: str) -> List[str]:
+    return [item for item in LIST_SEPARATOR.split(text) if item]
+
+
+def _weather(match) -> Optional[Tuple[Dict[str, Any], float]]:
+    places = _split_list(match.group("places"))
+    if not places:
+        return None
+    # Only cities the local index knows are trusted; anything else may be a
+    # compound query the regex swallowed ("Pune and the latest news")
+    known = [get_geocode_index().lookup(place) is not None for place in places]
+    confidence = 0.95 if all(known) else 0.5
+    args = {"city": places[0]} if len(places) == 1 else {"cities": places}
+    return args, confidence
+
+
+def _stock(match) -> Optional[Tuple[Dict[str, Any], float]]:
+    symbols = _split_list(match.group("symbols"))
+    if not symbols:
+        return None
+    # Tickers are safe to pass straight through; company names ("Reliance
+    # Industries") need the LLM to map them to a symbol
+    trusted = [SYMBOL.match(s) or s.upper() in CORRECTIONS for s in symbols]
+    confidence = 0.9 if all(trusted) else 0.4
+    args = {"symbol": symbols[0]} if len(symbols) == 1 else {"symbols": symbols}
+    return args, confidence
+
+
+def _bare_entity(query: str) -> bool:
+    """
+    "Sachin Tendulkar", "photosynthesis", "the Taj Mahal": a name on its
+    own, as opposed to "the capital of France" or "a good laptop".
+    """
+    article = ARTICLE.match(query)
+    if article:
+        # "the Beatles" names something; "the weather" or "a good laptop" does not
+        query = article.group("rest")
+        if not query[:1].isupper():
+            return False
+    return len(query.split()) <= 4 and not LIST_SEPARATOR.search(query) and not NOT_AN_ENTITY.search(query)
+
+
+def _wikipedia(match) -> Optional[Tuple[Dict[str, Any], float]]:
+    query = match.group("query")
+    if OTHER_TOOL_WORDS.search(query):
+        return None
+    # Anything but a bare subject is left to the planner, which can pick
+    # another tool or none
+    confidence = 0.85 if _bare_entity(query) else 0.5
+    return {"query": query}, confidence
+
+
+def _news(match) -> Optional[Tuple[Dict[str, Any], float]]:
+    query = match.groupdict().get("query")
+    if query and OTHER_TOOL_WORDS.search(query):
+        return None
+    return ({"query": query} if query else {}), 0.85
+
+
+def _github(match) -> Optional[Tuple[Dict[str, Any], float]]:
+    query = match.group("query")
+    language = match.groupdict().get("language")
+    if language and language.lower() not in ("github", "open", "source"):
+        query = f"{query} language:{language.lower()}"
+    return {"query": query}, 0.85
+
+
+class IntentRule:
+    """
+    Regex patterns for one tool plus a builder that turns a match into tool
+    args and a confidence in [0, 1].
+    """
+
+    def __init__(self, tool: str, patterns: List[str], build: Callable):
+        self.tool = tool
+        self.patterns = [re.compile(p, re.I) for p in patterns]
+        self.build = build
+
+    def match(self, query: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        for pattern in self.patterns:
+            m = pattern.match(query)
+            if m:
+                built = self.build(m)
+                if built:
+                    return built
+        return None
+
+
+DEFAULT_RULES = [
+    IntentRule("weather_tool", [
+        r"^(?:compare |what(?:'s| is) |how(?:'s| is) |show (?:me )?)?(?:the )?(?:current |today's )?weather (?:like )?(?:in|at|for) (?P<places>.+?)(?: right now| now| today)?$",
+        r"^(?P<places>[\w .,&-]+?) weather(?: now| today)?$",
+    ], _weather),
+    IntentRule("stock_tool", [
+        r"^(?:give me |what(?:'s| is| are) )?(?:the )?(?:current |latest )?(?:stock |share )?prices? (?:of|for) (?P<symbols>.+?)(?: stocks?| shares?)?$",
+        r"^(?P<symbols>[\w .,&-]+?) (?:stock|share) price$",
+    ], _stock),
+    IntentRule("news_tool", [
+        r"^(?:show |get |give me )?(?:the )?(?:latest |top |recent |today's )*(?:news|headlines)(?: (?:about|on|for|regarding) (?P<query>.+?))?(?: in india)?$",
+        r"^(?:the )?(?:latest |top |recent )*(?P<query>[\w .&-]+?) (?:news|headlines)(?: in india)?$",
+    ], _news),
+    IntentRule("github_tool", [
+        r"^search github for (?P<query>.+)$",
+        r"^(?:find |search |show )?(?:me )?(?:the )?(?:top |popular |best )*(?:(?P<language>[\w+#]+) )?(?:github )?(?:repos|repositories|projects) (?:for|about|on|related to) (?P<query>.+)$",
+    ], _github),
+    IntentRule("wikipedia_tool", [
+        r"^(?:who|what) (?:is|was|are|were) (?P<query>.+)$",
+        r"^tell me (?:about|who|what) (?P<query>.+)$",
+        r"^(?:define|explain) (?P<query>.+)$",
+    ], _wikipedia),
+]
+
+
+class Route:
+    def __init__(self, tool: str, args: Dict[str, Any], confidence: float):
+        self.tool = tool
+        self.args = args
+        self.confidence = confidence
+
+    @property
+    def plan(self) -> List[Dict[str, Any]]:
+        return [{
+            "step": 1,
+            "tool": self.tool,
+            "args": self.args,
+            "depends_on": [],
+            "reasoning": f"Matched by rule (confidence {self.confidence:.2f})",
+            "source": "router",
+        }]
+
+
+class IntentRouter:
+    """
+    Deterministic fast path in front of the planner: single-tool queries
+    that a rule recognises with enough confidence get a plan without an
+    LLM call. Everything else falls through to the LLM planner.
+
+    With `template_answers`, a routed query that succeeds is also answered
+    from the tool's own template instead of the verifier LLM.
+    """
+
+    def __init__(self, tools: ToolRegistry, rules: Optional[List[IntentRule]] = None, min_confidence: float = 0.8, template_answers: bool = False):
+        self.tools = tools
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.min_confidence = min_confidence
+        self.template_answers = template_answers
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "fallbacks": 0, "template_answers": 0}
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.strip().rstrip("?.!").split())
+
+    def candidates(self, query: str) -> List[Route]:
+        """
+        Every rule match for a registered tool whose args fit the tool's
+        schema, best first, regardless of confidence.
+        """
+        query = self._normalize(query)
+        routes = []
+        for rule in self.rules:
+            tool = self.tools.get(rule.tool)
+            if tool is None:
+                continue
+            matched = rule.match(query)
+            if not matched:
+                continue
+            args, confidence = matched
+            properties = tool.to_schema()["function"]["parameters"].get("properties", {})
+            if all(arg in properties for arg in args):
+                routes.append(Route(rule.tool, args, confidence))
+        return sorted(routes, key=lambda r: r.confidence, reverse=True)
+
+    def route(self, query: str) -> Optional[Route]:
+        routes = self.candidates(query)
+        best = routes[0] if routes and routes[0].confidence >= self.min_confidence else None
+        with self._lock:
+            self._stats["routed" if best else "fallbacks"] += 1
+        return best
+
+    def template_answer(self, plan: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        Answer points for a routed single-step plan that succeeded, rendered
+        by the tool itself, or None when the verifier is needed.
+        """
+        if not self.template_answers or len(plan) != 1 or plan[0].get("source") != "router" or len(results) != 1:
+            return None
+        result = results[0]
+        output = result.get("output")
+        if result["status"] != "success" or (isinstance(output, str) and output.startswith("Error")):
+            return None
+        tool = self.tools.get(result["tool"])
+        points = tool.to_points(output) if tool else []
+        if not points:
+            return None
+        with self._lock:
+            self._stats["template_answers"] += 1
+        return points
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
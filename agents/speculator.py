@@ -0,0 +1,171 @@
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from tools.cache import make_key
+from tools.geocode_index import get_geocode_index
+from tools.registry import ToolRegistry
+from tools.stock_tool import CORRECTIONS
+from core.tracing import span, bind
+from .router import IntentRouter, SYMBOL, _split_list
+
+WEATHER_PLACES = re.compile(r"\b(?:weather|temperature)s? (?:like )?(?:in|at|for|of) (?P<places>[\w .,&'-]+)", re.I)
+STOCK_SYMBOLS = re.compile(r"\b(?:prices?|stocks?|shares?) (?:of|for) (?P<symbols>[\w .,&-]+)", re.I)
+NEWS_TOPIC = [
+    re.compile(r"\b(?:news|headlines) (?:about|on|for|regarding) (?P<topic>[\w.&-]+(?: [\w.&-]+)?)", re.I),
+    re.compile(r"\b(?P<topic>[\w.&-]+) (?:news|headlines)\b", re.I),
+]
+# Words that can precede "news" without being its topic
+NOT_TOPICS = {"latest", "top", "recent", "today's", "the", "some", "any", "and", "me", "get", "show"}
+
+
+def extract_candidates(query: str) -> List[Tuple[str, Dict[str, Any], float]]:
+    """
+    Cheap entity extraction for compound queries the router cannot route
+    as a whole: cities the geocode index knows, ticker-like symbols and a
+    news topic. Returns (tool, args, confidence) guesses.
+    """
+    candidates = []
+    m = WEATHER_PLACES.search(query)
+    if m:
+        index = get_geocode_index()
+        places = [p.strip(" .") for p in _split_list(m.group("places"))]
+        known = [p for p in places if p and index.lookup(p) is not None]
+        if known:
+            args = {"city": known[0]} if len(known) == 1 else {"cities": known}
+            candidates.append(("weather_tool", args, 0.9))
+    m = STOCK_SYMBOLS.search(query)
+    if m:
+        symbols = []
+        for item in _split_list(m.group("symbols")):
+            word = item.split()[0].strip(".")
+            if word.upper() in CORRECTIONS:
+                symbols.append(CORRECTIONS[word.upper()])
+            elif SYMBOL.match(word):
+                symbols.append(word)
+        if symbols:
+            args = {"symbol": symbols[0]} if len(symbols) == 1 else {"symbols": symbols}
+            candidates.append(("stock_tool", args, 0.8))
+    for pattern in NEWS_TOPIC:
+        topics = [m.group("topic") for m in pattern.finditer(query) if m.group("topic").lower() not in NOT_TOPICS]
+        if topics:
+            candidates.append(("news_tool", {"query": topics[0]}, 0.6))
+            break
+    return candidates
+
+
+class _Call:
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+
+    def saved_ms(self) -> float:
+        """
+        Time the executor would otherwise have spent on the call so far: all
+        of it if it already finished, else how far it got.
+        """
+        return ((self.ended or time.perf_counter()) - self.started) * 1000
+
+
+class Speculation:
+    """
+    Tool calls started for one query before its plan exists. The executor
+    `take`s the ones its plan asks for; `finish` cancels the rest.
+    """
+
+    def __init__(self, speculator: "Speculator", calls: Dict[str, _Call]):
+        self.speculator = speculator
+        self._calls = calls  # cache key -> call
+        self._lock = threading.Lock()
+
+    def take(self, step: Dict[str, Any]) -> Optional[Future]:
+        """
+        The speculative call matching the step's tool and args, if any.
+        """
+        key = make_key(step.get("tool"), step.get("args", {}))
+        with self._lock:
+            call = self._calls.pop(key, None)
+        if call is None:
+            return None
+        self.speculator._record_adopted(call.saved_ms())
+        return call.future
+
+    def finish(self):
+        with self._lock:
+            calls, self._calls = self._calls, {}
+        for call in calls.values():
+            self.speculator._record_wasted(call.future.cancel())
+
+
+class Speculator:
+    """
+    Starts likely tool calls while the planner LLM call is in flight, so the
+    latency of the two overlaps instead of adding up. Guesses come from the
+    router's candidates and `extract_candidates`; only those scoring at
+    least `min_confidence` run, at most `max_calls` per query.
+    """
+
+    def __init__(self, tools: ToolRegistry, router: Optional[IntentRouter] = None, min_confidence: float = 0.6, max_calls: int = 3, max_workers: int = 4):
+        self.tools = tools
+        self.router = router
+        self.min_confidence = min_confidence
+        self.max_calls = max_calls
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "launched": 0, "adopted": 0, "wasted": 0, "cancelled": 0, "saved_ms": 0.0}
+
+    def guesses(self, query: str) -> List[Tuple[str, Dict[str, Any]]]:
+        candidates = []
+        if self.router is not None:
+            routes = self.router.candidates(query)
+            # A routed query never reaches the planner LLM; nothing to overlap
+            if routes and routes[0].confidence >= self.router.min_confidence:
+                return []
+            candidates += [(r.tool, r.args, r.confidence) for r in routes]
+        candidates += extract_candidates(query)
+
+        picked, seen = [], set()
+        for tool, args, confidence in sorted(candidates, key=lambda c: c[2], reverse=True):
+            key = make_key(tool, args)
+            if confidence < self.min_confidence or key in seen or self.tools.get(tool) is None:
+                continue
+            seen.add(key)
+            picked.append((tool, args))
+        return picked[:self.max_calls]
+
+    def _run(self, call: _Call, tool_name: str, args: Dict[str, Any]) -> Any:
+        try:
+            with span(f"speculate:{tool_name}"):
+                return self.tools.get(tool_name).execute(**args)
+        finally:
+            call.ended = time.perf_counter()
+
+    def start(self, query: str) -> Speculation:
+        calls = {}
+        for tool, args in self.guesses(query):
+            call = _Call()
+            call.future = self._pool.submit(bind(self._run), call, tool, args)
+            calls[make_key(tool, args)] = call
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["launched"] += len(calls)
+        return Speculation(self, calls)
+
+    def _record_adopted(self, saved_ms: float):
+        with self._lock:
+            self._stats["adopted"] += 1
+            self._stats["saved_ms"] += saved_ms
+
+    def _record_wasted(self, cancelled: bool):
+        with self._lock:
+            self._stats["wasted"] += 1
+            if cancelled:
+                self._stats["cancelled"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, saved_ms=round(self._stats["saved_ms"], 1))
+        stats["waste_rate"] = round(stats["wasted"] / stats["launched"], 3) if stats["launched"] else 0.0
+        return stats
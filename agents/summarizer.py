@@ -0,0 +1,159 @@
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+# Rough tokens-per-character ratio for English text and JSON under the
+# Llama/OpenAI tokenizers; good enough for budgeting and reporting
+CHARS_PER_TOKEN = 4
+
+# Per-tool budget (estimated tokens) for one step's output
+TOOL_BUDGETS = {
+    "github_tool": 250,
+    "news_tool": 300,
+    "wikipedia_tool": 200,
+    "stock_tool": 200,
+    "weather_tool": 150,
+}
+
+# Progressively shorter caps tried on long strings before dropping list items
+STRING_CAPS = (400, 200, 100)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _clean(value: Any) -> Any:
+    """
+    Drops empty fields and rounds floats, recursively.
+    """
+    if isinstance(value, dict):
+        cleaned = {k: _clean(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_clean(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def _cap_strings(value: Any, cap: int) -> Any:
+    if isinstance(value, dict):
+        return {k: _cap_strings(v, cap) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_cap_strings(v, cap) for v in value]
+    if isinstance(value, str) and len(value) > cap:
+        return value[:cap].rsplit(" ", 1)[0] + "…"
+    return value
+
+
+def _identity(item: Any) -> Any:
+    """
+    What makes two list items "the same": their url, else their title or
+    name, else the whole item.
+    """
+    if isinstance(item, dict):
+        for field in ("url", "title", "name", "symbol", "city"):
+            if item.get(field):
+                return (field, str(item[field]).casefold())
+    return compact_json(item)
+
+
+def _dedupe(value: Any, seen: Optional[set] = None) -> Any:
+    """
+    Removes repeated list items (same article syndicated twice, the same
+    repo found by two searches). `seen` carries identities across steps.
+    """
+    seen = set() if seen is None else seen
+    if isinstance(value, dict):
+        return {k: _dedupe(v, seen) for k, v in value.items()}
+    if isinstance(value, list):
+        unique = []
+        for item in value:
+            if isinstance(item, (dict, str)):
+                key = _identity(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique.append(_dedupe(item, seen) if isinstance(item, dict) else item)
+        return unique
+    return value
+
+
+def _longest_list(value: Any, path=()) -> Optional[tuple]:
+    """
+    Path to the longest list with more than one item, if any.
+    """
+    best = None
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if isinstance(v, list) and len(v) > 1 and (best is None or len(v) > best[1]):
+                best = (path + (k,), len(v))
+            found = _longest_list(v, path + (k,))
+            if found and (best is None or found[1] > best[1]):
+                best = found
+    return best
+
+
+def _fit(value: Any, budget: int) -> Any:
+    """
+    Shrinks `value` until its compact JSON fits `budget` estimated tokens:
+    first by shortening long strings, then by dropping trailing list items
+    (recording how many were omitted).
+    """
+    if estimate_tokens(compact_json(value)) <= budget:
+        return value
+    for cap in STRING_CAPS:
+        value = _cap_strings(value, cap)
+        if estimate_tokens(compact_json(value)) <= budget:
+            return value
+
+    while estimate_tokens(compact_json(value)) > budget:
+        found = _longest_list(value)
+        if not found:
+            break
+        path, _ = found
+        parent = value
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = parent[path[-1]][:-1]
+        omitted_key = f"{path[-1]}_omitted"
+        parent[omitted_key] = parent.get(omitted_key, 0) + 1
+    return value
+
+
+class ResultSummarizer:
+    """
+    Turns executor results into the compact form the verifier reads:
+    empty fields dropped, duplicates removed across steps, each step held
+    to its tool's token budget, and no JSON whitespace.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: int = 250):
+        self.budgets = dict(TOOL_BUDGETS, **(budgets or {}))
+        self.default_budget = default_budget
+
+    def summarize(self, execution_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        seen = set()
+        compact = []
+        for result in execution_results:
+            entry = {"step": result.get("step"), "tool": result.get("tool")}
+            output = result.get("output")
+            if result.get("status") != "success":
+                entry["error"] = result.get("error")
+            elif isinstance(output, str) and output.startswith("Error"):
+                entry["error"] = output
+            else:
+                budget = self.budgets.get(result.get("tool"), self.default_budget)
+                entry["output"] = _fit(_dedupe(_clean(output), seen), budget)
+            compact.append(entry)
+        return compact
+
+    def render(self, execution_results: List[Dict[str, Any]]) -> str:
+        return compact_json(self.summarize(execution_results))
@@ -0,0 +1,119 @@
+import json
+from typing import Any, Dict, List, Union
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+from .base_agent import BaseAgent
+from .executor import ExecutorAgent
+from .summarizer import ResultSummarizer, compact_json
+from tools.base_tool import BaseTool
+from tools.registry import ToolRegistry
+from core.tracing import span
+from core.loop import run_async
+
+console = Console()
+
+SYSTEM_PROMPT = """You are an operations assistant with access to tools.
+Call every tool you need at once; independent calls run in parallel.
+When the tool results are in, answer the user's question from them.
+Write the final answer as short bullet points, one per line, each starting with "- "."""
+
+
+def _answer_points(content: str) -> List[str]:
+    lines = [line.strip() for line in (content or "").splitlines() if line.strip()]
+    points = [line.lstrip("-*• ").strip() for line in lines if line[:1] in "-*•"]
+    return points or ([" ".join(lines)] if lines else [])
+
+
+class ToolCallingAgent(BaseAgent):
+    """
+    Plans and answers in one conversation using the provider's native tool
+    calling: the tool schemas go in `tools=`, the requested calls run in
+    parallel through the executor, and their compacted results are sent
+    back as tool messages for the final answer. A query with one round of
+    tool calls costs two LLM calls, without a planner JSON to parse or the
+    results being re-sent to a separate verifier prompt.
+
+    Returns the same result dict as the planner/executor/verifier flow.
+    """
+
+    def __init__(self, llm_client, tools: Union[List[BaseTool], ToolRegistry], executor: ExecutorAgent, max_rounds: int = 3, compact: bool = True):
+        super().__init__(llm_client, "Tool Calling Agent")
+        self.tools = tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
+        self.executor = executor
+        self.max_rounds = max_rounds
+        self.summarizer = ResultSummarizer() if compact else None
+        # No router or plan cache in this mode; kept for stats reporting
+        self.router = None
+        self.plan_cache = None
+
+    @staticmethod
+    def _steps(calls: List[Dict[str, Any]], first_step: int) -> List[Dict[str, Any]]:
+        steps = []
+        for index, call in enumerate(calls, start=first_step):
+            try:
+                args = json.loads(call["arguments"])
+            except ValueError:
+                args = {}
+            steps.append({
+                "step": index,
+                "tool": call["name"],
+                "args": args if isinstance(args, dict) else {},
+                "depends_on": [],
+                "reasoning": "Native tool call",
+                "source": "tool_call",
+            })
+        return steps
+
+    def _tool_messages(self, calls: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rendered = self.summarizer.summarize(results) if self.summarizer else results
+        messages = []
+        for call, entry in zip(calls, rendered):
+            # The call id already ties the result to its request
+            payload = entry["output"] if "output" in entry else {"error": entry.get("error")}
+            content = compact_json(payload) if self.summarizer else json.dumps(payload, default=str)
+            messages.append({"role": "tool", "tool_call_id": call["id"], "content": content})
+        return messages
+
+    def run(self, query: str, use_async: bool = False) -> Dict[str, Any]:
+        with span("tool_calling", query=query) as s:
+            result = self._run(query, use_async)
+            s.set(steps=len(result.get("plan", [])), status=result["status"])
+            return result
+
+    def _run(self, query: str, use_async: bool) -> Dict[str, Any]:
+        schemas = self.tools.schemas()
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": query},
+        ]
+        plan, results = [], []
+        console.print("[bold blue]Calling tools natively...[/bold blue]")
+        for _ in range(self.max_rounds):
+            reply = self.llm.chat_with_tools(messages, schemas)
+            if reply.get("error"):
+                return {"status": "error", "error": reply["error"], "plan": plan, "results": results}
+            calls = reply["tool_calls"]
+            if not calls:
+                points = _answer_points(reply["content"])
+                console.print(Panel(Markdown("\n".join(f"- {p}" for p in points) or "No answer provided."), title="Final Answer", style="green", border_style="green"))
+                answer = {"answer_points": points, "success": bool(points)}
+                return {"status": "success", "plan": plan, "results": results, "answer": answer}
+
+            steps = self._steps(calls, len(plan) + 1)
+            round_results = run_async(self.executor.arun(steps)) if use_async else self.executor.run(steps)
+            plan += steps
+            results += round_results
+            messages.append({
+                "role": "assistant",
+                "content": reply["content"] or "",
+                "tool_calls": [
+                    {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                    for call in calls
+                ],
+            })
+            messages += self._tool_messages(calls, round_results)
+
+        error_msg = f"No final answer after {self.max_rounds} rounds of tool calls."
+        console.print(f"[bold red]❌ {error_msg}[/bold red]")
+        return {"status": "error", "error": error_msg, "plan": plan, "results": results}
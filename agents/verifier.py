@@ -4,14 +4,70 @@ from .base_agent import BaseAgent
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
+from llm.json_stream import JSONArrayStreamParser
+from core.tracing import span
+from .summarizer import ResultSummarizer, estimate_tokens
 
 console = Console()
 
 class VerifierAgent(BaseAgent):
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, stream: bool = False, compact: bool = True):
         super().__init__(llm_client, "Verifier Agent")
+        self.stream = stream
+        # compact=False sends the raw executor results, as before
+        self.summarizer = ResultSummarizer() if compact else None
+
+    def _stream_answer(self, messages):
+        """
+        Streams the verifier response and prints each answer point the moment
+        its string closes, instead of waiting for the whole JSON body.
+        Returns (response, points rendered); the response is None if the
+        stream failed or produced nothing.
+        """
+        parser = JSONArrayStreamParser("answer_points")
+        chunks = []
+        rendered = 0
+        try:
+            for chunk in self.llm.stream(messages, json_mode=True):
+                chunks.append(chunk)
+                for point in parser.feed(chunk):
+                    if rendered == 0:
+                        console.rule("[bold green]Final Answer[/bold green]", style="green")
+                    console.print(Markdown(f"- {point}"))
+                    rendered += 1
+        except Exception as e:
+            console.print(f"[red]Error streaming from LLM: {e}[/red]")
+            chunks = []
+        finally:
+            if rendered:
+                console.rule(style="green")
+        response = "".join(chunks).replace("```json", "").replace("```", "").strip()
+        return response or None, rendered
+
+    def present(self, points) -> str:
+        """
+        Shows answer points that were produced without the LLM (e.g. a
+        router template answer) and returns them in the verifier's format.
+        """
+        with span("verify", template=True):
+            console.print(Panel(Markdown("\n".join(f"- {p}" for p in points)), title="Final Answer", style="green", border_style="green"))
+            return json.dumps({"answer_points": points, "success": True})
 
     def run(self, original_query, execution_results):
+        with span("verify", results=len(execution_results)) as s:
+            return self._verify(original_query, execution_results, s)
+
+    def _render_results(self, execution_results, s) -> str:
+        raw = json.dumps(execution_results, default=str)
+        if self.summarizer is None:
+            return raw
+        compact = self.summarizer.render(execution_results)
+        raw_tokens, compact_tokens = estimate_tokens(raw), estimate_tokens(compact)
+        s.set(results_tokens_raw=raw_tokens, results_tokens_compact=compact_tokens)
+        console.print(f"[dim]Results compacted: ~{raw_tokens} -> ~{compact_tokens} tokens[/dim]")
+        return compact
+
+    def _verify(self, original_query, execution_results, s):
         system_prompt = """
         You are the Verifier Agent.
         Review the execution results against the original query.
@@ -30,19 +86,25 @@ class VerifierAgent(BaseAgent):
         }
         """
         
-        user_content = f"Query: {original_query}\nResults: {json.dumps(execution_results)}"
+        user_content = f"Query: {original_query}\nResults: {self._render_results(execution_results, s)}"
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content}
         ]
 
         console.print("[bold magenta]Verifying results...[/bold magenta]")
-        response = self.llm.chat_completion(messages, json_mode=True)
+        response, rendered = self._stream_answer(messages) if self.stream else (None, 0)
+        if response is None:
+            # Not streaming, or the stream failed before producing anything
+            response = self.llm.chat_completion(messages, json_mode=True)
         
         try:
             data = json.loads(response)
             
             points = data.get("answer_points", [])
+            if rendered and points:
+                # Already rendered point by point
+                return response
             if not points and "final_answer" in data:
                  final_answer = data["final_answer"]
             else:
@@ -0,0 +1,306 @@
+import asyncio
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.http import HTTPPool
+from llm.client import LLMClient
+from tools.cache import make_key
+from tools.stock_tool import StockTool
+
+# Tools that talk to their upstream through a third-party library rather
+# than HTTPPool are recorded at the tool boundary instead
+TOOL_LEVEL = (StockTool,)
+
+# Query parameters that carry credentials and must not end up in fixtures
+SECRET_PARAMS = {"token", "apikey", "api_key", "key", "access_token"}
+
+# Part of every LLM fixture key. Bump it when a change makes recorded LLM
+# responses wrong (a new plan format, say), not for every prompt edit
+FIXTURE_VERSION = 1
+
+# The corpus query the calling flow is answering, see `fixture_query`
+_query: contextvars.ContextVar = contextvars.ContextVar("fixture_query", default=None)
+
+
+class FixtureMissing(KeyError):
+    """
+    Raised in replay mode when a call has no recorded response, so a
+    benchmark can never silently fall through to the network.
+    """
+
+
+class FixtureStore:
+    """
+    Recorded LLM, HTTP and tool responses, with how long each took, stored
+    as one JSON file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data: Dict[str, Dict[str, Any]] = {"llm": {}, "http": {}, "tool": {}}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data.update(json.load(f))
+
+    def get(self, kind: str, key: str) -> Dict[str, Any]:
+        entry = self.data[kind].get(key)
+        if entry is None:
+            raise FixtureMissing(f"No recorded {kind} response for {key[:80]}")
+        return entry
+
+    def put(self, kind: str, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self.data[kind][key] = entry
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=1, ensure_ascii=False, default=str)
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: len(entries) for kind, entries in self.data.items()}
+
+
+class LatencyModel:
+    """
+    How long a replayed call sleeps: the recorded duration times `scale`,
+    a fixed number of milliseconds, or nothing. `jitter` adds +/- that
+    fraction of random noise.
+    """
+
+    def __init__(self, mode: str = "recorded", fixed_ms: float = 0.0, scale: float = 1.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.mode = mode
+        self.fixed_ms = fixed_ms
+        self.scale = scale
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, recorded_seconds: float) -> float:
+        if self.mode == "none":
+            return 0.0
+        base = self.fixed_ms / 1000 if self.mode == "fixed" else recorded_seconds * self.scale
+        if self.jitter:
+            with self._lock:
+                base *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+
+class ReplayResponse:
+    """
+    The subset of requests/httpx Response the tools use.
+    """
+
+    def __init__(self, entry: Dict[str, Any]):
+        self.status_code = entry["status"]
+        self.text = entry["body"]
+        self.content = self.text.encode("utf-8")
+        self.headers = entry.get("headers", {})
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        # Tools only catch Exception, so requests' error stands in for httpx's too
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error (replayed)", response=self)
+
+
+def role_client(role: str, api_key: Optional[str] = None) -> LLMClient:
+    """
+    An LLMClient whose calls are recorded and replayed under `role`
+    (planner, verifier, tools).
+    """
+    client = LLMClient(api_key=api_key)
+    client.fixture_role = role
+    return client
+
+
+@contextmanager
+def fixture_query(query: str) -> Iterator[None]:
+    """
+    Files every LLM call made while answering `query` under it. Agents
+    and executor workers inherit it through the context.
+    """
+    token = _query.set(query)
+    try:
+        yield
+    finally:
+        _query.reset(token)
+
+
+def llm_key(client: LLMClient, messages) -> str:
+    """
+    "v1 planner: <query>", plus the turn for later rounds of a tool-calling
+    conversation. Prompts, the tool catalog and tool results are left out,
+    so editing them does not invalidate recorded responses.
+    """
+    query = _query.get()
+    if query is None:
+        query = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    key = f"v{FIXTURE_VERSION} {getattr(client, 'fixture_role', 'llm')}: {query}"
+    turn = sum(1 for m in messages if m.get("role") == "assistant")
+    return f"{key} #{turn}" if turn else key
+
+
+def http_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+    parts = urlsplit(url)
+    clean = {k: str(v) for k, v in sorted((params or {}).items()) if k not in SECRET_PARAMS}
+    return f"GET {parts.netloc}{parts.path}?{json.dumps(clean, sort_keys=True)}"
+
+
+@contextmanager
+def _patched(patches) -> Iterator[None]:
+    originals = [(owner, name, getattr(owner, name)) for owner, name, _ in patches]
+    for owner, name, replacement in patches:
+        setattr(owner, name, replacement)
+    try:
+        yield
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+
+
+@contextmanager
+def record(store: FixtureStore) -> Iterator[FixtureStore]:
+    """
+    Runs live while capturing every LLM, HTTP and library-backed tool
+    response into `store`, which is saved on exit.
+    """
+    complete = LLMClient.complete
+    call_tools = LLMClient.call_tools
+    stream = LLMClient.stream
+    get = HTTPPool.get
+    aget = HTTPPool.aget
+
+    def rec_chat(self, messages, json_mode=False):
+        t0 = time.perf_counter()
+        content = complete(self, messages, json_mode)
+        store.put("llm", llm_key(self, messages), {"content": content, "elapsed": time.perf_counter() - t0})
+        return content
+
+    def rec_tools(self, messages, tools):
+        t0 = time.perf_counter()
+        reply = call_tools(self, messages, tools)
+        store.put("llm", llm_key(self, messages), {"reply": reply, "elapsed": time.perf_counter() - t0})
+        return reply
+
+    def rec_stream(self, messages, json_mode=False):
+        t0 = time.perf_counter()
+        first = None
+        chunks = []
+        for chunk in stream(self, messages, json_mode):
+            first = first or time.perf_counter() - t0
+            chunks.append(chunk)
+            yield chunk
+        content = "".join(chunks).replace("```json", "").replace("```", "").strip()
+        store.put("llm", llm_key(self, messages), {"content": content, "elapsed": time.perf_counter() - t0, "first_token": first})
+
+    def _http_entry(response, elapsed):
+        return {"status": response.status_code, "body": response.text, "elapsed": elapsed}
+
+    def rec_get(self, url, **kwargs):
+        t0 = time.perf_counter()
+        response = get(self, url, **kwargs)
+        store.put("http", http_key(url, kwargs.get("params")), _http_entry(response, time.perf_counter() - t0))
+        return response
+
+    async def rec_aget(self, url, **kwargs):
+        t0 = time.perf_counter()
+        response = await aget(self, url, **kwargs)
+        store.put("http", http_key(url, kwargs.get("params")), _http_entry(response, time.perf_counter() - t0))
+        return response
+
+    patches = [
+        (LLMClient, "complete", rec_chat),
+        (LLMClient, "call_tools", rec_tools),
+        (LLMClient, "stream", rec_stream),
+        (HTTPPool, "get", rec_get),
+        (HTTPPool, "aget", rec_aget),
+    ]
+    for tool_cls in TOOL_LEVEL:
+        execute = tool_cls.execute
+
+        def rec_execute(self, _execute=execute, **kwargs):
+            t0 = time.perf_counter()
+            output = _execute(self, **kwargs)
+            store.put("tool", make_key(self.name, kwargs), {"output": output, "elapsed": time.perf_counter() - t0})
+            return output
+
+        patches.append((tool_cls, "execute", rec_execute))
+
+    with _patched(patches):
+        try:
+            yield store
+        finally:
+            store.save()
+
+
+@contextmanager
+def replay(store: FixtureStore, latency: LatencyModel) -> Iterator[FixtureStore]:
+    """
+    Serves every LLM, HTTP and library-backed tool call from `store`, with
+    delays from `latency`. Nothing touches the network; an unrecorded call
+    raises FixtureMissing.
+    """
+
+    def replay_chat(self, messages, json_mode=False):
+        entry = store.get("llm", llm_key(self, messages))
+        time.sleep(latency.delay(entry["elapsed"]))
+        return entry["content"]
+
+    def replay_tools(self, messages, tools):
+        entry = store.get("llm", llm_key(self, messages))
+        time.sleep(latency.delay(entry["elapsed"]))
+        return entry["reply"]
+
+    def replay_stream(self, messages, json_mode=False):
+        entry = store.get("llm", llm_key(self, messages))
+        total = latency.delay(entry["elapsed"])
+        first = latency.delay(entry.get("first_token") or entry["elapsed"])
+        content = entry["content"]
+        chunks = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        time.sleep(min(first, total))
+        step = max(0.0, total - first) / len(chunks)
+        for chunk in chunks:
+            yield chunk
+            time.sleep(step)
+
+    def replay_get(self, url, **kwargs):
+        entry = store.get("http", http_key(url, kwargs.get("params")))
+        time.sleep(latency.delay(entry["elapsed"]))
+        return ReplayResponse(entry)
+
+    async def replay_aget(self, url, **kwargs):
+        entry = store.get("http", http_key(url, kwargs.get("params")))
+        await asyncio.sleep(latency.delay(entry["elapsed"]))
+        return ReplayResponse(entry)
+
+    def replay_execute(self, **kwargs):
+        entry = store.get("tool", make_key(self.name, kwargs))
+        time.sleep(latency.delay(entry["elapsed"]))
+        return entry["output"]
+
+    patches = [
+        (LLMClient, "complete", replay_chat),
+        (LLMClient, "call_tools", replay_tools),
+        (LLMClient, "stream", replay_stream),
+        (HTTPPool, "get", replay_get),
+        (HTTPPool, "aget", replay_aget),
+    ]
+    patches += [(tool_cls, "execute", replay_execute) for tool_cls in TOOL_LEVEL]
+    with _patched(patches):
+        yield store
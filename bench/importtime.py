@@ -0,0 +1,81 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Returns (total microseconds, cumulative microseconds per module) from
+    `python -X importtime` output. The total sums the top-level imports only,
+    since nested ones are already included in their parent's cumulative time.
+    """
+    total = 0
+    cumulative = {}
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        _, cum, indent, module = m.groups()
+        cumulative[module] = int(cum)
+        if not indent:
+            total += int(cum)
+    return total, cumulative
+
+
+def measure(module: str, runs: int) -> Tuple[List[float], List[float], Dict[str, int]]:
+    """
+    Imports `module` in `runs` fresh interpreters. Returns the import-time
+    totals (ms), the process wall times (ms) and the per-module cumulative
+    times of the last run.
+    """
+    totals, walls, cumulative = [], [], {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        walls.append((time.perf_counter() - started) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        total, cumulative = parse_importtime(proc.stderr)
+        totals.append(total / 1000)
+    return totals, walls, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start import time with python -X importtime")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average over")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    totals, walls, cumulative = measure(args.module, args.runs)
+    console.print(
+        f"[bold]import {args.module}[/bold]: median {statistics.median(totals):.0f} ms import time, "
+        f"{statistics.median(walls):.0f} ms process wall time ({args.runs} runs)"
+    )
+
+    table = Table(title="Slowest imports (cumulative, last run)", border_style="blue")
+    table.add_column("Module")
+    table.add_column("ms", justify="right")
+    for module, us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        table.add_row(module, f"{us / 1000:.1f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
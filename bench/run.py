@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+import tools.geocode_index
+import tools.wikipedia_store
+from bench.fixtures import FixtureMissing, FixtureStore, LatencyModel, fixture_query, record, replay, role_client
+from core.batch import read_queries
+from core.tracing import percentile
+from tools.geocode_index import GeocodeIndex
+from tools.wikipedia_store import ArticleStore
+from tools.weather_tool import WeatherTool
+from tools.github_tool import GitHubTool
+from tools.news_tool import NewsTool
+from tools.wikipedia_tool import WikipediaTool
+from tools.stock_tool import StockTool
+from agents.planner import PlannerAgent
+from agents.executor import ExecutorAgent
+from agents.verifier import VerifierAgent
+from agents.tool_calling import ToolCallingAgent
+from main import run_flow, set_agents_quiet
+
+console = Console()
+
+BENCH_DIR = os.path.dirname(__file__)
+DEFAULT_QUERIES = os.path.join(BENCH_DIR, "queries.jsonl")
+# Live recordings go to RECORDED; SYNTHETIC is a small committed set with
+# made-up responses for the default corpus, so replay works from a checkout
+RECORDED_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "recorded.json")
+SYNTHETIC_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "synthetic.json")
+
+
+def build_pipeline(args, api_key=None):
+    """
+    Planner, executor and verifier with every cache off, so each iteration
+    pays for the full pipeline.
+    """
+    tools_list = [WeatherTool(), GitHubTool(), NewsTool(), WikipediaTool(), StockTool()]
+    planner_llm = role_client("planner", api_key)
+    planner = PlannerAgent(planner_llm, tools_list, stream=args.plan_stream)
+    executor = ExecutorAgent(planner_llm, tools_list, max_workers=args.max_workers, step_timeout=args.step_timeout)
+    verifier = VerifierAgent(role_client("verifier", api_key), stream=args.stream)
+    if args.mode == "tools":
+        planner = ToolCallingAgent(role_client("tools", api_key), tools_list, executor)
+    return planner, executor, verifier
+
+
+def reset_local_stores():
+    """
+    Fresh in-memory geocode index and Wikipedia store, so no run sees what
+    an earlier one (or anything persisted on disk) already looked up.
+    """
+    tools.geocode_index._index = GeocodeIndex(index_path=None)
+    tools.wikipedia_store._store = ArticleStore(path=None)
+
+
+def flow_error(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Why a run_flow result does not count as a good sample: the flow failed,
+    or one of its steps did (including tools that return "Error ..." text).
+    """
+    if result.get("status") != "success":
+        return result.get("error", "failed")
+    for entry in result.get("results") or []:
+        output = entry.get("output")
+        if entry.get("status") != "success":
+            return f"step {entry.get('step')} ({entry.get('tool')}): {entry.get('error', 'failed')}"
+        if isinstance(output, str) and output.startswith("Error"):
+            return f"step {entry.get('step')} ({entry.get('tool')}): {output}"
+    return None
+
+
+def run_level(handler: Callable[[str], Dict[str, Any]], queries: List[str], concurrency: int, iterations: int) -> Dict[str, Any]:
+    """
+    Runs every query `iterations` times with `concurrency` flows in flight
+    and returns latency percentiles (ms) and throughput (queries/s). Local
+    stores are reset before each iteration, which is not timed.
+    """
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def timed(query):
+        t0 = time.perf_counter()
+        try:
+            error = flow_error(handler(query))
+        except FixtureMissing as e:
+            error = f"fixture missing: {e}"
+        except Exception as e:
+            error = str(e)
+        return time.perf_counter() - t0, error
+
+    wall = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(iterations):
+            reset_local_stores()
+            started = time.perf_counter()
+            for elapsed, error in pool.map(timed, queries):
+                latencies.append(elapsed * 1000)
+                if error:
+                    errors.append(error)
+            wall += time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "queries": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "throughput_qps": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        "wall_seconds": round(wall, 3),
+    }
+
+
+def print_report(levels: List[Dict[str, Any]]):
+    table = Table(title="Benchmark", border_style="blue")
+    for column in ("Concurrency", "Queries", "Errors", "p50 ms", "p95 ms", "p99 ms", "Mean ms", "Throughput q/s"):
+        table.add_column(column, justify="right")
+    for level in levels:
+        table.add_row(
+            str(level["concurrency"]), str(level["queries"]), str(level["errors"]),
+            f"{level['p50_ms']:.1f}", f"{level['p95_ms']:.1f}", f"{level['p99_ms']:.1f}",
+            f"{level['mean_ms']:.1f}", f"{level['throughput_qps']:.2f}",
+        )
+    console.print(table)
+    for level in levels:
+        if level["first_error"]:
+            console.print(f"[red]concurrency {level['concurrency']}: {level['first_error']}[/red]")
+
+
+def regressions(levels: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compares p95 and throughput per concurrency level against a previous
+    --json report. Returns a message per metric that got worse by more than
+    `max_regression` (a fraction).
+    """
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    failures = []
+    for level in levels:
+        before = previous.get(level["concurrency"])
+        if not before:
+            continue
+        if before["p95_ms"] and level["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            failures.append(f"c={level['concurrency']} p95 {before['p95_ms']}ms -> {level['p95_ms']}ms")
+        if before["throughput_qps"] and level["throughput_qps"] < before["throughput_qps"] * (1 - max_regression):
+            failures.append(f"c={level['concurrency']} throughput {before['throughput_qps']} -> {level['throughput_qps']} q/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_flow against recorded LLM and API responses")
+    parser.add_argument("--record", action="store_true", help="Run the corpus once against the live APIs and save fixtures")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Query corpus (JSONL, same format as --batch)")
+    parser.add_argument("--fixtures", help=f"Fixture file to record into or replay from (default: {RECORDED_FIXTURES}; replay falls back to the synthetic set)")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=3, help="Times the corpus runs at each level")
+    parser.add_argument("--latency", choices=["recorded", "fixed", "none"], default="recorded", help="Injected latency per replayed call")
+    parser.add_argument("--fixed-ms", type=float, default=100.0, help="Delay per call with --latency fixed")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on recorded latencies")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- fraction added to each delay")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for --jitter")
+    parser.add_argument("--mode", choices=["pipeline", "tools"], default="pipeline", help="Agent loop to measure (record fixtures separately for each)")
+    parser.add_argument("--max-workers", type=int, default=4, help="Executor workers per flow")
+    parser.add_argument("--step-timeout", type=float, default=30.0, help="Per-step timeout in seconds")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Drive tools through their async interface")
+    parser.add_argument("--stream", action="store_true", help="Stream the verifier answer")
+    parser.add_argument("--plan-stream", action="store_true", help="Execute plan steps as the planner streams them")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON (usable as a later --baseline)")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail if p95 or throughput regressed against this report")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed regression as a fraction, for --baseline")
+    args = parser.parse_args()
+
+    queries = [query for _, query in read_queries(args.queries)]
+    if args.fixtures is None:
+        args.fixtures = RECORDED_FIXTURES if args.record or os.path.exists(RECORDED_FIXTURES) else SYNTHETIC_FIXTURES
+    store = FixtureStore(args.fixtures)
+    set_agents_quiet(True)
+
+    def handler(query):
+        with fixture_query(query):
+            return run_flow(query, planner, executor, verifier, use_async=args.use_async)
+
+    if args.record:
+        planner, executor, verifier = build_pipeline(args)
+        with record(store):
+            level = run_level(handler, queries, concurrency=1, iterations=1)
+        print_report([level])
+        console.print(f"[green]Recorded {store.counts()} into {args.fixtures}[/green]")
+        return
+
+    if not os.path.exists(args.fixtures):
+        console.print(f"[bold red]No fixtures at {args.fixtures}; run with --record first.[/bold red]")
+        sys.exit(2)
+
+    # Replay never reaches the LLM provider or GNews, any key will do
+    os.environ.setdefault("GNEWS_API_KEY", "replay")
+    console.print(f"[dim]Replaying {args.fixtures}[/dim]")
+    planner, executor, verifier = build_pipeline(args, api_key="replay")
+    latency = LatencyModel(args.latency, fixed_ms=args.fixed_ms, scale=args.scale, jitter=args.jitter, seed=args.seed)
+    levels = []
+    with replay(store, latency):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            levels.append(run_level(handler, queries, concurrency, args.iterations))
+    print_report(levels)
+
+    report = {"fixtures": args.fixtures, "latency": args.latency, "scale": args.scale, "levels": levels}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = any(level["errors"] for level in levels)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = regressions(levels, json.load(f), args.max_regression)
+        for failure in failures:
+            console.print(f"[bold red]Regression:[/bold red] {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+
+def read_records(path: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Yields (id, query, error) from a JSONL file. Each line is either an
+    object with "query" (and optionally "id") or a bare JSON string. Lines
+    without an id are numbered by position. A line that is neither comes
+    back with query None and the reason in `error`.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield str(line_no), None, f"Line {line_no} is not valid JSON: {e}"
+                continue
+            if isinstance(record, str):
+                yield str(line_no), record, None
+            elif isinstance(record, dict) and isinstance(record.get("query"), str):
+                yield str(record.get("id", line_no)), record["query"], None
+            else:
+                yield str(line_no), None, f"Line {line_no} has no \"query\""
+
+
+def read_queries(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (id, query) pairs from a JSONL file, raising ValueError on the
+    first line that is not a query.
+    """
+    for query_id, query, error in read_records(path):
+        if error:
+            raise ValueError(f"{path}: {error}")
+        yield query_id, query
+
+
+def completed_ids(path: str) -> Set[str]:
+    """
+    IDs already answered successfully in an output file, so a rerun can
+    resume. Failed ones (timeouts, rate limits, ...) are run again.
+    """
+    if not os.path.exists(path):
+        return set()
+    ids = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("status") == "success":
+                    ids.add(str(record["id"]))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # A half-written last line from an interrupted run
+                continue
+    return ids
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    handler: Callable[[str], Dict[str, Any]],
+    concurrency: int = 4,
+    on_result: Callable[[Dict[str, Any]], None] = None,
+) -> Dict[str, Any]:
+    """
+    Runs `handler(query)` over every query in `input_path` on a bounded
+    thread pool, appending one JSON line per query to `output_path` as soon
+    as it finishes. Queries already answered successfully in the output are
+    skipped. Input lines that are not queries are recorded as errors.
+    """
+    done_ids = completed_ids(output_path)
+    write_lock = threading.Lock()
+    summary = {"completed": 0, "failed": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    def process(query_id: str, query: str) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            record = {"id": query_id, "query": query, "status": "success"}
+            record.update(handler(query) or {"status": "error", "error": "No result"})
+        except Exception as e:
+            record = {"id": query_id, "query": query, "status": "error", "error": str(e)}
+        record["elapsed"] = round(time.perf_counter() - t0, 3)
+        write(record)
+        return record
+
+    def write(record: Dict[str, Any]):
+        with write_lock:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        in_flight = set()
+        for query_id, query, error in read_records(input_path):
+            if query_id in done_ids:
+                summary["skipped"] += 1
+                continue
+            done_ids.add(query_id)
+            if error:
+                record = {"id": query_id, "query": None, "status": "error", "error": error, "elapsed": 0.0}
+                write(record)
+                summary["failed"] += 1
+                if on_result is not None:
+                    on_result(record)
+                continue
+            # Keep the queue short so huge inputs are streamed, not loaded
+            if len(in_flight) >= concurrency * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                _tally(finished, summary, on_result)
+            in_flight.add(pool.submit(process, query_id, query))
+        _tally(wait(in_flight).done, summary, on_result)
+
+    summary["elapsed"] = round(time.perf_counter() - started, 3)
+    processed = summary["completed"] + summary["failed"]
+    summary["queries_per_second"] = round(processed / summary["elapsed"], 3) if summary["elapsed"] else 0.0
+    return summary
+
+
+def _tally(futures, summary: Dict[str, Any], on_result):
+    for future in futures:
+        record = future.result()
+        summary["completed" if record["status"] == "success" else "failed"] += 1
+        if on_result is not None:
+            on_result(record)
@@ -0,0 +1,332 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.tracing import span, current_span
+from core.rate_limit import get_rate_limiter
+from core.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    # httpx is only needed on the async path; import it when that is first used
+    import httpx
+
+# Upstream hiccups worth retrying with backoff. 429s are not here: they
+# pause the host's rate limiter and queue again (see _throttle_delay), and
+# urllib3 retrying them as well would multiply the attempts
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class HTTPPool:
+    """
+    Keep-alive HTTP connections shared by every tool.
+
+    Sync calls go through one `requests.Session` with a per-host urllib3 pool,
+    async calls through one `httpx.AsyncClient` per event loop. Both apply the
+    same timeouts and retry 5xx responses with exponential backoff; 429s
+    pause the host's rate limiter instead.
+
+    Every request first takes a token from the host's rate limiter, and
+    identical GETs already in flight are coalesced into one request.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_in_flight_per_host: Optional[int] = None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        # Caps concurrent requests to any one upstream; None means unbounded
+        self.max_in_flight_per_host = max_in_flight_per_host
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._async_host_slots = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._flights = SingleFlight()
+
+    # --- bookkeeping -------------------------------------------------------
+
+    def _count(self, host: str, **deltas: int):
+        with self._lock:
+            stats = self._stats.setdefault(host, {"requests": 0, "async_connections": 0, "retries": 0, "coalesced": 0, "throttled": 0})
+            for key, value in deltas.items():
+                stats[key] += value
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host counters. `connections` is how many TCP/TLS connections were
+        opened; everything above that in `requests` rode a reused connection.
+        """
+        sync_connections: Dict[str, int] = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sync_connections[pool.host] = sync_connections.get(pool.host, 0) + pool.num_connections
+
+        with self._lock:
+            report = {}
+            for host, stats in self._stats.items():
+                connections = stats["async_connections"] + sync_connections.get(host, 0)
+                report[host] = {
+                    "requests": stats["requests"],
+                    "connections": connections,
+                    "reused": max(0, stats["requests"] - connections),
+                    "retries": stats["retries"],
+                    "coalesced": stats["coalesced"],
+                    "throttled": stats["throttled"],
+                }
+            return report
+
+    # --- sync --------------------------------------------------------------
+
+    def _host_slot(self, host: str) -> Optional[threading.BoundedSemaphore]:
+        if not self.max_in_flight_per_host:
+            return None
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_in_flight_per_host)
+            return slot
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        host = urlsplit(url).hostname
+        with span(f"http GET {host}", path=urlsplit(url).path) as s:
+            led = []
+
+            def send():
+                led.append(True)
+                return self._send(host, url, **kwargs)
+
+            response = self._flights.do(_flight_key(url, kwargs), send)
+            if not led:
+                self._count(host, coalesced=1)
+                s.set(coalesced=True)
+            s.set(status=response.status_code, response_bytes=len(response.content))
+        return response
+
+    def _send(self, host: str, url: str, **kwargs) -> requests.Response:
+        limiter = get_rate_limiter()
+        attempt = 0
+        while True:
+            waited = limiter.acquire(host)
+            if waited:
+                current_span().add("rate_limited_ms", round(waited * 1000, 1))
+            slot = self._host_slot(host)
+            if slot is not None:
+                slot.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+            finally:
+                if slot is not None:
+                    slot.release()
+            retries = response.raw.retries if response.raw is not None else None
+            retry_count = len(retries.history) if retries else 0
+            self._count(host, requests=1, retries=retry_count)
+            current_span().add("retries", retry_count)
+
+            delay = _throttle_delay(response)
+            if delay is None or attempt >= self.retries:
+                return response
+            # Rate limited despite our accounting: hold everyone back, then queue again
+            self._count(host, throttled=1)
+            limiter.throttled(host, delay)
+            if limiter.bucket(host) is None:
+                time.sleep(delay)
+            attempt += 1
+
+    # --- async -------------------------------------------------------------
+
+    def _async_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # Forget clients of loops that have since closed (asyncio.run in
+            # scripts); run_flow itself always uses core.loop's shared loop
+            for closed in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[closed]
+                self._async_host_slots.pop(closed, None)
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_connections * self.pool_maxsize, max_keepalive_connections=self.pool_maxsize),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _async_host_slot(self, host: str) -> Optional[asyncio.Semaphore]:
+        if not self.max_in_flight_per_host:
+            return None
+        slots = self._async_host_slots.setdefault(asyncio.get_running_loop(), {})
+        if host not in slots:
+            slots[host] = asyncio.Semaphore(self.max_in_flight_per_host)
+        return slots[host]
+
+    async def aget(self, url: str, **kwargs) -> "httpx.Response":
+        host = urlsplit(url).hostname
+        with span(f"http GET {host}", path=urlsplit(url).path) as s:
+            led = []
+
+            async def send():
+                led.append(True)
+                return await self._aget(host, url, **kwargs)
+
+            response = await self._flights.ado(_flight_key(url, kwargs), send)
+            if not led:
+                self._count(host, coalesced=1)
+                s.set(coalesced=True)
+            s.set(status=response.status_code, response_bytes=len(response.content))
+        return response
+
+    async def _aget(self, host: str, url: str, **kwargs) -> "httpx.Response":
+        import httpx
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                self._count(host, async_connections=1)
+                current_span().add("new_connections")
+
+        client = self._async_client()
+        limiter = get_rate_limiter()
+        slot = self._async_host_slot(host)
+        extensions = {"trace": trace}
+        attempt = 0
+        while True:
+            try:
+                waited = await limiter.aacquire(host)
+                if waited:
+                    current_span().add("rate_limited_ms", round(waited * 1000, 1))
+                if slot is None:
+                    response = await client.get(url, extensions=extensions, **kwargs)
+                else:
+                    async with slot:
+                        response = await client.get(url, extensions=extensions, **kwargs)
+                throttle = _throttle_delay(response)
+                if (response.status_code not in RETRY_STATUSES and throttle is None) or attempt >= self.retries:
+                    self._count(host, requests=1, retries=attempt)
+                    current_span().set(retries=attempt)
+                    return response
+                if throttle is not None:
+                    self._count(host, throttled=1)
+                    limiter.throttled(host, throttle)
+                    # A paused bucket already delays the next attempt
+                    delay = 0.0 if limiter.bucket(host) else throttle
+                else:
+                    delay = _retry_after(response) or self.backoff_factor * (2 ** attempt)
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    self._count(host, requests=1, retries=attempt)
+                    raise
+                delay = self.backoff_factor * (2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """
+        Closes the async client bound to the running loop, if any.
+        """
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        self.session.close()
+
+
+def _flight_key(url: str, kwargs: Dict[str, Any]):
+    def freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), str(v)) for k, v in value.items()))
+        return repr(value)
+    return url, freeze(kwargs.get("params")), freeze(kwargs.get("headers"))
+
+
+def _throttle_delay(response) -> Optional[float]:
+    """
+    Seconds to back off if the upstream says we are over its rate limit:
+    a 429, or GitHub's 403 with X-RateLimit-Remaining: 0. None otherwise.
+    """
+    if response.status_code == 429:
+        return _retry_after(response) or 1.0
+    if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            reset = float(response.headers.get("X-RateLimit-Reset", ""))
+        except ValueError:
+            return 1.0
+        return min(60.0, max(1.0, reset - time.time()))
+    return None
+
+
+def _retry_after(response: "httpx.Response") -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+_pool: Optional[HTTPPool] = None
+_pool_lock = threading.Lock()
+
+
+def configure_pool(**kwargs: Any) -> HTTPPool:
+    """
+    Replaces the shared pool with one built from the given settings.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = HTTPPool(**kwargs)
+        return _pool
+
+
+def get_pool() -> HTTPPool:
+    """
+    Returns the process-wide pool, created on first use from HTTP_* env vars.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HTTPPool(
+                    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "20")),
+                    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+                    read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+                    retries=int(os.getenv("HTTP_RETRIES", "3")),
+                    max_in_flight_per_host=int(os.getenv("HTTP_MAX_IN_FLIGHT_PER_HOST", "0")) or None,
+                )
+    return _pool
@@ -0,0 +1,146 @@
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
+# A job is finished once it reaches one of these
+FINISHED = ("done", "failed")
+
+
+class Job:
+    """
+    One query running in the background, with its stage (queued, planning,
+    executing, verifying, done, failed) and live per-step progress.
+    """
+
+    def __init__(self, job_id: int, query: str):
+        self.id = job_id
+        self.query = query
+        self.status = "queued"
+        self.steps: Dict[Any, Dict[str, Any]] = {}  # step id -> {"tool", "status", "started", "ended"}
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def set_status(self, status: str):
+        with self._lock:
+            self.status = status
+
+    def step(self, step_id: Any, tool: Optional[str], status: str):
+        """
+        Records a step moving to `status`: pending, running, done or error.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self.steps.setdefault(step_id, {"tool": tool, "status": "pending", "started": None, "ended": None})
+            entry["status"] = status
+            if status == "running":
+                entry["started"] = now
+            elif status in ("done", "error"):
+                entry["ended"] = now
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {step_id: dict(entry) for step_id, entry in self.steps.items()}
+            status = self.status
+        return {"id": self.id, "query": self.query, "status": status, "elapsed": round(self.elapsed(), 1), "steps": steps}
+
+
+class _NullJob:
+    """
+    Stand-in outside any job, so progress reporting costs nothing.
+    """
+
+    id = None
+
+    def set_status(self, status: str):
+        pass
+
+    def step(self, step_id: Any, tool: Optional[str], status: str):
+        pass
+
+
+NULL_JOB = _NullJob()
+
+
+def current_job() -> Any:
+    """
+    The job the calling code runs under, or NULL_JOB.
+    """
+    return _current_job.get() or NULL_JOB
+
+
+class JobManager:
+    """
+    Runs queries as background jobs on a bounded pool, so an interactive
+    prompt can take the next query while earlier ones are still running.
+    `handler(query)` runs with the job as `current_job()`; `on_done(job)` is
+    called when it finishes.
+    """
+
+    def __init__(self, handler: Callable[[str], Dict[str, Any]], max_jobs: int = 4, on_done: Optional[Callable[[Job], None]] = None):
+        self.handler = handler
+        self.on_done = on_done
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self._jobs: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, query: str) -> Job:
+        job = Job(next(self._ids), query)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job):
+        token = _current_job.set(job)
+        job.started = time.time()
+        job.set_status("running")
+        try:
+            job.result = self.handler(job.query)
+            job.set_status("done" if job.result and job.result.get("status") == "success" else "failed")
+        except Exception as e:
+            job.result = {"status": "error", "error": str(e)}
+            job.set_status("failed")
+        finally:
+            job.finished = time.time()
+            _current_job.reset(token)
+        if self.on_done is not None:
+            self.on_done(job)
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self) -> List[Job]:
+        return [job for job in self.jobs() if not job.done]
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Blocks until every submitted job has finished.
+        """
+        wait([job.future for job in self.jobs()], timeout=timeout)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
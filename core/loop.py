@@ -0,0 +1,45 @@
+import asyncio
+import contextvars
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    The process-wide event loop, running forever on a daemon thread. Async
+    clients bound to it (like HTTPPool's httpx.AsyncClient) and their
+    keep-alive connections live as long as the process.
+    """
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _loop_thread = threading.Thread(target=loop.run_forever, name="event-loop", daemon=True)
+                _loop_thread.start()
+                _loop = loop
+    return _loop
+
+
+async def _in_context(ctx: contextvars.Context, coro: Awaitable) -> Any:
+    # The task starts from the loop thread's context; carry over the caller's
+    # (current span, current job, ...)
+    for var, value in ctx.items():
+        var.set(value)
+    return await coro
+
+
+def run_async(coro: Awaitable) -> Any:
+    """
+    Runs `coro` on the shared loop and blocks until it finishes. Use this
+    instead of asyncio.run, which would build (and tear down) a new loop,
+    and with it a new connection pool, on every call.
+    """
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_async called from the shared event loop itself")
+    return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), loop).result()
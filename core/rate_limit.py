@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Requests per period for the upstreams we know the limits of. Callers
+# queue for a token instead of getting a 429 back
+DEFAULT_LIMITS = {
+    "api.github.com": "10/60",  # unauthenticated search; 30/60 with GITHUB_TOKEN
+    "gnews.io": "1/1",
+    "api.groq.com": "30/60",
+    "api.open-meteo.com": "600/60",
+    "geocoding-api.open-meteo.com": "600/60",
+}
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second, bursting up to `capacity`. Callers reserve a
+    token and are told how long to wait for it, so waiters are served in
+    arrival order and throughput settles at the limit instead of failing.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "throttled": 0}
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative is a reservation: the debt is repaid by refill
+            self._tokens -= 1
+            # Tokens keep refilling during a pause, so the two waits overlap
+            wait = max(0.0, -self._tokens / self.rate, self._paused_until - now)
+            self._stats["acquired"] += 1
+            if wait > 0:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += wait
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Blocks until a token is available. Returns the seconds waited.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self) -> float:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """
+        Holds every caller back for `seconds`, e.g. after the upstream said
+        Retry-After despite our accounting.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats["throttled"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats, wait_seconds=round(self._stats["wait_seconds"], 3))
+
+
+def parse_limit(spec: str) -> Optional[TokenBucket]:
+    """
+    "10/60" -> 10 requests per 60 seconds, bursting up to 10. "off" -> None.
+    """
+    if spec.strip().lower() == "off":
+        return None
+    count, _, period = spec.partition("/")
+    count = float(count)
+    return TokenBucket(rate=count / float(period or 1), capacity=max(1.0, count))
+
+
+class RateLimiter:
+    """
+    One token bucket per upstream host, shared by every tool and the LLM
+    client. Hosts without a configured limit are not limited.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, str]] = None):
+        self._buckets: Dict[str, TokenBucket] = {}
+        for host, spec in (limits or {}).items():
+            bucket = parse_limit(spec)
+            if bucket is not None:
+                self._buckets[host] = bucket
+
+    def bucket(self, host: Optional[str]) -> Optional[TokenBucket]:
+        return self._buckets.get(host) if host else None
+
+    def acquire(self, host: Optional[str]) -> float:
+        bucket = self.bucket(host)
+        return bucket.acquire() if bucket else 0.0
+
+    async def aacquire(self, host: Optional[str]) -> float:
+        bucket = self.bucket(host)
+        return await bucket.aacquire() if bucket else 0.0
+
+    def throttled(self, host: Optional[str], seconds: float):
+        bucket = self.bucket(host)
+        if bucket is not None:
+            bucket.pause(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {host: bucket.stats() for host, bucket in self._buckets.items()}
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter. RATE_LIMITS overrides or adds hosts, e.g.
+    "gnews.io=2/1,api.groq.com=off".
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                limits = dict(DEFAULT_LIMITS)
+                token = os.getenv("GITHUB_TOKEN")
+                if token and token != "optional_github_token_here":
+                    limits["api.github.com"] = "30/60"
+                for entry in filter(None, os.getenv("RATE_LIMITS", "").split(",")):
+                    host, _, spec = entry.partition("=")
+                    limits[host.strip()] = spec.strip()
+                _limiter = RateLimiter(limits)
+    return _limiter
@@ -0,0 +1,100 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+from rich.console import Console
+from rich.markup import escape
+from .jobs import current_job
+
+
+class RenderQueue:
+    """
+    Writes everything to the terminal from one background thread, so code
+    that prints never waits on the terminal, and renderables from concurrent
+    jobs never interleave. Whenever output switches to another job, a header
+    naming the job is printed first.
+    """
+
+    def __init__(self, console: Optional[Console] = None):
+        self.console = console or Console()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._last_job = None
+        self._thread = threading.Thread(target=self._drain, name="render", daemon=True)
+        self._thread.start()
+
+    def put(self, method: str, args: tuple, kwargs: dict, job: Any = None):
+        self._queue.put((method, args, kwargs, job))
+
+    def _drain(self):
+        while True:
+            method, args, kwargs, job = self._queue.get()
+            try:
+                if method == "flush":
+                    args[0].set()
+                    continue
+                if job is not None and job is not self._last_job:
+                    self.console.rule(f"[dim]#{job.id} {job.query}[/dim]", style="dim", align="left")
+                self._last_job = job
+                getattr(self.console, method)(*args, **kwargs)
+            except Exception as e:
+                # A bad renderable must not stop the output of every other job
+                # Escaped: the error often quotes the markup that broke
+                self.console.print(f"[red]Render error: {escape(str(e))}[/red]")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Waits until everything queued so far has been printed.
+        """
+        printed = threading.Event()
+        self.put("flush", (printed,), {})
+        printed.wait(timeout)
+
+
+class QueuedConsole:
+    """
+    Drop-in for a module's `console` that hands output to a RenderQueue
+    instead of writing it directly. Each call is tagged with the job it
+    came from.
+    """
+
+    def __init__(self, render_queue: RenderQueue):
+        self.render_queue = render_queue
+        self.quiet = False
+
+    def _put(self, method: str, args: tuple, kwargs: dict):
+        if not self.quiet:
+            job = current_job()
+            self.render_queue.put(method, args, kwargs, job if job.id is not None else None)
+
+    def print(self, *args: Any, **kwargs: Any):
+        self._put("print", args, kwargs)
+
+    def rule(self, *args: Any, **kwargs: Any):
+        self._put("rule", args, kwargs)
+
+    def input(self, *args: Any, **kwargs: Any) -> str:
+        # Pending output first, so the prompt lands below it
+        self.render_queue.flush()
+        return self.render_queue.console.input(*args, **kwargs)
+
+
+@contextmanager
+def queued_output(modules: Iterable[Any]) -> Iterator[RenderQueue]:
+    """
+    Points the `console` of every module at one shared RenderQueue for the
+    duration; on exit, prints whatever is still queued and puts the
+    original consoles back.
+    """
+    modules = list(modules)
+    originals = [module.console for module in modules]
+    render_queue = RenderQueue()
+    for module in modules:
+        module.console = QueuedConsole(render_queue)
+    try:
+        yield render_queue
+    finally:
+        render_queue.flush()
+        for module, original in zip(modules, originals):
+            module.console = original
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional
+
+
+def query_key(query: str) -> str:
+    """
+    "Top news today?" and "top  news today" share one key.
+    """
+    return " ".join(query.split()).strip(" ?!.").casefold()
+
+
+class QueryStore:
+    """
+    On-disk history of every query run_flow answered: the query, its plan,
+    tool results and final answer, with timestamps. Payloads are stored
+    zlib-compressed JSON.
+
+    A run also records `fresh_until`, the earliest expiry among its tool
+    results. Until then, asking the same query again is answered from the
+    store without planning, tools or verification. Serving those memoized
+    answers is what `memoize` controls; history is recorded either way.
+
+    `flow` names the setup that produced an answer (mode, prompts, tools);
+    a memoized answer is only served to the same flow.
+    """
+
+    def __init__(self, path: Optional[str] = ".cache/history.sqlite3", memoize: bool = True):
+        self.path = path or ":memory:"
+        self.memoize = memoize
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, query_key TEXT NOT NULL, "
+            "status TEXT NOT NULL, started_at REAL NOT NULL, finished_at REAL NOT NULL, "
+            "fresh_until REAL, memo_of INTEGER, data BLOB, flow TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "flow" not in columns:
+            # Stores written before flows were recorded; their runs keep
+            # flow '' and are never served as memoized answers again
+            self._conn.execute("ALTER TABLE runs ADD COLUMN flow TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_query ON runs(query_key, finished_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_started ON runs(started_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def lookup(self, query: str, flow: str = "") -> Optional[Dict[str, Any]]:
+        """
+        The latest answer to `query` from the same `flow` whose tool results
+        are all still fresh, as a run_flow result marked "memoized", or None.
+        """
+        if not self.memoize:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, finished_at, data FROM runs "
+                "WHERE query_key = ? AND flow = ? AND memo_of IS NULL AND fresh_until > ? "
+                "ORDER BY finished_at DESC LIMIT 1",
+                (query_key(query), flow, time.time()),
+            ).fetchone()
+            self._stats["hits" if row else "misses"] += 1
+        if row is None:
+            return None
+        run_id, finished_at, data = row
+        # Only successful runs are ever given a freshness window
+        return dict(json.loads(zlib.decompress(data)), status="success", memoized=True, run_id=run_id, answered_at=finished_at)
+
+    def record(self, query: str, result: Dict[str, Any], started_at: float, fresh_until: Optional[float] = None, flow: str = "") -> int:
+        """
+        Stores one run_flow result. `fresh_until` (epoch seconds) makes it
+        eligible for memoized answers until then; None never serves it.
+        """
+        payload = {key: result.get(key) for key in ("status", "plan", "results", "answer", "error")}
+        data = zlib.compress(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (query, query_key, status, started_at, finished_at, fresh_until, data, flow) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (query, query_key(query), result.get("status", "error"), started_at, time.time(), fresh_until, data, flow),
+            )
+            self._conn.commit()
+            self._stats["recorded"] += 1
+            return cursor.lastrowid
+
+    def record_hit(self, query: str, run_id: int, flow: str = ""):
+        """
+        Logs a memoized answer as a run of its own pointing at the original,
+        so history shows every time the query was asked.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (query, query_key, status, started_at, finished_at, memo_of, flow) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query, query_key(query), "success", now, now, run_id, flow),
+            )
+            self._conn.commit()
+
+    def history(self, query: Optional[str] = None, since: Optional[float] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorded runs, oldest first, optionally only those for `query` or
+        started at or after `since` (epoch seconds). Memoized answers carry
+        `memo_of`, the id of the run they were served from, and no payload.
+        """
+        clauses, params = [], []
+        if query is not None:
+            clauses.append("query_key = ?")
+            params.append(query_key(query))
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        sql = "SELECT id, query, status, started_at, finished_at, fresh_until, memo_of, flow, data FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY started_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for run_id, query_text, status, started_at, finished_at, fresh_until, memo_of, flow, data in rows:
+            record = {
+                "id": run_id,
+                "query": query_text,
+                "status": status,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "elapsed": round(finished_at - started_at, 3),
+                "fresh_until": fresh_until,
+                "memo_of": memo_of,
+                "flow": flow,
+            }
+            if data is not None:
+                record.update(json.loads(zlib.decompress(data)))
+            yield record
+
+    def export(self, path: str, since: Optional[float] = None) -> int:
+        """
+        Writes the history to `path` as JSON lines. Returns the run count.
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as out:
+            for record in self.history(since=since):
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (runs,) = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()
+            return dict(self._stats, runs=runs)
@@ -0,0 +1,237 @@
+import contextvars
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """
+    One timed unit of work (plan, tool step, HTTP call, LLM call, ...).
+    Attributes carry whatever the instrumented code knows: token counts,
+    payload sizes, retries, cache hits.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = next(_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes)
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start)
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: float = 1):
+        """
+        Accumulates a counter attribute, e.g. retries across attempts.
+        """
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    """
+    Stand-in used while tracing is off, so instrumentation costs nothing.
+    """
+
+    span_id = None
+    trace_id = None
+    duration = 0.0
+
+    def set(self, **attributes: Any):
+        pass
+
+    def add(self, key: str, amount: float = 1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_spans: int = 100000):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        # Oldest spans are dropped first so long batch runs stay bounded
+        self._spans: "deque[Span]" = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=str(e))
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def start_span(self, name: str, **attributes: Any) -> Any:
+        """
+        Starts a span without making it current. For work that is suspended
+        and resumed, like a streamed LLM response, where the caller's own
+        spans must not nest under it. Close it with `finish`.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(name, _current_span.get(), attributes)
+
+    def finish(self, span: Any):
+        if isinstance(span, Span):
+            span.end = time.perf_counter()
+            with self._lock:
+                self._spans.append(span)
+
+    def spans(self, trace_id: Optional[int] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [s for s in spans if s.trace_id == trace_id]
+        return sorted(spans, key=lambda s: s.start)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def export_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.spans():
+                f.write(json.dumps(span.to_dict(self.origin), default=str) + "\n")
+
+    def export_chrome(self, path: str):
+        """
+        Writes the Chrome trace event format; open it in chrome://tracing or
+        https://ui.perfetto.dev.
+        """
+        events = []
+        for span in self.spans():
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(" ")[0].split(":")[0],
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": 1,
+                "tid": span.thread_id,
+                "args": span.attributes,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def export(self, path: str):
+        if path.endswith(".jsonl"):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome(path)
+
+    def summary(self, trace_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregates spans by name: count, total/avg/max wall time, and the
+        token and byte counters recorded on them.
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans(trace_id):
+            row = rows.setdefault(span.name, {"name": span.name, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                              "prompt_tokens": 0, "completion_tokens": 0, "bytes": 0,
+                                              "retries": 0, "cache_hits": 0})
+            ms = span.duration * 1000
+            row["count"] += 1
+            row["total_ms"] += ms
+            row["max_ms"] = max(row["max_ms"], ms)
+            attrs = span.attributes
+            row["prompt_tokens"] += attrs.get("prompt_tokens") or 0
+            row["completion_tokens"] += attrs.get("completion_tokens") or 0
+            row["bytes"] += (attrs.get("request_bytes") or 0) + (attrs.get("response_bytes") or 0)
+            row["retries"] += attrs.get("retries") or 0
+            row["cache_hits"] += 1 if attrs.get("cache_hit") else 0
+        for row in rows.values():
+            row["avg_ms"] = row["total_ms"] / row["count"]
+        return list(rows.values())
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """
+    Shorthand for get_tracer().span(...).
+    """
+    return _tracer.span(name, **attributes)
+
+
+def current_span() -> Any:
+    """
+    The innermost active span, or a no-op span when there is none.
+    """
+    return _current_span.get() or NULL_SPAN
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Binds `fn` to the caller's context so spans opened on a worker thread
+    nest under the span that submitted the work.
+    """
+    ctx = contextvars.copy_context()
+    # A Context can only be entered by one thread at a time, so each call
+    # runs in its own copy
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+def payload_size(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -1,11 +1,23 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
-from termcolor import colored
+import time
+import threading
+from typing import List, Dict, Any, Optional, Iterator
+from urllib.parse import urlsplit
+from rich.console import Console
+from core.tracing import get_tracer, payload_size
+from core.rate_limit import get_rate_limiter
+from core.singleflight import SingleFlight
+
+console = Console()
+
+# Attempts for a request the provider rejects with 429
+RATE_LIMIT_ATTEMPTS = 3
+# Seconds before the first retry of a 5xx or connection error; doubles each time
+RETRY_BACKOFF = 0.5
 
 class LLMClient:
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: str = "llama-3.3-70b-versatile"):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: str = "llama-3.3-70b-versatile", timeout: Optional[float] = None, max_retries: int = 2):
         self.api_key = api_key or os.getenv("GROQ_API_KEY") or os.getenv("OPENAI_API_KEY")
         self.base_url = base_url or os.getenv("LLM_BASE_URL")
         
@@ -18,28 +30,204 @@ class LLMClient:
              self.model = "llama-3.3-70b-versatile"
 
         if not self.api_key:
-            print(colored("Warning: No API Key (GROQ_API_KEY or OPENAI_API_KEY) found.", "yellow"))
+            console.print("[yellow]Warning: No API Key (GROQ_API_KEY or OPENAI_API_KEY) found.[/yellow]")
         
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        # Passed to the SDK; None keeps its default (600s)
+        self.timeout = timeout
+        # Retries of 5xx and connection errors, done by _create rather than the
+        # SDK, whose own retries would also repeat 429s behind the limiter's back
+        self.max_retries = max_retries
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Requests are rate limited per provider host, shared with the tools' limiter
+        self.rate_key = urlsplit(self.base_url).hostname if self.base_url else "api.openai.com"
+        self._flights = SingleFlight()
+
+    @property
+    def client(self):
+        """
+        The OpenAI SDK client, created on first use. Importing `openai` is
+        the slowest part of startup, and rule-routed queries never need it.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    kwargs = {"api_key": self.api_key, "base_url": self.base_url, "max_retries": 0}
+                    if self.timeout is not None:
+                        kwargs["timeout"] = self.timeout
+                    self._client = OpenAI(**kwargs)
+        return self._client
+
+    def _request_kwargs(self, messages: List[Dict[str, str]], json_mode: bool) -> Dict[str, Any]:
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+        }
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    def _create(self, kwargs: Dict[str, Any], span):
+        """
+        Calls the provider once a rate limit token is available. A 429 pauses
+        every caller sharing the limiter and the request queues again; 5xx
+        and connection errors are retried `max_retries` times with backoff.
+        """
+        from openai import APIConnectionError
+
+        limiter = get_rate_limiter()
+        throttled = failed = 0
+        while True:
+            waited = limiter.acquire(self.rate_key)
+            if waited:
+                span.add("rate_limited_ms", round(waited * 1000, 1))
+            try:
+                return self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status == 429:
+                    throttled += 1
+                    if throttled >= RATE_LIMIT_ATTEMPTS:
+                        raise
+                    delay = _retry_after(e)
+                    limiter.throttled(self.rate_key, delay)
+                    span.add("throttled")
+                    if limiter.bucket(self.rate_key) is None:
+                        time.sleep(delay)
+                    continue
+                if not (isinstance(e, APIConnectionError) or (status or 0) >= 500) or failed >= self.max_retries:
+                    raise
+                span.add("retries")
+                time.sleep(RETRY_BACKOFF * (2 ** failed))
+                failed += 1
+
+    def _complete(self, messages: List[Dict[str, str]], json_mode: bool, span) -> str:
+        response = self._create(self._request_kwargs(messages, json_mode), span)
+        _record_usage(span, getattr(response, "usage", None))
+        content = response.choices[0].message.content
+        if content:
+            content = content.replace("```json", "").replace("```", "").strip()
+        span.set(response_bytes=payload_size(content or ""))
+        return content
+
+    def complete(self, messages: List[Dict[str, str]], json_mode: bool = False) -> str:
+        """
+        Sends a chat completion request and returns the content, raising on
+        failure. Identical requests already in flight (same model, messages
+        and mode) share one provider call.
+        """
+        with get_tracer().span("llm", model=self.model, request_bytes=payload_size(messages)) as span:
+            led = []
+
+            def call():
+                led.append(True)
+                return self._complete(messages, json_mode, span)
+
+            key = (self.model, json.dumps(messages, sort_keys=True), json_mode)
+            content = self._flights.do(key, call)
+            if not led:
+                span.set(coalesced=True)
+            return content
 
     def chat_completion(self, messages: List[Dict[str, str]], json_mode: bool = False) -> str:
         """
         Sends a chat completion request to the LLM.
         """
         try:
-            kwargs = {
-                "model": self.model,
-                "messages": messages,
-            }
-            if json_mode:
-                kwargs["response_format"] = {"type": "json_object"}
-
-            response = self.client.chat.completions.create(**kwargs)
-            content = response.choices[0].message.content
-            if content:
-                content = content.replace("```json", "").replace("```", "").strip()
-            return content
+            return self.complete(messages, json_mode)
         except Exception as e:
-            print(colored(f"Error calling LLM: {e}", "red"))
+            console.print(f"[red]Error calling LLM: {e}[/red]")
             # return empty JSON in case of error to prevent crash in downstream JSON parsing
             return "{}"
+
+    def call_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        One turn with native function calling, raising on failure. Returns
+        {"content": str or None, "tool_calls": [{"id", "name", "arguments"}]},
+        where `arguments` is the raw JSON string the model produced.
+        """
+        with get_tracer().span("llm", model=self.model, request_bytes=payload_size(messages), tools=len(tools)) as span:
+            response = self._create({"model": self.model, "messages": messages, "tools": tools, "tool_choice": "auto"}, span)
+            _record_usage(span, getattr(response, "usage", None))
+            message = response.choices[0].message
+            calls = [
+                {"id": call.id, "name": call.function.name, "arguments": call.function.arguments or "{}"}
+                for call in (message.tool_calls or [])
+            ]
+            span.set(tool_calls=len(calls), response_bytes=payload_size(message.content or ""))
+            return {"content": message.content, "tool_calls": calls}
+
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Like `call_tools`, but a failure comes back as {"error": ...} with no
+        tool calls.
+        """
+        try:
+            return self.call_tools(messages, tools)
+        except Exception as e:
+            console.print(f"[red]Error calling LLM: {e}[/red]")
+            return {"content": None, "tool_calls": [], "error": str(e)}
+
+    def stream(self, messages: List[Dict[str, str]], json_mode: bool = False) -> Iterator[str]:
+        """
+        Streams a chat completion, yielding content deltas as they arrive and
+        raising on failure. Code fences are left in; callers parsing JSON
+        should skip them.
+        """
+        tracer = get_tracer()
+        span = tracer.start_span("llm stream", model=self.model, request_bytes=payload_size(messages))
+        received = 0
+        try:
+            kwargs = self._request_kwargs(messages, json_mode)
+            kwargs["stream"] = True
+            # Final chunk then carries token usage
+            kwargs["stream_options"] = {"include_usage": True}
+            for chunk in self._create(kwargs, span):
+                _record_usage(span, getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not received:
+                        span.set(first_token_ms=round(span.duration * 1000, 3))
+                    received += len(delta.encode("utf-8"))
+                    yield delta
+        except Exception as e:
+            span.set(error=str(e))
+            raise
+        finally:
+            span.set(response_bytes=received)
+            tracer.finish(span)
+
+    def stream_chat_completion(self, messages: List[Dict[str, str]], json_mode: bool = False) -> Iterator[str]:
+        """
+        Like `stream`, but a failure just ends the stream.
+        """
+        try:
+            yield from self.stream(messages, json_mode)
+        except Exception as e:
+            console.print(f"[red]Error streaming from LLM: {e}[/red]")
+
+    def for_role(self, role: str) -> "LLMClient":
+        """
+        The client an agent in `role` should use. A single client serves every
+        role; LLMRouter picks per-role endpoints.
+        """
+        return self
+
+def _retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except (AttributeError, TypeError, ValueError):
+        return 2.0
+
+
+def _record_usage(span, usage):
+    if usage is not None:
+        span.set(prompt_tokens=getattr(usage, "prompt_tokens", None), completion_tokens=getattr(usage, "completion_tokens", None))
+        # Prompt tokens served from the provider's prompt cache, where reported
+        cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        if cached is not None:
+            span.set(cached_tokens=cached)
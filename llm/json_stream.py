@@ -0,0 +1,96 @@
+import json
+from typing import Any, List, Optional
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally parses a streamed JSON object and yields the elements of
+    one top-level array (e.g. "answer_points") as soon as each closes.
+
+    Text outside the object, such as markdown code fences, is ignored.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._expect_array = False
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def _emit(self, raw: str, items: List[Any]):
+        self._item_start = None
+        try:
+            items.append(json.loads(raw))
+        except ValueError:
+            # A malformed element should not take the rest of the stream down
+            pass
+
+    def _in_array(self) -> bool:
+        return self._array_depth is not None and self._depth == self._array_depth
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consumes the next chunk and returns the array elements it completed.
+        """
+        items: List[Any] = []
+        self._buffer += chunk
+        while self._pos < len(self._buffer) and not self.done:
+            i = self._pos
+            c = self._buffer[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    token = self._buffer[self._string_start:i + 1]
+                    if self._in_array() and self._item_start == self._string_start:
+                        self._emit(token, items)
+                    else:
+                        self._last_string = token
+                continue
+
+            if c.isspace():
+                continue
+            if self._in_array() and self._item_start is None and c not in ",]":
+                self._item_start = i
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._expect_array = False
+            elif c == ":":
+                if self._array_depth is None and self._depth == 1 and self._last_string is not None:
+                    self._expect_array = json.loads(self._last_string) == self.key
+                self._last_string = None
+            elif c in "[{":
+                self._depth += 1
+                if c == "[" and self._expect_array:
+                    self._array_depth = self._depth
+                self._expect_array = False
+            elif c in "]}":
+                if c == "]" and self._in_array():
+                    if self._item_start is not None:
+                        self._emit(self._buffer[self._item_start:i].strip(), items)
+                    self._array_depth = None
+                    self.done = True
+                self._depth -= 1
+                if self._in_array() and self._item_start is not None:
+                    self._emit(self._buffer[self._item_start:i + 1], items)
+            elif c == ",":
+                if self._in_array() and self._item_start is not None:
+                    self._emit(self._buffer[self._item_start:i].strip(), items)
+                self._last_string = None
+            else:
+                self._expect_array = False
+        return items
@@ -0,0 +1,484 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from rich.console import Console
+from core.tracing import bind, current_span, percentile
+from .client import LLMClient
+
+console = Console()
+
+# Latency samples an endpoint needs before its p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+ALL_ROLES = "*"
+
+
+class LLMUnavailable(Exception):
+    """
+    Raised when every endpoint for a role failed or has its circuit open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `cooldown` seconds. Then one trial call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class Endpoint:
+    """
+    One OpenAI-compatible base URL + model, the roles it serves, and its
+    health: a circuit breaker and a window of recent latencies.
+    """
+
+    def __init__(self, name: str, client: LLMClient, roles: Optional[List[str]] = None, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.client = client
+        self.roles = set(roles or [ALL_ROLES])
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=200)
+        self._first_chunks = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "hedges": 0, "wins": 0}
+
+    def serves(self, role: str) -> bool:
+        return ALL_ROLES in self.roles or role in self.roles
+
+    def p95(self, first_chunk: bool = False) -> Optional[float]:
+        """
+        Seconds to a full answer, or with `first_chunk` to a stream's first
+        chunk; None until there are enough samples to trust it.
+        """
+        with self._lock:
+            samples = list(self._first_chunks if first_chunk else self._latencies)
+        return percentile(samples, 95) if len(samples) >= HEDGE_MIN_SAMPLES else None
+
+    def record_first_chunk(self, elapsed: float):
+        with self._lock:
+            self._first_chunks.append(elapsed)
+
+    def record(self, elapsed: float, error: bool):
+        with self._lock:
+            self._stats["requests"] += 1
+            if error:
+                self._stats["errors"] += 1
+            else:
+                self._latencies.append(elapsed)
+        if error:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._latencies)
+            stats = dict(self._stats)
+        return dict(
+            stats,
+            model=self.client.model,
+            state=self.breaker.state,
+            p50_ms=round(percentile(samples, 50) * 1000, 1),
+            p95_ms=round(percentile(samples, 95) * 1000, 1),
+        )
+
+
+class LLMRouter:
+    """
+    Spreads LLM calls over several endpoints. Each agent role (planner,
+    verifier, tools) gets the endpoints configured for it, in order.
+
+    A call goes to the first healthy endpoint. If it has not answered within
+    that endpoint's p95 latency, a hedged duplicate goes to the next one and
+    the first answer wins. Errors and timeouts fail over to the next endpoint
+    straight away, and feed a per-endpoint circuit breaker so a failing
+    provider is skipped until it recovers.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], hedge: bool = True, max_workers: int = 16):
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint")
+        self.endpoints = endpoints
+        self.hedge = hedge
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "unavailable": 0}
+
+    @property
+    def model(self) -> str:
+        return self.endpoints[0].client.model
+
+    def for_role(self, role: str) -> "RoleClient":
+        return RoleClient(self, role)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _serving(self, role: str) -> List[Endpoint]:
+        return [e for e in self.endpoints if e.serves(role)] or list(self.endpoints)
+
+    @staticmethod
+    def _next(queue: List[Endpoint]) -> Optional[Endpoint]:
+        # Asked only when about to call, since a half-open breaker admits one trial
+        while queue:
+            endpoint = queue.pop(0)
+            if endpoint.breaker.allow():
+                return endpoint
+        return None
+
+    def _timed(self, endpoint: Endpoint, fn: Callable[[LLMClient], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = fn(endpoint.client)
+        except Exception:
+            endpoint.record(time.perf_counter() - started, error=True)
+            raise
+        endpoint.record(time.perf_counter() - started, error=False)
+        return result
+
+    def call(self, role: str, fn: Callable[[LLMClient], Any]) -> Any:
+        """
+        Runs `fn(client)` against the role's endpoints with hedging and
+        failover. Raises LLMUnavailable if no endpoint produced a result.
+        """
+        self._count("calls")
+        queue = self._serving(role)
+        first = self._next(queue)
+        if first is None:
+            self._count("unavailable")
+            raise LLMUnavailable(f"Every LLM endpoint for '{role}' has its circuit open")
+
+        span = current_span()
+        in_flight = {}  # future -> (endpoint, hedged, launched at)
+        last_error: Optional[Exception] = None
+        hedged = False
+
+        def launch(endpoint: Endpoint, hedge: bool = False):
+            in_flight[self._pool.submit(bind(self._timed), endpoint, fn)] = (endpoint, hedge, time.monotonic())
+            span.set(endpoint=endpoint.name)
+
+        launch(first)
+        while in_flight:
+            # Hedge once, when every in-flight call has run past its
+            # endpoint's p95. Only to another endpoint: a duplicate to the
+            # same client would just be coalesced with the call in flight
+            delay = self._hedge_delay([(e, launched) for e, _, launched in in_flight.values()], queue, hedged)
+            done, _ = wait(in_flight, timeout=delay, return_when=FIRST_COMPLETED)
+
+            if not done:
+                hedged = True
+                target = self._next(queue)
+                if target is not None:
+                    target.count("hedges")
+                    self._count("hedged")
+                    span.set(hedged=True)
+                    launch(target, hedge=True)
+                continue
+
+            for future in done:
+                endpoint, was_hedge, _ = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                endpoint.count("wins")
+                if was_hedge:
+                    self._count("hedge_wins")
+                    span.set(hedge_won=True)
+                # Losers keep running in the pool; their outcome still feeds
+                # the breakers and latency windows
+                return result
+
+            if not in_flight:
+                target = self._next(queue)
+                if target is not None:
+                    self._count("failovers")
+                    span.add("failovers")
+                    launch(target)
+
+        self._count("unavailable")
+        raise LLMUnavailable(f"All LLM endpoints for '{role}' failed: {last_error}")
+
+    def _hedge_delay(self, running, queue: List[Endpoint], hedged: bool, first_chunk: bool = False) -> Optional[float]:
+        """
+        Seconds until a hedge is due: when the last of the `running`
+        (endpoint, launched at) calls passes its endpoint's p95. None means
+        no hedge (off, already hedged, nowhere to hedge to, or p95 unknown).
+        """
+        if not self.hedge or hedged or not queue:
+            return None
+        deadlines = []
+        for endpoint, launched in running:
+            p95 = endpoint.p95(first_chunk)
+            if p95 is None:
+                return None
+            deadlines.append(launched + p95)
+        return max(0.0, max(deadlines) - time.monotonic())
+
+    @staticmethod
+    def _pump(attempt: int, endpoint: Endpoint, messages, json_mode: bool, out: "queue.Queue", cancel: threading.Event):
+        """
+        Reads one endpoint's stream on a pool thread into `out` as
+        ("chunk" | "done" | "error", attempt, value), until cancelled.
+        """
+        started = time.perf_counter()
+        received = False
+        chunks = endpoint.client.stream(messages, json_mode)
+        try:
+            for chunk in chunks:
+                if not received:
+                    endpoint.record_first_chunk(time.perf_counter() - started)
+                    received = True
+                if cancel.is_set():
+                    # Lost the race, or the caller stopped reading
+                    return
+                out.put(("chunk", attempt, chunk))
+        except Exception as e:
+            endpoint.record(time.perf_counter() - started, error=True)
+            out.put(("error", attempt, e))
+            return
+        finally:
+            chunks.close()
+        endpoint.record(time.perf_counter() - started, error=False)
+        out.put(("done", attempt, None))
+
+    def stream(self, role: str, messages: List[Dict[str, str]], json_mode: bool = False) -> Iterator[str]:
+        """
+        Streams from the first healthy endpoint. If no chunk has arrived
+        within its p95 time to first chunk, the next endpoint is started too
+        and whichever streams first is kept; the other is cancelled. An
+        endpoint that fails before its first chunk fails over to the next.
+        """
+        self._count("calls")
+        queue_ = self._serving(role)
+        first = self._next(queue_)
+        if first is None:
+            self._count("unavailable")
+            raise LLMUnavailable(f"Every LLM endpoint for '{role}' has its circuit open")
+
+        span = current_span()
+        out: "queue.Queue" = queue.Queue()
+        running = {}  # attempt -> (endpoint, hedged, launched at, cancel)
+        last_error: Optional[Exception] = None
+        winner: Optional[int] = None
+        hedged = False
+
+        def launch(endpoint: Endpoint, hedge: bool = False):
+            attempt = next(attempts)
+            cancel = threading.Event()
+            running[attempt] = (endpoint, hedge, time.monotonic(), cancel)
+            self._pool.submit(bind(self._pump), attempt, endpoint, messages, json_mode, out, cancel)
+            span.set(endpoint=endpoint.name)
+
+        attempts = itertools.count()
+        launch(first)
+        try:
+            while running:
+                delay = None
+                if winner is None:
+                    delay = self._hedge_delay([(e, launched) for e, _, launched, _ in running.values()], queue_, hedged, first_chunk=True)
+                try:
+                    kind, attempt, value = out.get(timeout=delay)
+                except queue.Empty:
+                    hedged = True
+                    target = self._next(queue_)
+                    if target is not None:
+                        target.count("hedges")
+                        self._count("hedged")
+                        span.set(hedged=True)
+                        launch(target, hedge=True)
+                    continue
+                if attempt not in running:
+                    continue  # from a cancelled loser
+
+                endpoint, was_hedge = running[attempt][:2]
+                if kind == "error":
+                    running.pop(attempt)
+                    if attempt == winner:
+                        raise value
+                    last_error = value
+                    if not running:
+                        target = self._next(queue_)
+                        if target is not None:
+                            self._count("failovers")
+                            span.add("failovers")
+                            launch(target)
+                    continue
+
+                if winner is None:
+                    # First to produce anything (or finish empty) wins
+                    winner = attempt
+                    endpoint.count("wins")
+                    if was_hedge:
+                        self._count("hedge_wins")
+                        span.set(hedge_won=True)
+                    for other, (_, _, _, cancel) in list(running.items()):
+                        if other != attempt:
+                            cancel.set()
+                            running.pop(other)
+                if kind == "chunk":
+                    yield value
+                else:
+                    return
+        finally:
+            for _, _, _, cancel in running.values():
+                cancel.set()
+
+        self._count("unavailable")
+        raise LLMUnavailable(f"All LLM endpoints for '{role}' failed: {last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["endpoints"] = {e.name: e.stats() for e in self.endpoints}
+        return stats
+
+
+class RoleClient:
+    """
+    The LLMClient interface for one role, backed by an LLMRouter.
+    """
+
+    def __init__(self, router: LLMRouter, role: str):
+        self.router = router
+        self.role = role
+
+    @property
+    def model(self) -> str:
+        serving = [e for e in self.router.endpoints if e.serves(self.role)] or self.router.endpoints
+        return serving[0].client.model
+
+    def for_role(self, role: str) -> "RoleClient":
+        return self.router.for_role(role)
+
+    def complete(self, messages: List[Dict[str, str]], json_mode: bool = False) -> str:
+        return self.router.call(self.role, lambda client: client.complete(messages, json_mode))
+
+    def chat_completion(self, messages: List[Dict[str, str]], json_mode: bool = False) -> str:
+        try:
+            return self.complete(messages, json_mode)
+        except Exception as e:
+            console.print(f"[red]Error calling LLM: {e}[/red]")
+            return "{}"
+
+    def call_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.router.call(self.role, lambda client: client.call_tools(messages, tools))
+
+    def chat_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return self.call_tools(messages, tools)
+        except Exception as e:
+            console.print(f"[red]Error calling LLM: {e}[/red]")
+            return {"content": None, "tool_calls": [], "error": str(e)}
+
+    def stream(self, messages: List[Dict[str, str]], json_mode: bool = False) -> Iterator[str]:
+        return self.router.stream(self.role, messages, json_mode)
+
+    def stream_chat_completion(self, messages: List[Dict[str, str]], json_mode: bool = False) -> Iterator[str]:
+        try:
+            yield from self.stream(messages, json_mode)
+        except Exception as e:
+            console.print(f"[red]Error streaming from LLM: {e}[/red]")
+
+
+def load_endpoints(config: Any) -> List[Endpoint]:
+    """
+    Endpoints from a list of dicts:
+    {"name", "model", "base_url", "api_key_env", "roles", "timeout",
+     "failure_threshold", "cooldown"}. Only "model" is required.
+
+    "base_url" and "api_key_env" go together, so a key is only ever sent to
+    the provider it was configured for. An endpoint whose key variable is
+    unset is skipped. With neither, the endpoint uses the usual
+    LLM_BASE_URL / GROQ / OpenAI settings.
+    """
+    endpoints = []
+    for index, entry in enumerate(config):
+        name = entry.get("name", f"{entry['model']}#{index}")
+        if bool(entry.get("base_url")) != bool(entry.get("api_key_env")):
+            raise ValueError(f"LLM endpoint '{name}': set both base_url and api_key_env, or neither")
+        api_key = None
+        if entry.get("api_key_env"):
+            api_key = os.getenv(entry["api_key_env"])
+            if not api_key:
+                console.print(f"[yellow]Skipping LLM endpoint '{name}': {entry['api_key_env']} is not set[/yellow]")
+                continue
+        client = LLMClient(
+            api_key=api_key,
+            base_url=entry.get("base_url"),
+            model=entry["model"],
+            timeout=entry.get("timeout", 30.0),
+            # The router fails over instead of the SDK retrying the same endpoint
+            max_retries=entry.get("max_retries", 0),
+        )
+        breaker = CircuitBreaker(entry.get("failure_threshold", 3), entry.get("cooldown", 30.0))
+        endpoints.append(Endpoint(name, client, entry.get("roles"), breaker))
+    if not endpoints:
+        raise ValueError("No LLM endpoint has its API key set")
+    return endpoints
+
+
+def build_llm(config_path: Optional[str] = None):
+    """
+    An LLMRouter when endpoints are configured (a JSON file at `config_path`
+    or LLM_ENDPOINTS, which may also hold the JSON inline), otherwise the
+    single LLMClient from the environment.
+    """
+    source = config_path or os.getenv("LLM_ENDPOINTS")
+    if not source:
+        return LLMClient()
+    if source.lstrip().startswith("["):
+        config = json.loads(source)
+    else:
+        with open(source, encoding="utf-8") as f:
+            config = json.load(f)
+    return LLMRouter(load_endpoints(config))
@@ -1,63 +1,311 @@
 import os
 import sys
+import json
+import time
+import hashlib
 import argparse
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 
-from llm.client import LLMClient
-from tools.weather_tool import WeatherTool
-from tools.github_tool import GitHubTool
-from tools.news_tool import NewsTool
-from tools.wikipedia_tool import WikipediaTool
-from tools.stock_tool import StockTool
+from llm.router import LLMRouter, build_llm
+from tools.catalog import load_tools
+from tools.cache import CachedTool, MemoryCache, SQLiteCache, expires_at
+from tools.registry import ToolRegistry
 from agents.planner import PlannerAgent
 from agents.executor import ExecutorAgent
 from agents.verifier import VerifierAgent
+from agents.plan_cache import PlanCache
+from agents.router import IntentRouter
+from agents.speculator import Speculator
+from agents.tool_calling import ToolCallingAgent
+from core.batch import run_batch
+from core.http import get_pool
+from core.loop import run_async
+from core.jobs import JobManager, current_job
+from core.render import queued_output
+from core.store import QueryStore
+from core.tracing import get_tracer, span
+import agents.planner
+import agents.executor
+import agents.verifier
+import agents.tool_calling
+import llm.client
+import llm.router
 
 # Load environment variables
 load_dotenv()
 
 console = Console()
 
-def run_flow(query, planner, executor, verifier):
-    # 1. Plan
-    plan = planner.run(query)
-    if not plan:
-        console.print("[bold red]❌ Failed to generate a plan.[/bold red]")
-        return
+# Modules whose `console` carries agent and LLM output; swapped for a queued
+# console in job mode and silenced with set_agents_quiet
+AGENT_MODULES = (agents.planner, agents.executor, agents.verifier, agents.tool_calling, llm.client, llm.router)
+
+def flow_version(planner):
+    """
+    Names the setup answers come from: the mode plus a hash of what the
+    model is told, which covers the planner instructions and every tool
+    schema in the registry. Memoized answers are only reused within one.
+    """
+    if isinstance(planner, ToolCallingAgent):
+        prompt = agents.tool_calling.SYSTEM_PROMPT + json.dumps(planner.tools.schemas(), sort_keys=True)
+        mode = "tools"
+    else:
+        prompt = planner.system_prompt()
+        mode = "pipeline"
+    return f"{mode}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}"
+
+def run_flow(query, planner, executor, verifier, use_async=False, profile=False, store=None):
+    with span("run_flow", query=query) as root:
+        flow = flow_version(planner) if store is not None else ""
+        memo = store.lookup(query, flow) if store is not None else None
+        if memo is not None:
+            # Every tool result behind this answer is still fresh
+            root.set(memoized=True)
+            console.print(f"[dim]Answered from history (run {memo['run_id']})[/dim]")
+            verifier.present(memo["answer"]["answer_points"])
+            store.record_hit(query, memo["run_id"], flow)
+            result = memo
+        else:
+            started = time.time()
+            result = _run_flow(query, planner, executor, verifier, use_async)
+            if store is not None:
+                store.record(query, result, started, answer_expiry(executor.tool_map, result, started), flow)
+    if profile:
+        print_profile(root.trace_id)
+    return result
+
+def _run_flow(query, planner, executor, verifier, use_async=False):
+    if isinstance(planner, ToolCallingAgent):
+        # --mode tools: planning and answering happen in one conversation
+        return planner.run(query, use_async=use_async)
 
-    # 2. Execute
-    results = executor.run(plan)
+    # Likely tool calls start now and overlap the planner LLM call
+    speculation = executor.speculator.start(query) if executor.speculator else None
+    job = current_job()
+    try:
+        if planner.stream:
+            # 1+2. Plan and execute together: each step starts as soon as the
+            # planner has streamed it
+            job.set_status("executing")
+            plan = []
+            steps = _collect(planner.stream_steps(query), plan)
+            results = run_async(executor.arun_stream(steps, speculation)) if use_async else executor.run_stream(steps, speculation)
+            if not plan:
+                console.print("[bold red]❌ Failed to generate a plan.[/bold red]")
+                return {"status": "error", "error": "Failed to generate a plan."}
+        else:
+            # 1. Plan
+            job.set_status("planning")
+            plan = planner.run(query)
+            if not plan:
+                console.print("[bold red]❌ Failed to generate a plan.[/bold red]")
+                return {"status": "error", "error": "Failed to generate a plan."}
+
+            # 2. Execute
+            job.set_status("executing")
+            results = run_async(executor.arun(plan, speculation)) if use_async else executor.run(plan, speculation)
+    finally:
+        if speculation:
+            speculation.finish()
     
-    # 3. Verify
-    verifier.run(query, results)
+    # 3. Verify (with --template-answers, a rule-routed single step is answered from a template)
+    job.set_status("verifying")
+    points = planner.router.template_answer(plan, results) if planner.router else None
+    response = verifier.present(points) if points else verifier.run(query, results)
+    try:
+        answer = json.loads(response)
+    except (TypeError, ValueError):
+        answer = response
+    return {"status": "success", "plan": plan, "results": results, "answer": answer}
+
+def answer_expiry(tools, result, started):
+    """
+    Until when `result` may be served again as a memoized answer: the
+    earliest expiry among its tool results. None if any step failed, any
+    output may not be reused, or there is no answer to show.
+    """
+    answer = result.get("answer")
+    if result.get("status") != "success" or not isinstance(answer, dict) or not answer.get("answer_points"):
+        return None
+    args = {step.get("step", index): step.get("args", {}) for index, step in enumerate(result.get("plan") or [], start=1)}
+    expiries = []
+    for entry in result.get("results") or []:
+        if entry.get("status") != "success":
+            return None
+        expiry = expires_at(tools.get(entry.get("tool")), args.get(entry["step"], {}), entry["output"], started)
+        if expiry is None:
+            return None
+        expiries.append(expiry)
+    return min(expiries) if expiries else None
+
+def _collect(steps, plan):
+    for step in steps:
+        plan.append(step)
+        yield step
+
+def print_profile(trace_id=None):
+    """
+    Per-stage latency, token and payload table for one run_flow trace.
+    """
+    table = Table(title="Profile", border_style="blue")
+    for column in ("Stage", "Calls", "Total ms", "Avg ms", "Max ms", "Prompt tok", "Compl tok", "Bytes", "Retries", "Cache hits"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+    for row in get_tracer().summary(trace_id):
+        table.add_row(
+            row["name"], str(row["count"]), f"{row['total_ms']:.1f}", f"{row['avg_ms']:.1f}", f"{row['max_ms']:.1f}",
+            str(row["prompt_tokens"]), str(row["completion_tokens"]), str(row["bytes"]), str(row["retries"]), str(row["cache_hits"]),
+        )
+    console.print(table)
+
+def set_agents_quiet(quiet: bool):
+    """
+    Silences the agent and LLM client consoles, e.g. while many queries run
+    at once.
+    """
+    for module in AGENT_MODULES:
+        module.console.quiet = quiet
+
+def add_agent_arguments(parser):
+    """
+    Options that shape the agents and tools, shared by the CLI and the server.
+    """
+    parser.add_argument("--mode", choices=["pipeline", "tools"], default="pipeline", help="pipeline: planner, executor and verifier agents; tools: one native tool-calling conversation")
+    parser.add_argument("--llm-config", metavar="JSON", help="LLM endpoints to route across (default: LLM_ENDPOINTS, else a single client)")
+    parser.add_argument("--max-workers", type=int, default=4, help="Max plan steps executed concurrently (1 = sequential)")
+    parser.add_argument("--step-timeout", type=float, default=30.0, help="Per-step timeout in seconds")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Drive tools through their async interface on one event loop")
+    parser.add_argument("--cache", choices=["disk", "memory", "off"], default="disk", help="Tool result cache backend")
+    parser.add_argument("--cache-path", default=".cache/tool_cache.sqlite3", help="Location of the on-disk tool cache")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for the full verifier response instead of streaming answer points")
+    parser.add_argument("--raw-results", action="store_true", help="Send raw tool outputs to the verifier instead of the compact summary")
+    parser.add_argument("--no-router", action="store_true", help="Send every query to the LLM planner, even simple single-tool ones")
+    parser.add_argument("--template-answers", action="store_true", help="Answer rule-routed single-step queries from the tool's template instead of the verifier LLM")
+    parser.add_argument("--no-plan-stream", action="store_true", help="Wait for the whole plan before executing any step")
+    parser.add_argument("--no-plan-cache", action="store_true", help="Always call the planner LLM, even for repeated queries")
+    parser.add_argument("--history-path", default=".cache/history.sqlite3", help="Where every query, plan, tool result and answer is recorded")
+    parser.add_argument("--no-history", action="store_true", help="Do not record queries or serve memoized answers")
+    parser.add_argument("--no-memo", action="store_true", help="Record history but always run the full pipeline")
+    parser.add_argument("--speculate", action="store_true", help="Start likely tool calls while the planner LLM is still thinking")
+    parser.add_argument("--speculate-min-confidence", type=float, default=0.6, help="Only speculate on guesses at least this confident (lower = more aggressive)")
+
+def build_agents(args):
+    """
+    Builds the LLM client, tools, caches and agents once. Returns
+    (planner, executor, verifier, tool_cache).
+    """
+    # One client, or a router over the endpoints in --llm-config / LLM_ENDPOINTS
+    llm = build_llm(args.llm_config)
+    
+    # Tool modules (and yfinance, ...) load on first use
+    tools = load_tools()
+
+    cache = None
+    if args.cache == "disk":
+        cache = SQLiteCache(args.cache_path)
+    elif args.cache == "memory":
+        cache = MemoryCache()
+    if cache is not None:
+        tools = [CachedTool(tool, cache) for tool in tools]
+    tools = ToolRegistry(tools)
+    
+    plan_cache = None if args.no_plan_cache else PlanCache()
+    router = None if args.no_router else IntentRouter(tools, template_answers=args.template_answers)
+    planner = PlannerAgent(llm.for_role("planner"), tools, plan_cache=plan_cache, router=router, stream=not args.no_plan_stream)
+    speculator = Speculator(tools, router, min_confidence=args.speculate_min_confidence) if args.speculate else None
+    executor = ExecutorAgent(llm, tools, max_workers=args.max_workers, step_timeout=args.step_timeout, speculator=speculator)
+    verifier = VerifierAgent(llm.for_role("verifier"), stream=not args.no_stream, compact=not args.raw_results)
+    if args.mode == "tools":
+        # Stands in for the planner; run_flow hands it the whole query
+        planner = ToolCallingAgent(llm.for_role("tools"), tools, executor, compact=not args.raw_results)
+    return planner, executor, verifier, cache
+
+def build_store(args):
+    """
+    The query history and memoized-answer store, unless --no-history.
+    """
+    return None if args.no_history else QueryStore(args.history_path, memoize=not args.no_memo)
 
 def main():
     parser = argparse.ArgumentParser(description="AI Operations Assistant")
     parser.add_argument("query", nargs="?", help="The natural language task to perform")
+    add_agent_arguments(parser)
+    parser.add_argument("--cache-stats", action="store_true", help="Print tool and plan cache stats on exit")
+    parser.add_argument("--batch", metavar="QUERIES_JSONL", help="Run every query in a JSONL file instead of a single query")
+    parser.add_argument("--out", metavar="RESULTS_JSONL", help="Where --batch appends one result per line (rerunning resumes)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries processed at once in --batch mode")
+    parser.add_argument("--per-host-limit", type=int, default=4, help="Max concurrent HTTP requests per upstream API in --batch mode")
+    parser.add_argument("--jobs", type=int, default=1, help="Queries run at once in interactive mode; above 1 the prompt returns while earlier queries are still running")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage latency/token table after each query")
+    parser.add_argument("--export-history", metavar="HISTORY_JSONL", help="Write the recorded query history as JSON lines and exit")
+    parser.add_argument("--trace", metavar="PATH", help="Export spans on exit (.jsonl for JSON lines, otherwise Chrome trace format)")
     args = parser.parse_args()
+    if args.batch and not args.out:
+        parser.error("--batch requires --out")
+    get_tracer().enabled = bool(args.profile or args.trace)
+
+    if args.export_history:
+        # Reads the store only; no API key or agents needed
+        count = QueryStore(args.history_path).export(args.export_history)
+        console.print(f"[green]Exported {count} runs to {args.export_history}[/green]")
+        return
 
     # check for API key
     if not (os.getenv("OPENAI_API_KEY") or os.getenv("GROQ_API_KEY")):
          console.print("[bold red]Error: OPENAI_API_KEY or GROQ_API_KEY not found. Please set it in .env[/bold red]")
          return
 
-    # Initialize Components
-    llm = LLMClient()
-    
-    tools = [
-        WeatherTool(),
-        GitHubTool(),
-        NewsTool(),
-        WikipediaTool(),
-        StockTool()
-    ]
-    
-    planner = PlannerAgent(llm, tools)
-    executor = ExecutorAgent(llm, tools)
-    verifier = VerifierAgent(llm)
+    planner, executor, verifier, cache = build_agents(args)
+    store = build_store(args)
+
+    if args.batch:
+        get_pool().max_in_flight_per_host = args.per_host_limit
+        set_agents_quiet(True)
+
+        def report(record):
+            style = "green" if record["status"] == "success" else "red"
+            console.print(f"[{style}]{record['status']:>7}[/{style}] [{record['id']}] {record['query'] or record.get('error')} ({record['elapsed']}s)")
+
+        summary = run_batch(
+            args.batch,
+            args.out,
+            lambda query: run_flow(query, planner, executor, verifier, use_async=args.use_async, store=store),
+            concurrency=args.concurrency,
+            on_result=report,
+        )
+        console.print(Panel.fit(
+            "\n".join(f"{key}: {value}" for key, value in summary.items()),
+            title="Batch Summary",
+            border_style="green"
+        ))
+        if args.profile:
+            print_profile()
+    elif args.jobs > 1 and not args.query:
+        run_interactive_jobs(args, planner, executor, verifier, store)
+    else:
+        run_interactive(args, planner, executor, verifier, store)
+
+    if args.cache_stats:
+        if cache is not None:
+            console.print(f"[dim]Tool cache: {cache.stats()}[/dim]")
+        if planner.plan_cache is not None:
+            console.print(f"[dim]Plan cache: {planner.plan_cache.stats()}[/dim]")
+        if planner.router is not None:
+            console.print(f"[dim]Router: {planner.router.stats()}[/dim]")
+        if store is not None:
+            console.print(f"[dim]Query store: {store.stats()}[/dim]")
+        if executor.speculator is not None:
+            console.print(f"[dim]Speculation: {executor.speculator.stats()}[/dim]")
+        if isinstance(executor.llm, LLMRouter):
+            console.print(f"[dim]LLM router: {executor.llm.stats()}[/dim]")
+
+    if args.trace:
+        get_tracer().export(args.trace)
+        console.print(f"[dim]Trace written to {args.trace}[/dim]")
 
+def run_interactive(args, planner, executor, verifier, store=None):
     # Welcome Banner
     console.print(Panel.fit(
         "[bold green]AI Operations Assistant[/bold green]\n"
@@ -74,7 +322,7 @@ def main():
 
     # Get Query
     if args.query:
-        run_flow(args.query, planner, executor, verifier)
+        run_flow(args.query, planner, executor, verifier, use_async=args.use_async, profile=args.profile, store=store)
     else:
         while True:
             query = console.input("\n[bold cyan]👤 User (or 'exit'):[/bold cyan] ")
@@ -83,7 +331,75 @@ def main():
                 break
             if not query.strip():
                 continue
-            run_flow(query, planner, executor, verifier)
+            run_flow(query, planner, executor, verifier, use_async=args.use_async, profile=args.profile, store=store)
+
+def run_interactive_jobs(args, planner, executor, verifier, store=None):
+    """
+    Interactive loop that does not wait for answers: every query becomes a
+    background job and the prompt comes straight back. All agent output
+    goes through one render queue, grouped under the job it belongs to.
+    """
+    with queued_output([sys.modules[__name__], *AGENT_MODULES]):
+        manager = JobManager(
+            lambda query: run_flow(query, planner, executor, verifier, use_async=args.use_async, profile=args.profile, store=store),
+            max_jobs=args.jobs,
+            on_done=_report_job,
+        )
+        console.print(Panel.fit(
+            "[bold green]AI Operations Assistant[/bold green] (concurrent mode)\n\n"
+            f"Up to {args.jobs} queries run at once; the prompt returns straight away.\n"
+            "Commands: [cyan]jobs[/cyan] lists jobs with per-step progress, "
+            "[cyan]wait[/cyan] waits for all of them, [cyan]exit[/cyan] quits once they finish.",
+            border_style="green",
+            title="Welcome"
+        ))
+        while True:
+            query = console.input("\n[bold cyan]👤 User (or 'exit'):[/bold cyan] ").strip()
+            if not query:
+                continue
+            command = query.lower()
+            if command in ["exit", "quit"]:
+                active = manager.active()
+                if active:
+                    console.print(f"[yellow]Waiting for {len(active)} running job(s)...[/yellow]")
+                    manager.wait()
+                console.print("[yellow]Goodbye! 👋[/yellow]")
+                break
+            if command == "jobs":
+                print_jobs(manager.jobs())
+            elif command == "wait":
+                manager.wait()
+            else:
+                job = manager.submit(query)
+                console.print(f"[dim]Started job #{job.id}[/dim]")
+        manager.shutdown()
+
+def _report_job(job):
+    style = "green" if job.status == "done" else "red"
+    console.print(f"[{style}]#{job.id} {job.status}[/{style}] in {job.elapsed():.1f}s: {job.query}")
+
+STEP_MARKS = {"pending": ("dim", "·"), "running": ("yellow", "…"), "done": ("green", "✓"), "error": ("red", "✗")}
+
+def print_jobs(jobs):
+    """
+    One row per job: its stage, elapsed time and the state of every step.
+    """
+    table = Table(title="Jobs", border_style="blue")
+    for column in ("#", "Status", "Elapsed", "Steps", "Query"):
+        table.add_column(column, justify="right" if column in ("#", "Elapsed") else "left")
+    for job in jobs:
+        snapshot = job.snapshot()
+        steps = snapshot["steps"]
+        done = sum(1 for step in steps.values() if step["status"] in ("done", "error"))
+        progress = " ".join(
+            "[{0}]{1} {2}[/{0}]".format(*STEP_MARKS.get(step["status"], STEP_MARKS["pending"]), step["tool"])
+            for step in steps.values()
+        )
+        table.add_row(
+            str(snapshot["id"]), snapshot["status"], f"{snapshot['elapsed']:.1f}s",
+            f"{done}/{len(steps)} {progress}" if steps else "-", snapshot["query"],
+        )
+    console.print(table)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from rich.console import Console
+
+from core.http import get_pool
+from core.rate_limit import get_rate_limiter
+from core.tracing import percentile
+from llm.router import LLMRouter
+from main import add_agent_arguments, build_agents, build_store, run_flow, set_agents_quiet
+
+load_dotenv()
+
+console = Console()
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large", 503: "Service Unavailable", 504: "Gateway Timeout"}
+MAX_BODY_BYTES = 64 * 1024
+# How often a connection waiting on its query is checked for a disconnect
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class FlowServer:
+    """
+    Serves run_flow over HTTP/JSON from one long-lived process, so the LLM
+    client, connection pools and caches stay warm between requests.
+
+    Admission control: at most `workers` flows run at once and at most
+    `queue_size` more wait; anything beyond that is rejected with 503
+    straight away instead of queueing without bound.
+    """
+
+    def __init__(self, planner, executor, verifier, tool_cache=None, store=None, workers: int = 8, queue_size: int = 32, request_timeout: float = 120.0, use_async: bool = False):
+        self.planner = planner
+        self.executor = executor
+        self.verifier = verifier
+        self.tool_cache = tool_cache
+        self.store = store
+        self.workers = workers
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout
+        self.use_async = use_async
+        self.started = time.time()
+        self.in_flight = 0
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "timed_out": 0, "disconnected": 0}
+        self._latencies = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow")
+
+    async def start(self, host: str, port: int):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        for _ in range(self.workers):
+            asyncio.ensure_future(self._worker())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            query, future = await self._queue.get()
+            if future.done():
+                # The client already gave up: submit cancels the future on
+                # a timeout or when _handle_connection sees it disconnect
+                continue
+            with self._lock:
+                self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self._pool, self._run, query)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self._latencies.append((time.perf_counter() - started) * 1000)
+
+    def _run(self, query: str):
+        return run_flow(query, self.planner, self.executor, self.verifier, use_async=self.use_async, store=self.store)
+
+    async def submit(self, query: str):
+        """
+        Queues a query and waits for its result. Returns (status, payload).
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((query, future))
+        except asyncio.QueueFull:
+            self._count("rejected")
+            return 503, {"status": "error", "error": "Server busy, retry later."}
+        self._count("accepted")
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self._count("timed_out")
+            return 504, {"status": "error", "error": f"Query did not finish within {self.request_timeout}s"}
+        except asyncio.CancelledError:
+            # The client disconnected; a query still queued is skipped, one
+            # already running finishes on its worker thread unseen
+            future.cancel()
+            self._count("disconnected")
+            raise
+        except Exception as e:
+            self._count("failed")
+            return 200, {"status": "error", "error": str(e)}
+
+        self._count("completed" if result.get("status") == "success" else "failed")
+        return 200, dict(result, elapsed=round(time.perf_counter() - started, 3))
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+        }
+
+    def metrics(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            counters = dict(self.counters)
+        metrics = {
+            "requests": counters,
+            "in_flight": self.in_flight,
+            "queue_depth": self._queue.qsize(),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 1),
+                "p95": round(percentile(latencies, 95), 1),
+                "p99": round(percentile(latencies, 99), 1),
+                "samples": len(latencies),
+            },
+            "http": get_pool().stats(),
+            "rate_limits": get_rate_limiter().stats(),
+        }
+        if self.tool_cache is not None:
+            metrics["tool_cache"] = self.tool_cache.stats()
+        if self.planner.plan_cache is not None:
+            metrics["plan_cache"] = self.planner.plan_cache.stats()
+        if self.planner.router is not None:
+            metrics["router"] = self.planner.router.stats()
+        if self.store is not None:
+            metrics["history"] = self.store.stats()
+        if self.executor.speculator is not None:
+            metrics["speculation"] = self.executor.speculator.stats()
+        if isinstance(self.executor.llm, LLMRouter):
+            metrics["llm"] = self.executor.llm.stats()
+        return metrics
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        path = path.split("?", 1)[0]
+        if path == "/healthz":
+            return 200, self.health()
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path != "/query":
+            return 404, {"status": "error", "error": f"Unknown path: {path}"}
+        if method != "POST":
+            return 405, {"status": "error", "error": "Use POST /query"}
+        try:
+            query = json.loads(body or b"{}").get("query", "")
+        except (ValueError, AttributeError):
+            return 400, {"status": "error", "error": "Body must be a JSON object"}
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"status": "error", "error": "Missing \"query\""}
+        return await self.submit(query.strip())
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Minimal HTTP/1.1: one JSON request per round trip, keep-alive
+        unless the client asks to close.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"status": "error", "error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if "transfer-encoding" in headers:
+                    # Chunked bodies are not decoded, and the next request
+                    # can't be found after one either
+                    await self._respond(writer, 411, {"status": "error", "error": "Chunked request bodies are not supported; send the body with a Content-Length"}, False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # Without a usable length the next request can't be found either
+                    await self._respond(writer, 400, {"status": "error", "error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"status": "error", "error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                response = await self._dispatch_unless_disconnected(reader, writer, method, path, body)
+                if response is None:
+                    break
+                status, payload = response
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch_unless_disconnected(self, reader, writer, method: str, path: str, body: bytes):
+        """
+        Runs `dispatch`, cancelling it if the client closes the connection
+        first; returns None then. The reader is only checked for EOF, never
+        read, so a pipelined next request stays in its buffer. A client that
+        half-closes after sending its request counts as gone too.
+        """
+        task = asyncio.ensure_future(self.dispatch(method, path, body))
+        while True:
+            done, _ = await asyncio.wait([task], timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if reader.at_eof() or reader.exception() is not None or writer.is_closing():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return None
+
+    @staticmethod
+    async def _respond(writer, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(args):
+    planner, executor, verifier, cache = build_agents(args)
+    server = FlowServer(
+        planner, executor, verifier,
+        tool_cache=cache,
+        store=build_store(args),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        request_timeout=args.request_timeout,
+        use_async=args.use_async,
+    )
+    listener = await server.start(args.host, args.port)
+    console.print(f"[bold green]Serving on http://{args.host}:{args.port}[/bold green] "
+                  f"(workers={args.workers}, queue={args.queue_size}) - POST /query, GET /healthz, GET /metrics")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Operations Assistant HTTP server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=8, help="Queries processed at once")
+    parser.add_argument("--queue-size", type=int, default=32, help="Queries allowed to wait for a worker before new ones get 503")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Seconds a request may wait and run before 504")
+    parser.add_argument("--per-host-limit", type=int, default=4, help="Max concurrent HTTP requests per upstream API")
+    add_agent_arguments(parser)
+    args = parser.parse_args()
+    # Answers go back over HTTP; nothing to stream to a terminal
+    args.no_stream = True
+
+    if not (os.getenv("OPENAI_API_KEY") or os.getenv("GROQ_API_KEY")):
+        console.print("[bold red]Error: OPENAI_API_KEY or GROQ_API_KEY not found. Please set it in .env[/bold red]")
+        return
+
+    get_pool().max_in_flight_per_host = args.per_host_limit
+    set_agents_quiet(True)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        console.print("[yellow]Server stopped.[/yellow]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from core.batch import completed_ids, read_queries, read_records, run_batch
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_read_records_numbers_lines_and_flags_bad_ones(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    write_lines(queries, ['{"id": "a", "query": "weather in Pune"}', '"price of TCS"', "", "{not json", '{"id": "b"}'])
+
+    records = list(read_records(str(queries)))
+
+    assert records[:2] == [("a", "weather in Pune", None), ("2", "price of TCS", None)]
+    assert records[2][0] == "4" and records[2][1] is None and "not valid JSON" in records[2][2]
+    assert records[3][0] == "5" and "no \"query\"" in records[3][2]
+    with pytest.raises(ValueError):
+        list(read_queries(str(queries)))
+
+
+def test_only_successful_ids_count_as_completed(tmp_path):
+    out = tmp_path / "out.jsonl"
+    write_lines(out, [
+        '{"id": "a", "status": "success"}',
+        '{"id": "b", "status": "error", "error": "timed out"}',
+        '{"id": "c", "stat',
+    ])
+
+    assert completed_ids(str(out)) == {"a"}
+
+
+def test_batch_records_bad_lines_and_retries_failures(tmp_path):
+    queries, out = tmp_path / "queries.jsonl", tmp_path / "out.jsonl"
+    write_lines(queries, ['{"id": "ok", "query": "fine"}', '{"id": "flaky", "query": "flaky"}', "{broken"])
+    attempts = {"flaky": 0}
+
+    def handler(query):
+        if query == "flaky":
+            attempts["flaky"] += 1
+            if attempts["flaky"] == 1:
+                raise TimeoutError("upstream timed out")
+        return {"status": "success", "answer": query}
+
+    first = run_batch(str(queries), str(out), handler, concurrency=2)
+    assert (first["completed"], first["failed"], first["skipped"]) == (1, 2, 0)
+    bad = [r for r in read_output(out) if r["id"] == "3"]
+    assert bad and bad[0]["status"] == "error" and "not valid JSON" in bad[0]["error"]
+
+    second = run_batch(str(queries), str(out), handler, concurrency=2)
+    assert (second["completed"], second["failed"], second["skipped"]) == (1, 1, 1)
+    assert completed_ids(str(out)) == {"ok", "flaky"}
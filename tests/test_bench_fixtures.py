@@ -0,0 +1,100 @@
+import types
+
+import pytest
+import requests
+
+import tools.geocode_index
+import tools.wikipedia_store
+from bench.fixtures import FIXTURE_VERSION, FixtureStore, LatencyModel, ReplayResponse, fixture_query, llm_key, replay, role_client
+from bench.run import DEFAULT_QUERIES, SYNTHETIC_FIXTURES, build_pipeline, flow_error, reset_local_stores, run_level
+from core.batch import read_queries
+from main import run_flow, set_agents_quiet
+
+
+def test_llm_key_ignores_prompts():
+    planner = role_client("planner", api_key="test")
+    messages = [{"role": "system", "content": "prompt v1"}, {"role": "user", "content": "weather in Pune"}]
+    edited = [{"role": "system", "content": "prompt v2, longer"}, {"role": "user", "content": "weather in Pune"}]
+
+    assert llm_key(planner, messages) == llm_key(planner, edited) == f"v{FIXTURE_VERSION} planner: weather in Pune"
+
+
+def test_llm_key_uses_the_flow_query_and_turn():
+    verifier = role_client("verifier", api_key="test")
+    messages = [{"role": "user", "content": "Query: weather in Pune\nResults: ..."}, {"role": "assistant", "content": "..."}]
+
+    with fixture_query("weather in Pune"):
+        assert llm_key(verifier, messages) == f"v{FIXTURE_VERSION} verifier: weather in Pune #1"
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setenv("GNEWS_API_KEY", "replay")
+    # Restored after the test; bench.run swaps in fresh in-memory stores
+    monkeypatch.setattr(tools.geocode_index, "_index", tools.geocode_index._index)
+    monkeypatch.setattr(tools.wikipedia_store, "_store", tools.wikipedia_store._store)
+    reset_local_stores()
+    set_agents_quiet(True)
+    args = types.SimpleNamespace(plan_stream=False, stream=False, max_workers=4, step_timeout=30.0, mode="pipeline")
+    return build_pipeline(args, api_key="replay")
+
+
+def replayed(pipeline, query, use_async=False):
+    planner, executor, verifier = pipeline
+    with fixture_query(query):
+        return run_flow(query, planner, executor, verifier, use_async=use_async)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_synthetic_fixtures_replay_the_corpus(pipeline, use_async):
+    with replay(FixtureStore(SYNTHETIC_FIXTURES), LatencyModel("none")):
+        for _, query in read_queries(DEFAULT_QUERIES):
+            assert flow_error(replayed(pipeline, query, use_async)) is None, query
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_replayed_wikipedia_step_has_a_summary(pipeline, use_async):
+    with replay(FixtureStore(SYNTHETIC_FIXTURES), LatencyModel("none")):
+        result = replayed(pipeline, "Tell me about the history of ISRO", use_async)
+
+    (step,) = result["results"]
+    assert step["output"]["found"] is True
+    assert step["output"]["summary"].startswith("ISRO is a synthetic Wikipedia summary")
+
+
+def test_replayed_error_status_raises():
+    response = ReplayResponse({"status": 503, "body": "{}"})
+
+    with pytest.raises(requests.HTTPError):
+        response.raise_for_status()
+    ReplayResponse({"status": 200, "body": "{}"}).raise_for_status()
+
+
+def test_steps_returning_errors_count_as_failed_samples():
+    ok = {"status": "success", "results": [{"step": 1, "tool": "wikipedia_tool", "status": "success", "output": {"found": True}}]}
+    broken = {"status": "success", "results": [{"step": 1, "tool": "wikipedia_tool", "status": "success", "output": "Error executing WikipediaTool: boom"}]}
+    failed_step = {"status": "success", "results": [{"step": 1, "tool": "news_tool", "status": "error", "error": "Step timed out"}]}
+
+    assert flow_error(ok) is None
+    assert "boom" in flow_error(broken)
+    assert "timed out" in flow_error(failed_step)
+    assert flow_error({"status": "error", "error": "no plan"}) == "no plan"
+
+
+def test_every_iteration_starts_with_cold_stores(pipeline):
+    with replay(FixtureStore(SYNTHETIC_FIXTURES), LatencyModel("none")) as store:
+        fetches = []
+        original = ReplayResponse.__init__
+
+        def counting(self, entry):
+            fetches.append(entry)
+            original(self, entry)
+
+        ReplayResponse.__init__ = counting
+        try:
+            level = run_level(lambda q: replayed(pipeline, q), ["Tell me about the history of ISRO"], concurrency=1, iterations=3)
+        finally:
+            ReplayResponse.__init__ = original
+
+    assert level["errors"] == 0
+    assert len(fetches) == 3
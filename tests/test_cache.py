@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+import tools.cache
+from tools.base_tool import BaseTool
+from tools.cache import MISS, CachedTool, MemoryCache, SQLiteCache, make_key
+
+
+class CountingTool(BaseTool):
+    """
+    Returns whatever `outputs` holds for the city, counting upstream calls.
+    """
+
+    name = "counting_tool"
+    description = "Counts"
+    cache_ttl = 60
+
+    def __init__(self, outputs=None):
+        self.outputs = outputs or {}
+        self.calls = 0
+
+    def execute(self, city=""):
+        self.calls += 1
+        return self.outputs.get(city, f"{city} ok")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tools.cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    return SQLiteCache(path=str(tmp_path / "cache.sqlite3"))
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.set("k", {"temperature_c": 30}, ttl=10)
+    assert cache.get("k") == {"temperature_c": 30}
+    assert cache.expires_at("k") == 1010.0
+
+    clock[0] += 10
+    assert cache.get("k") is MISS
+    assert cache.expires_at("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    for cache in (MemoryCache(max_entries=2), SQLiteCache(path=str(tmp_path / "lru.sqlite3"), max_entries=2)):
+        for op in (lambda: cache.set("a", 1, ttl=60), lambda: cache.set("b", 2, ttl=60), lambda: cache.get("a"), lambda: cache.set("c", 3, ttl=60)):
+            op()
+            clock[0] += 1
+
+        assert cache.get("b") is MISS
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_equivalent_args_share_an_entry(clock):
+    tool = CachedTool(CountingTool(), MemoryCache())
+
+    assert tool.execute(city="Pune") == tool.execute(city=" pune ") == "Pune ok"
+    assert tool.calls == 1
+    assert make_key("weather_tool", {"city": "PUNE", "unit": None}) == make_key("weather_tool", {"city": "pune"})
+
+
+def test_cached_result_is_refetched_after_the_tool_ttl(clock):
+    tool = CachedTool(CountingTool(), MemoryCache())
+    tool.execute(city="Pune")
+    clock[0] += 59
+    tool.execute(city="Pune")
+    assert tool.calls == 1
+
+    clock[0] += 1
+    tool.execute(city="Pune")
+    assert tool.calls == 2
+
+
+@pytest.mark.parametrize("output", [
+    "Error: upstream returned 503",
+    {"error": "rate limited"},
+    {"Pune": {"temperature_c": 30}, "Atlantis": {"error": "Could not find coordinates"}},
+])
+def test_errors_are_not_cached(clock, output):
+    upstream = CountingTool({"Pune": output})
+    tool = CachedTool(upstream, MemoryCache())
+
+    tool.execute(city="Pune")
+    tool.execute(city="Pune")
+    asyncio.run(tool.aexecute(city="Pune"))
+    assert upstream.calls == 3
+    assert tools.cache.expires_at(tool, {"city": "Pune"}, output, fetched_at=1000.0) is None
+
+
+def test_zero_ttl_disables_caching(clock):
+    upstream = CountingTool()
+    tool = CachedTool(upstream, MemoryCache(), ttl=0)
+
+    tool.execute(city="Pune")
+    tool.execute(city="Pune")
+    assert upstream.calls == 2
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+from agents.executor import ExecutorAgent, _step_sort_key
+from tools.base_tool import BaseTool
+
+
+class SleepTool(BaseTool):
+    """
+    Sleeps for `seconds` and records when each call started and ended.
+    """
+
+    name = "sleep_tool"
+    description = "Sleeps"
+
+    def __init__(self):
+        self.calls = {}
+
+    def execute(self, label="", seconds=0.0, fail=False):
+        started = time.monotonic()
+        time.sleep(seconds)
+        self.calls[label] = (started, time.monotonic())
+        if fail:
+            raise RuntimeError(f"{label} failed")
+        return label
+
+
+def step(number, label, seconds=0.0, depends_on=None, fail=False):
+    return {
+        "step": number,
+        "tool": "sleep_tool",
+        "args": {"label": label, "seconds": seconds, "fail": fail},
+        "depends_on": depends_on or [],
+    }
+
+
+def make_executor(tool, **kwargs):
+    return ExecutorAgent(None, [tool], **kwargs)
+
+
+def test_dependent_step_waits_for_its_dependency():
+    tool = SleepTool()
+    results = make_executor(tool).run([step(1, "a", 0.1), step(2, "b", depends_on=[1])])
+
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert tool.calls["b"][0] >= tool.calls["a"][1]
+
+
+def test_independent_steps_run_concurrently():
+    tool = SleepTool()
+    started = time.monotonic()
+    results = make_executor(tool, max_workers=3).run([step(n, str(n), 0.2) for n in (1, 2, 3)])
+
+    assert time.monotonic() - started < 0.5
+    assert [r["step"] for r in results] == [1, 2, 3]
+
+
+def test_failed_dependency_blocks_dependents():
+    tool = SleepTool()
+    results = make_executor(tool).run([step(1, "a", fail=True), step(2, "b", depends_on=[1])])
+
+    assert results[0]["status"] == "error"
+    assert results[1]["status"] == "error"
+    assert "b" not in tool.calls
+
+
+def test_cycle_is_reported_not_run():
+    tool = SleepTool()
+    results = make_executor(tool).run([step(1, "a", depends_on=[2]), step(2, "b", depends_on=[1])])
+
+    assert [r["status"] for r in results] == ["error", "error"]
+    assert tool.calls == {}
+
+
+def test_unknown_dependency_is_ignored():
+    results = make_executor(SleepTool()).run([step(1, "a", depends_on=[9])])
+
+    assert results[0]["status"] == "success"
+
+
+def test_slow_step_times_out():
+    results = make_executor(SleepTool(), step_timeout=0.2).run([step(1, "slow", 1.0), step(2, "fast")])
+
+    assert results[0]["status"] == "error"
+    assert "timed out" in results[0]["error"]
+    assert results[1]["status"] == "success"
+
+
+def test_queued_steps_do_not_time_out_while_waiting_for_a_worker():
+    # Each step fits in the timeout, but all three together do not
+    results = make_executor(SleepTool(), max_workers=1, step_timeout=0.3).run([step(n, str(n), 0.2) for n in (1, 2, 3)])
+
+    assert [r["status"] for r in results] == ["success", "success", "success"]
+
+
+def test_run_stream_schedules_steps_as_they_arrive():
+    tool = SleepTool()
+
+    def plan():
+        yield step(1, "a", 0.2)
+        time.sleep(0.1)
+        # Depends on a step that has not arrived yet
+        yield step(2, "b", depends_on=[3])
+        yield step(3, "c")
+
+    results = make_executor(tool).run_stream(plan())
+
+    assert [r["status"] for r in results] == ["success", "success", "success"]
+    # The first step started before the plan finished streaming
+    assert tool.calls["a"][0] < tool.calls["c"][0]
+    assert tool.calls["b"][0] >= tool.calls["c"][1]
+
+
+
+def test_step_sort_key_orders_numbers_before_other_ids():
+    ids = [10, "2", "final", 1.5, None, 3, "a"]
+
+    assert sorted(ids, key=_step_sort_key) == [1.5, "2", 3, 10, None, "a", "final"]
+
+
+def test_results_follow_step_order_not_completion_order():
+    tool = SleepTool()
+    # Steps finish in the reverse of plan order, and arrive out of order
+    plan = [step(3, "c", 0.0), step(1, "a", 0.3), step(10, "j", 0.1), step(2, "b", 0.2)]
+
+    def streamed():
+        yield from plan
+
+    for results in (make_executor(tool).run(plan), make_executor(tool).run_stream(streamed()), asyncio.run(make_executor(tool).arun(plan))):
+        assert [r["step"] for r in results] == [1, 2, 3, 10]
+        assert [r["output"] for r in results] == ["a", "b", "c", "j"]
+        assert tool.calls["c"][1] < tool.calls["j"][1] < tool.calls["a"][1]
+
+def test_arun_respects_dependencies():
+    tool = SleepTool()
+    results = asyncio.run(make_executor(tool).arun([step(1, "a", 0.1), step(2, "b", depends_on=[1])]))
+
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert tool.calls["b"][0] >= tool.calls["a"][1]
+
+
+def test_arun_timeout_caps_latency_of_blocking_tools():
+    # A sync-only tool runs on a worker thread that cannot be interrupted;
+    # the run must still end at the timeout rather than when the thread does
+    started = time.monotonic()
+    results = asyncio.run(make_executor(SleepTool(), step_timeout=0.2).arun([step(1, "slow", 1.0)]))
+
+    assert results[0]["status"] == "error"
+    assert time.monotonic() - started < 0.8
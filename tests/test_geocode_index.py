@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from tools.geocode_index import GeocodeIndex, normalize_place
+from tools.weather_tool import WeatherTool
+
+
+@pytest.fixture
+def index(tmp_path):
+    gazetteer = tmp_path / "gazetteer.json"
+    gazetteer.write_text(json.dumps([
+        {"name": "Hyderabad", "latitude": 17.38, "longitude": 78.48, "country_code": "IN", "aliases": []},
+        {"name": "Portland", "latitude": 45.52, "longitude": -122.68, "country_code": "US", "population": 650000, "aliases": []},
+        {"name": "Portland", "latitude": 43.66, "longitude": -70.26, "country_code": "US", "population": 68000, "aliases": []},
+        {"name": "Bengaluru", "latitude": 12.97, "longitude": 77.59, "country_code": "IN", "aliases": ["Bangalore"]},
+    ]))
+    return GeocodeIndex(gazetteer_path=str(gazetteer), index_path=str(tmp_path / "learned.json"))
+
+
+def test_normalize_place_keeps_the_region():
+    assert normalize_place(" Bengalūru ") == "bengaluru"
+    assert normalize_place("Portland,  Maine") == "portland, maine"
+    assert normalize_place("Portland, Maine") != normalize_place("Portland, Oregon")
+
+
+def test_region_filters_gazetteer_candidates(index):
+    assert index.lookup("Hyderabad")["country_code"] == "IN"
+    assert index.lookup("Hyderabad, India")["country_code"] == "IN"
+    assert index.lookup("Hyderabad, IN")["country_code"] == "IN"
+    # Known name, other country: left to the geocoding API
+    assert index.lookup("Hyderabad, Pakistan") is None
+
+
+def test_bare_name_resolves_to_the_biggest_place(index):
+    assert index.lookup("Portland")["latitude"] == 45.52
+
+
+def test_learned_results_are_kept_per_region(index, tmp_path):
+    index.add("Portland, Maine", {"name": "Portland", "latitude": 43.66, "longitude": -70.26, "country_code": "US", "admin1": "Maine"})
+    index.add("Hyderabad, Pakistan", {"name": "Hyderabad", "latitude": 25.39, "longitude": 68.37, "country_code": "PK", "country": "Pakistan"})
+
+    assert index.lookup("Portland, Maine")["latitude"] == 43.66
+    assert index.lookup("Hyderabad, Pakistan")["latitude"] == 25.39
+    assert index.lookup("Hyderabad")["latitude"] == 17.38
+
+    reloaded = GeocodeIndex(gazetteer_path=None, index_path=str(tmp_path / "learned.json"))
+    assert reloaded.lookup("Portland, Maine")["latitude"] == 43.66
+    assert reloaded.lookup("Hyderabad, Pakistan")["latitude"] == 25.39
+    assert reloaded.lookup("Portland, Oregon") is None
+
+
+def test_fuzzy_matching_needs_a_close_name_and_no_region(index):
+    assert index.lookup("Bengaluuru")["name"] == "Bengaluru"
+    assert index.lookup("Bangalor")["name"] == "Bengaluru"
+    assert index.lookup("Hyderbad")["name"] == "Hyderabad"
+    # Further off is a miss for the geocoding API, not a snap to a known city
+    assert index.lookup("Haidarabad") is None
+    assert index.lookup("Portlands") is not None
+    assert index.lookup("Porto") is None
+    assert index.lookup("Bengaluuru, Pakistan") is None
+
+
+def test_weather_geocoding_picks_the_result_in_the_region():
+    results = {"results": [
+        {"name": "Portland", "latitude": 45.52, "longitude": -122.68, "country_code": "US", "admin1": "Oregon"},
+        {"name": "Portland", "latitude": 43.66, "longitude": -70.26, "country_code": "US", "admin1": "Maine"},
+    ]}
+
+    assert WeatherTool._geocode_params("Portland, Maine")["name"] == "Portland"
+    assert WeatherTool._pick("Portland, Maine", results)["latitude"] == 43.66
+    assert WeatherTool._pick("Portland", results)["latitude"] == 45.52
+    assert WeatherTool._pick("Portland, Texas", results) is None
+    assert WeatherTool._requested(cities=["Portland, Maine", "Portland, Oregon", "portland,maine"]) == ["Portland, Maine", "Portland, Oregon"]
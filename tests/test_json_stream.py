@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from llm.json_stream import JSONArrayStreamParser
+
+DOCUMENT = json.dumps({
+    "note": "answer_points: [\"not this\"]",
+    "answer_points": ["Pune is 31°C, \"sunny\"", {"point": "nested [1, 2]", "tags": ["a", "b"]}, 42, None, ["x", ["y"]]],
+    "success": True,
+})
+EXPECTED = ["Pune is 31°C, \"sunny\"", {"point": "nested [1, 2]", "tags": ["a", "b"]}, 42, None, ["x", ["y"]]]
+
+
+def feed_in_chunks(parser, text, size):
+    items = []
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, len(DOCUMENT)])
+def test_same_items_for_any_chunking(size):
+    parser = JSONArrayStreamParser("answer_points")
+
+    assert feed_in_chunks(parser, DOCUMENT, size) == EXPECTED
+    assert parser.done
+
+
+def test_items_arrive_as_soon_as_they_close():
+    parser = JSONArrayStreamParser("answer_points")
+
+    assert parser.feed('{"answer_points": ["one", "tw') == ["one"]
+    assert parser.feed('o", 3') == ["two"]
+    # A number is only complete once a delimiter follows it
+    assert parser.feed("]") == [3]
+    assert parser.done
+
+
+def test_code_fences_are_ignored():
+    parser = JSONArrayStreamParser("plan")
+    text = '```json\n{"plan": [{"step": 1, "tool": "weather_tool"}]}\n```'
+
+    assert feed_in_chunks(parser, text, 5) == [{"step": 1, "tool": "weather_tool"}]
+
+
+def test_only_the_top_level_key_counts():
+    parser = JSONArrayStreamParser("plan")
+    text = '{"meta": {"plan": ["inner"]}, "plan": ["outer"]}'
+
+    assert parser.feed(text) == ["outer"]
+
+
+def test_malformed_item_is_skipped():
+    parser = JSONArrayStreamParser("plan")
+
+    assert parser.feed('{"plan": [{"step": 1}, {"step": oops}, {"step": 3}]}') == [{"step": 1}, {"step": 3}]
+
+
+def test_empty_array_and_missing_key():
+    empty = JSONArrayStreamParser("plan")
+    assert empty.feed('{"plan": []}') == []
+    assert empty.done
+
+    missing = JSONArrayStreamParser("plan")
+    assert missing.feed('{"answer": ["x"]}') == []
+    assert not missing.done
+
+
+def test_nothing_after_the_array_is_parsed():
+    parser = JSONArrayStreamParser("plan")
+
+    assert parser.feed('{"plan": ["a"], "other": ["b"]}') == ["a"]
+    assert parser.feed('{"plan": ["c"]}') == []
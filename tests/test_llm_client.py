@@ -0,0 +1,79 @@
+import types
+
+import httpx
+import openai
+import pytest
+
+import llm.client
+from core.tracing import NULL_SPAN
+from llm.client import RATE_LIMIT_ATTEMPTS, LLMClient
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = None
+
+
+class FakeCompletions:
+    """
+    Raises the queued errors in turn, then answers.
+    """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def client_with(errors, max_retries=2):
+    client = LLMClient(api_key="test", base_url="http://llm.invalid/v1", max_retries=max_retries)
+    completions = FakeCompletions(errors)
+    client._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    return client, completions
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(llm.client.time, "sleep", lambda seconds: None)
+
+
+def test_sdk_never_retries_by_itself():
+    client = LLMClient(api_key="test", base_url="http://llm.invalid/v1", max_retries=5)
+
+    assert client.client.max_retries == 0
+
+
+def test_429_is_retried_only_through_the_limiter():
+    client, completions = client_with([StatusError(429)] * 10)
+
+    with pytest.raises(StatusError):
+        client._create({}, NULL_SPAN)
+    assert completions.calls == RATE_LIMIT_ATTEMPTS
+
+
+def test_server_and_connection_errors_are_retried_max_retries_times():
+    connection = openai.APIConnectionError(request=httpx.Request("POST", "http://llm.invalid/v1"))
+    client, completions = client_with([StatusError(503), connection])
+
+    assert client._create({}, NULL_SPAN) == "ok"
+    assert completions.calls == 3
+
+    client, completions = client_with([StatusError(500)] * 5, max_retries=0)
+    with pytest.raises(StatusError):
+        client._create({}, NULL_SPAN)
+    assert completions.calls == 1
+
+
+def test_client_errors_are_not_retried():
+    client, completions = client_with([StatusError(400)])
+
+    with pytest.raises(StatusError):
+        client._create({}, NULL_SPAN)
+    assert completions.calls == 1
@@ -0,0 +1,189 @@
+import time
+
+import pytest
+
+from llm.router import HEDGE_MIN_SAMPLES, CircuitBreaker, Endpoint, LLMRouter, LLMUnavailable, load_endpoints
+
+
+class FakeClient:
+    def __init__(self, model, delay=0.0, fail=False, fail_after=None):
+        self.model = model
+        self.delay = delay
+        self.fail = fail
+        # Streams: fail after this many chunks
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def complete(self, messages, json_mode=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model} down")
+        return self.model
+
+    def stream(self, messages, json_mode=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model} down")
+        for index, chunk in enumerate([self.model, "-", "done"]):
+            if index == self.fail_after:
+                raise RuntimeError(f"{self.model} broke mid-stream")
+            yield chunk
+
+
+def warmed(name, client, latency=0.05, **kwargs):
+    """
+    An endpoint with enough history for its p95 to be trusted.
+    """
+    endpoint = Endpoint(name, client, **kwargs)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        endpoint.record(latency, error=False)
+        endpoint.record_first_chunk(latency)
+    return endpoint
+
+
+def complete(client):
+    return client.complete([])
+
+
+def test_breaker_opens_after_threshold_and_admits_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one trial call while half-open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_router_fails_over_to_next_endpoint():
+    primary, backup = FakeClient("primary", fail=True), FakeClient("backup")
+    router = LLMRouter([Endpoint("a", primary), Endpoint("b", backup)], hedge=False)
+
+    assert router.call("planner", complete) == "backup"
+    assert router.stats()["failovers"] == 1
+
+
+def test_router_skips_endpoint_with_open_circuit():
+    primary, backup = FakeClient("primary", fail=True), FakeClient("backup")
+    router = LLMRouter([Endpoint("a", primary, breaker=CircuitBreaker(failure_threshold=1, cooldown=60)), Endpoint("b", backup)], hedge=False)
+
+    router.call("planner", complete)
+    router.call("planner", complete)
+
+    assert primary.calls == 1
+    assert backup.calls == 2
+
+
+def test_router_raises_when_every_endpoint_fails():
+    router = LLMRouter([Endpoint("a", FakeClient("a", fail=True)), Endpoint("b", FakeClient("b", fail=True))], hedge=False)
+
+    with pytest.raises(LLMUnavailable):
+        router.call("planner", complete)
+
+
+def test_router_uses_endpoints_serving_the_role():
+    small, large = FakeClient("small"), FakeClient("large")
+    router = LLMRouter([Endpoint("small", small, roles=["planner"]), Endpoint("large", large, roles=["verifier"])], hedge=False)
+
+    assert router.call("planner", complete) == "small"
+    assert router.call("verifier", complete) == "large"
+
+
+def test_load_endpoints_skips_endpoint_without_its_key(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "groq-key")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    endpoints = load_endpoints([
+        {"name": "groq", "model": "m", "base_url": "https://api.groq.com/openai/v1", "api_key_env": "GROQ_API_KEY"},
+        {"name": "openai", "model": "m", "base_url": "https://api.openai.com/v1", "api_key_env": "OPENAI_API_KEY"},
+    ])
+
+    assert [e.name for e in endpoints] == ["groq"]
+    assert endpoints[0].client.api_key == "groq-key"
+
+
+def test_load_endpoints_requires_key_with_base_url():
+    with pytest.raises(ValueError):
+        load_endpoints([{"name": "x", "model": "m", "base_url": "https://api.openai.com/v1"}])
+
+
+def test_load_endpoints_fails_when_no_key_is_set(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with pytest.raises(ValueError):
+        load_endpoints([{"model": "m", "base_url": "https://api.openai.com/v1", "api_key_env": "OPENAI_API_KEY"}])
+
+
+def test_call_hedges_a_slow_endpoint():
+    slow, fast = FakeClient("slow", delay=1.0), FakeClient("fast")
+    router = LLMRouter([warmed("a", slow), warmed("b", fast)])
+
+    started = time.monotonic()
+    assert router.call("planner", complete) == "fast"
+    assert time.monotonic() - started < 0.5
+    assert (router.stats()["hedged"], router.stats()["hedge_wins"]) == (1, 1)
+
+
+def test_stream_without_history_uses_one_endpoint():
+    primary, backup = FakeClient("primary"), FakeClient("backup")
+    router = LLMRouter([Endpoint("a", primary), Endpoint("b", backup)])
+
+    assert "".join(router.stream("planner", [])) == "primary-done"
+    assert backup.calls == 0
+
+
+def test_stream_hedges_on_time_to_first_chunk():
+    slow, fast = FakeClient("slow", delay=1.0), FakeClient("fast")
+    router = LLMRouter([warmed("a", slow), warmed("b", fast)])
+
+    started = time.monotonic()
+    assert "".join(router.stream("verifier", [])) == "fast-done"
+    assert time.monotonic() - started < 0.5
+    assert (router.stats()["hedged"], router.stats()["hedge_wins"]) == (1, 1)
+
+
+def test_stream_keeps_the_first_endpoint_that_streams():
+    primary, backup = FakeClient("primary", delay=0.1), FakeClient("backup", delay=1.0)
+    router = LLMRouter([warmed("a", primary, latency=0.02), warmed("b", backup)])
+
+    assert "".join(router.stream("verifier", [])) == "primary-done"
+    assert router.stats()["hedge_wins"] == 0
+
+
+def test_stream_fails_over_before_the_first_chunk():
+    router = LLMRouter([Endpoint("a", FakeClient("a", fail=True)), Endpoint("b", FakeClient("b"))])
+
+    assert "".join(router.stream("planner", [])) == "b-done"
+    assert router.stats()["failovers"] == 1
+
+
+def test_stream_failure_after_chunks_is_raised():
+    router = LLMRouter([Endpoint("a", FakeClient("a", fail_after=2)), Endpoint("b", FakeClient("b"))])
+    received = []
+
+    with pytest.raises(RuntimeError, match="mid-stream"):
+        for chunk in router.stream("planner", []):
+            received.append(chunk)
+    assert received == ["a", "-"]
+
+
+def test_stream_raises_when_every_endpoint_fails():
+    router = LLMRouter([Endpoint("a", FakeClient("a", fail=True)), Endpoint("b", FakeClient("b", fail=True))])
+
+    with pytest.raises(LLMUnavailable):
+        list(router.stream("planner", []))
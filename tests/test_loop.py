@@ -0,0 +1,45 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from core.http import HTTPPool
+from core.loop import get_loop, run_async
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_run_async_reuses_one_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_async(current_loop()) is run_async(current_loop()) is get_loop()
+
+
+def test_run_async_carries_caller_context():
+    async def read():
+        return request_id.get()
+
+    token = request_id.set("abc")
+    try:
+        assert run_async(read()) == "abc"
+    finally:
+        request_id.reset(token)
+
+
+def test_run_async_propagates_exceptions():
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_async(fail())
+
+
+def test_async_client_is_shared_across_runs():
+    pytest.importorskip("httpx")
+    pool = HTTPPool()
+
+    async def client():
+        return pool._async_client()
+
+    assert run_async(client()) is run_async(client())
@@ -0,0 +1,99 @@
+from agents.plan_cache import PlanCache, normalize_query
+
+
+def weather_plan(*cities):
+    args = {"city": cities[0]} if len(cities) == 1 else {"cities": list(cities)}
+    return [{"step": 1, "tool": "weather_tool", "args": args, "reasoning": f"Weather for {', '.join(cities)}"}]
+
+
+def stock_plan(symbol):
+    return [{"step": 1, "tool": "stock_tool", "args": {"symbol": symbol}, "reasoning": "Price lookup"}]
+
+
+def test_normalize_query_collapses_spacing_and_punctuation():
+    assert normalize_query("  weather in   Pune? ") == "weather in Pune"
+
+
+def test_exact_hit_ignores_case():
+    cache = PlanCache()
+    cache.put("Weather in Pune", weather_plan("Pune"))
+
+    plan, tier = cache.get("weather in pune?")
+
+    assert tier == "exact"
+    assert plan == weather_plan("Pune")
+
+
+def test_template_substitutes_city():
+    cache = PlanCache()
+    cache.put("weather in Pune", weather_plan("Pune"))
+
+    plan, tier = cache.get("weather in Mumbai")
+
+    assert tier == "template"
+    assert plan[0]["args"] == {"city": "Mumbai"}
+    assert "Mumbai" in plan[0]["reasoning"]
+
+
+def test_template_keeps_number_of_items():
+    cache = PlanCache()
+    cache.put("weather in Pune and Mumbai", weather_plan("Pune", "Mumbai"))
+
+    plan, tier = cache.get("weather in Delhi and Chennai")
+    assert tier == "template"
+    assert plan[0]["args"] == {"cities": ["Delhi", "Chennai"]}
+
+    # Three cities do not fit a two-city plan
+    assert cache.get("weather in Delhi, Mumbai and Chennai") == (None, None)
+
+
+def test_template_rejects_list_in_one_slot():
+    cache = PlanCache()
+    cache.put("weather in Pune", weather_plan("Pune"))
+
+    assert cache.get("weather in Delhi and Chennai") == (None, None)
+
+
+def test_template_rejects_second_clause():
+    cache = PlanCache()
+    cache.put("weather in Pune and Mumbai", weather_plan("Pune", "Mumbai"))
+
+    assert cache.get("weather in Goa and top news about cricket") == (None, None)
+
+
+def test_template_rejects_unknown_place():
+    cache = PlanCache()
+    cache.put("weather in Pune", weather_plan("Pune"))
+
+    assert cache.get("weather in it is raining") == (None, None)
+    assert cache.get("weather in Qwertyville") == (None, None)
+
+
+def test_template_checks_ticker_shape():
+    cache = PlanCache()
+    cache.put("price of TCS", stock_plan("TCS"))
+
+    plan, tier = cache.get("price of INFY")
+    assert tier == "template"
+    assert plan[0]["args"] == {"symbol": "INFY"}
+
+    assert cache.get("price of what was bitcoin") == (None, None)
+
+
+def test_templates_off():
+    cache = PlanCache(templates=False)
+    cache.put("weather in Pune", weather_plan("Pune"))
+
+    assert cache.get("weather in Mumbai") == (None, None)
+
+
+def test_stats_count_hits_and_misses():
+    cache = PlanCache()
+    cache.put("weather in Pune", weather_plan("Pune"), latency=1.0)
+    cache.get("weather in Pune")
+    cache.get("weather in Mumbai")
+    cache.get("something else")
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["template_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["saved_seconds"] == 2.0
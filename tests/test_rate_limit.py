@@ -0,0 +1,35 @@
+import pytest
+
+from core.http import HTTPPool
+from core.rate_limit import TokenBucket, parse_limit
+
+
+def test_burst_then_queue():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_pause_overlaps_token_wait():
+    bucket = TokenBucket(rate=10.0, capacity=1)
+    bucket._reserve()
+    bucket.pause(1.0)
+
+    # The token is repaid long before the pause ends
+    assert bucket._reserve() == pytest.approx(1.0, abs=0.01)
+
+
+def test_parse_limit():
+    bucket = parse_limit("10/60")
+
+    assert (bucket.rate, bucket.capacity) == (pytest.approx(1 / 6), 10)
+    assert parse_limit("off") is None
+
+
+def test_urllib3_leaves_429_to_the_limiter():
+    retry = HTTPPool()._adapter.max_retries
+
+    assert 429 not in retry.status_forcelist
+    assert 503 in retry.status_forcelist
@@ -0,0 +1,119 @@
+import io
+import threading
+
+from rich.console import Console
+
+import agents.executor
+import llm.client
+import llm.router
+from core.jobs import NULL_JOB, JobManager, current_job
+from core.render import QueuedConsole, RenderQueue, queued_output
+from llm.client import LLMClient
+from main import AGENT_MODULES
+
+
+def captured(render_queue) -> io.StringIO:
+    out = io.StringIO()
+    render_queue.console = Console(file=out, width=200, color_system=None)
+    return out
+
+
+def test_llm_errors_go_through_the_render_queue(capsys):
+    client = LLMClient(api_key="test")
+
+    def fail(messages, json_mode=False):
+        raise RuntimeError("provider down")
+
+    client.complete = fail
+    assert llm.client in AGENT_MODULES and llm.router in AGENT_MODULES
+    with queued_output(AGENT_MODULES) as render_queue:
+        out = captured(render_queue)
+        manager = JobManager(lambda query: {"status": "success", "answer": client.chat_completion([{"role": "user", "content": query}])})
+        manager.submit("weather in Pune")
+        manager.wait()
+        manager.shutdown()
+
+    lines = out.getvalue().splitlines()
+    assert "#1 weather in Pune" in lines[0]
+    assert "Error calling LLM: provider down" in lines[1]
+    assert capsys.readouterr().out == ""
+
+
+def test_job_moves_from_queued_to_done_or_failed():
+    seen = []
+
+    def handler(query):
+        job = current_job()
+        seen.append(job.status)
+        job.set_status("executing")
+        job.step(1, "weather_tool", "running")
+        job.step(1, "weather_tool", "done")
+        if query == "boom":
+            raise RuntimeError("boom")
+        return {"status": "success" if query == "ok" else "error"}
+
+    finished = []
+    manager = JobManager(handler, max_jobs=1, on_done=finished.append)
+    ok, failed, crashed = (manager.submit(q) for q in ("ok", "no plan", "boom"))
+    assert ok.status in ("queued", "running", "executing", "done")
+    manager.wait()
+    manager.shutdown()
+
+    assert seen == ["running"] * 3
+    assert [job.status for job in (ok, failed, crashed)] == ["done", "failed", "failed"]
+    assert crashed.result == {"status": "error", "error": "boom"}
+    assert finished == [ok, failed, crashed]
+    step = ok.snapshot()["steps"][1]
+    assert step["status"] == "done" and step["started"] <= step["ended"]
+    # Outside a job, progress reports go nowhere
+    assert current_job() is NULL_JOB
+    NULL_JOB.set_status("planning")
+
+
+def test_output_keeps_its_order_and_is_grouped_by_job():
+    gates = [threading.Event() for _ in range(4)]
+
+    def handler(query):
+        for n, gate in enumerate(gates):
+            # The two jobs take turns printing
+            if n % 2 == (query == "second"):
+                gate.wait(5)
+                agents.executor.console.print(f"{query} line {n}")
+                if n + 1 < len(gates):
+                    gates[n + 1].set()
+        return {"status": "success"}
+
+    with queued_output(AGENT_MODULES) as render_queue:
+        out = captured(render_queue)
+        manager = JobManager(handler, max_jobs=2)
+        manager.submit("first")
+        manager.submit("second")
+        gates[0].set()
+        manager.wait()
+        manager.shutdown()
+        agents.executor.console.print("between jobs")
+
+    # Job headers are rules; drop the line drawing
+    assert [line.rstrip("─ ") for line in out.getvalue().splitlines()] == [
+        "#1 first", "first line 0",
+        "#2 second", "second line 1",
+        "#1 first", "first line 2",
+        "#2 second", "second line 3",
+        "between jobs",
+    ]
+
+
+def test_a_bad_renderable_does_not_stop_the_queue():
+    render_queue = RenderQueue()
+    out = captured(render_queue)
+    console = QueuedConsole(render_queue)
+
+    console.print("[red]unclosed[/blue]")
+    console.print("still here")
+    console.quiet = True
+    console.print("silenced")
+    render_queue.flush(5)
+
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("Render error: closing tag '[/blue]'")
+    assert lines[1:] == ["still here"]
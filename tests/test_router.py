@@ -0,0 +1,75 @@
+import pytest
+
+from agents.router import IntentRouter
+from tools.catalog import load_tools
+from tools.registry import ToolRegistry
+
+
+@pytest.fixture(scope="module")
+def tools():
+    return ToolRegistry(load_tools())
+
+
+@pytest.fixture
+def router(tools):
+    return IntentRouter(tools)
+
+
+@pytest.mark.parametrize("query, tool, args", [
+    ("weather in Pune", "weather_tool", {"city": "Pune"}),
+    ("What's the weather in Pune and Mumbai?", "weather_tool", {"cities": ["Pune", "Mumbai"]}),
+    ("price of TCS", "stock_tool", {"symbol": "TCS"}),
+    ("news about ISRO", "news_tool", {"query": "ISRO"}),
+    ("search github for fastapi", "github_tool", {"query": "fastapi"}),
+    ("who is Sachin Tendulkar", "wikipedia_tool", {"query": "Sachin Tendulkar"}),
+    ("what is photosynthesis", "wikipedia_tool", {"query": "photosynthesis"}),
+    ("what is the Taj Mahal", "wikipedia_tool", {"query": "the Taj Mahal"}),
+])
+def test_routes_simple_queries(router, query, tool, args):
+    route = router.route(query)
+
+    assert route is not None
+    assert (route.tool, route.args) == (tool, args)
+    assert route.plan[0]["source"] == "router"
+
+
+@pytest.mark.parametrize("query", [
+    "what is the time in Tokyo",
+    "what is the capital of France",
+    "what is a good laptop",
+    "explain how transformers work",
+    "who is the best batsman in 2011",
+    "weather in Pune and the latest news",
+    "price of Reliance Industries",
+    "compare TCS and Infosys and tell me which is better",
+])
+def test_falls_back_to_planner(router, query):
+    assert router.route(query) is None
+
+
+def test_stats_count_routes_and_fallbacks(router):
+    router.route("weather in Pune")
+    router.route("what is the capital of France")
+
+    assert router.stats() == {"routed": 1, "fallbacks": 1, "template_answers": 0}
+
+
+def routed_result(router, output=None):
+    plan = router.route("weather in Pune").plan
+    if output is None:
+        output = {"city": "Pune", "temperature_c": 31, "windspeed_kmh": 12}
+    return plan, [{"step": 1, "tool": "weather_tool", "status": "success", "output": output}]
+
+
+def test_template_answers_are_off_by_default(router):
+    plan, results = routed_result(router)
+
+    assert router.template_answer(plan, results) is None
+
+
+def test_template_answers_opt_in(tools):
+    router = IntentRouter(tools, template_answers=True)
+    plan, results = routed_result(router)
+
+    assert router.template_answer(plan, results) == ["Current weather in Pune: 31°C, Wind: 12 km/h"]
+    assert router.template_answer(*routed_result(router, output="Error: city not found")) is None
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from server import FlowServer
+
+
+async def exchange(raw: bytes) -> bytes:
+    server = await FlowServer(None, None, None, workers=1).start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+        return response
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1.5"])
+def test_invalid_content_length_is_a_bad_request(length):
+    response = asyncio.run(exchange(f"POST /query HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode()))
+
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Invalid Content-Length" in response
+    assert b"Connection: close" in response
+
+
+def test_oversized_body_is_rejected():
+    response = asyncio.run(exchange(b"POST /query HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n"))
+
+    assert response.startswith(b"HTTP/1.1 413 ")
+
+
+def test_body_is_read_by_content_length():
+    body = b'{"query": ""}'
+    response = asyncio.run(exchange(b"POST /query HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)))
+
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b'Missing \\"query\\"' in response
+
+
+def test_chunked_body_is_refused_with_a_clear_error():
+    raw = b"POST /query HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n12\r\n{\"query\": \"hi\"}\r\n0\r\n\r\n"
+    response = asyncio.run(exchange(raw))
+
+    assert response.startswith(b"HTTP/1.1 411 Length Required")
+    assert b"Content-Length" in response.split(b"\r\n\r\n", 1)[1]
+    assert b"Connection: close" in response
+
+
+class BlockingServer(FlowServer):
+    """
+    Runs each query until `release` is set, recording which ones ran.
+    """
+
+    def __init__(self):
+        super().__init__(None, None, None, workers=1)
+        self.release = threading.Event()
+        self.ran = []
+
+    def _run(self, query):
+        self.ran.append(query)
+        self.release.wait(5)
+        return {"status": "success", "query": query}
+
+
+async def send_query(port, query):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"query": query}).encode()
+    writer.write(b"POST /query HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+    await writer.drain()
+    return reader, writer
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.02)
+
+
+def test_disconnected_clients_are_cancelled_and_their_queued_query_skipped():
+    async def scenario():
+        flows = BlockingServer()
+        server = await flows.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            _, running = await send_query(port, "running")
+            await wait_for(lambda: flows.ran == ["running"])
+            _, queued = await send_query(port, "queued")
+            kept_reader, kept = await send_query(port, "kept")
+            await wait_for(lambda: flows._queue.qsize() == 2)
+
+            running.close()
+            queued.close()
+            await wait_for(lambda: flows.counters["disconnected"] == 2)
+            flows.release.set()
+
+            response = await asyncio.wait_for(kept_reader.readuntil(b"}"), timeout=5)
+            kept.close()
+            return flows, response
+        finally:
+            flows.release.set()
+            server.close()
+
+    flows, response = asyncio.run(scenario())
+
+    assert response.startswith(b"HTTP/1.1 200 ")
+    assert flows.ran == ["running", "kept"]
+    assert flows.counters["accepted"] == 3
@@ -0,0 +1,93 @@
+import threading
+
+from agents.executor import ExecutorAgent
+from agents.speculator import Speculator, extract_candidates
+from tools.base_tool import BaseTool
+from tools.registry import ToolRegistry
+
+
+class RecordingTool(BaseTool):
+    """
+    Records its calls; `gate`, when given, holds every call until set.
+    """
+
+    description = "Records"
+
+    def __init__(self, name, gate=None):
+        self.name = name
+        self.gate = gate
+        self.calls = []
+        self.running = threading.Event()
+
+    def execute(self, **kwargs):
+        self.calls.append(kwargs)
+        self.running.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {"tool": self.name, **kwargs}
+
+
+def speculator(gate=None, **kwargs):
+    tools = {name: RecordingTool(name, gate) for name in ("weather_tool", "stock_tool", "news_tool")}
+    return Speculator(ToolRegistry(tools.values()), **kwargs), tools
+
+
+def test_candidates_come_from_known_cities_tickers_and_topics():
+    candidates = extract_candidates("What is the weather in Pune and Atlantis, the price of TCS and the latest ISRO news?")
+
+    assert ("weather_tool", {"city": "Pune"}, 0.9) in candidates
+    assert ("stock_tool", {"symbol": "TCS.NS"}, 0.8) in candidates
+    assert ("news_tool", {"query": "ISRO"}, 0.6) in candidates
+
+
+def test_guesses_respect_confidence_and_the_call_cap():
+    spec, _ = speculator(min_confidence=0.7, max_calls=1)
+
+    assert spec.guesses("weather in Pune, the price of TCS and ISRO news") == [("weather_tool", {"city": "Pune"})]
+
+
+def test_taken_calls_count_as_adopted_and_the_rest_as_wasted():
+    spec, tools = speculator()
+    speculation = spec.start("weather in Pune, the price of TCS and ISRO news")
+    assert spec.stats()["launched"] == 3
+
+    future = speculation.take({"tool": "weather_tool", "args": {"city": "pune"}})
+    assert future.result()["city"] == "Pune"
+    # A step that was not guessed, or was already taken, gets nothing
+    assert speculation.take({"tool": "weather_tool", "args": {"city": "Pune"}}) is None
+    assert speculation.take({"tool": "stock_tool", "args": {"symbol": "INFY"}}) is None
+    speculation.finish()
+
+    stats = spec.stats()
+    assert (stats["queries"], stats["adopted"], stats["wasted"]) == (1, 1, 2)
+    assert stats["waste_rate"] == round(2 / 3, 3)
+    assert stats["saved_ms"] >= 0
+
+
+def test_queued_calls_are_cancelled_when_the_plan_skips_them():
+    gate = threading.Event()
+    spec, tools = speculator(gate, max_workers=1)
+    speculation = spec.start("weather in Pune, the price of TCS and ISRO news")
+    assert tools["weather_tool"].running.wait(5)
+
+    speculation.finish()
+    gate.set()
+
+    stats = spec.stats()
+    assert stats["wasted"] == 3
+    # The first call was already running on the only worker; the others never started
+    assert stats["cancelled"] == 2
+    assert sum(len(tool.calls) for tool in tools.values()) == 1
+
+
+def test_executor_adopts_a_speculative_call_instead_of_repeating_it():
+    spec, tools = speculator()
+    speculation = spec.start("weather in Pune, the price of TCS and ISRO news")
+    executor = ExecutorAgent(None, ToolRegistry(tools.values()))
+
+    results = executor.run([{"step": 1, "tool": "weather_tool", "args": {"city": "Pune"}}], speculation=speculation)
+    speculation.finish()
+
+    assert results[0]["output"] == {"tool": "weather_tool", "city": "Pune"}
+    assert len(tools["weather_tool"].calls) == 1
+    assert spec.stats()["adopted"] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from tools.cache import CachedTool, MemoryCache
+from tools.stock_tool import StockTool
+
+
+class FakeStockTool(StockTool):
+    """
+    StockTool with a price for every symbol except those starting with ZZ.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fetches = 0
+
+    def fetch(self, symbols):
+        self.fetches += 1
+        return {s: None if s.startswith("ZZ") else {"symbol": s, "name": s, "currency": "INR", "price": 101.234} for s in symbols}
+
+
+def test_unknown_symbol_is_an_error_string():
+    output = FakeStockTool().execute(symbol="ZZZ")
+
+    assert isinstance(output, str) and output.startswith("Error: ZZZ:")
+
+
+def test_known_symbol_is_a_quote():
+    assert FakeStockTool().execute(symbol="TCS.NS") == {"symbol": "TCS.NS", "name": "TCS.NS", "currency": "INR", "price": 101.23}
+
+
+@pytest.mark.parametrize("kwargs, cacheable", [
+    ({"symbol": "TCS.NS"}, True),
+    ({"symbols": ["TCS.NS", "INFY.NS"]}, True),
+    ({"symbol": "ZZZ"}, False),
+    ({"symbols": ["TCS.NS", "ZZZ"]}, False),
+])
+def test_results_with_missing_symbols_are_not_cached(kwargs, cacheable):
+    tool = FakeStockTool()
+    cached = CachedTool(tool, MemoryCache())
+
+    cached.execute(**kwargs)
+    cached.execute(**kwargs)
+
+    assert tool.is_cacheable(tool.execute(**kwargs)) is cacheable
+    assert tool.fetches == (2 if cacheable else 3)
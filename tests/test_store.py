@@ -0,0 +1,147 @@
+import sqlite3
+import time
+import types
+
+from agents.planner import PlannerAgent
+from agents.tool_calling import ToolCallingAgent
+from core.store import QueryStore, query_key
+from main import flow_version, run_flow
+from tools.base_tool import BaseTool
+from tools.registry import ToolRegistry
+
+
+class StubTool(BaseTool):
+    description = "Stub"
+
+    def __init__(self, name):
+        self.name = name
+
+    def execute(self, **kwargs):
+        return {}
+
+RESULT = {
+    "status": "success",
+    "plan": [{"step": 1, "tool": "news_tool", "args": {"query": "top"}}],
+    "results": [{"step": 1, "tool": "news_tool", "status": "success", "output": {"articles": []}}],
+    "answer": {"answer_points": ["Nothing new"], "success": True},
+}
+
+
+def test_query_key_ignores_case_spacing_and_punctuation():
+    assert query_key("Top  news today?") == query_key("top news today")
+
+
+def test_lookup_serves_fresh_answer_with_status():
+    store = QueryStore(None)
+    run_id = store.record("top news today", RESULT, time.time(), fresh_until=time.time() + 60)
+
+    memo = store.lookup("Top news today?")
+
+    assert memo["status"] == "success"
+    assert memo["memoized"] is True
+    assert memo["run_id"] == run_id
+    assert memo["answer"] == RESULT["answer"]
+
+
+def test_lookup_skips_stale_and_unmemoizable_runs():
+    store = QueryStore(None)
+    store.record("stale", RESULT, time.time() - 120, fresh_until=time.time() - 1)
+    store.record("never", RESULT, time.time(), fresh_until=None)
+
+    assert store.lookup("stale") is None
+    assert store.lookup("never") is None
+    assert store.stats()["misses"] == 2
+
+
+def test_lookup_returns_latest_fresh_run():
+    store = QueryStore(None)
+    store.record("q", RESULT, time.time(), fresh_until=time.time() + 60)
+    latest = store.record("q", dict(RESULT, answer={"answer_points": ["newer"]}), time.time(), fresh_until=time.time() + 60)
+
+    assert store.lookup("q")["run_id"] == latest
+
+
+def test_memoize_off_still_records():
+    store = QueryStore(None, memoize=False)
+    store.record("q", RESULT, time.time(), fresh_until=time.time() + 60)
+
+    assert store.lookup("q") is None
+    assert store.stats()["runs"] == 1
+
+
+def test_history_filters_and_marks_memo_hits(tmp_path):
+    store = QueryStore(None)
+    run_id = store.record("q", RESULT, time.time(), fresh_until=time.time() + 60)
+    store.record_hit("q", run_id)
+    store.record("other", RESULT, time.time())
+
+    runs = list(store.history(query="Q"))
+    assert [r["memo_of"] for r in runs] == [None, run_id]
+    assert runs[0]["plan"] == RESULT["plan"]
+    assert "plan" not in runs[1]
+
+    path = tmp_path / "history.jsonl"
+    assert store.export(str(path)) == 3
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_answers_are_only_served_to_the_flow_that_produced_them():
+    store = QueryStore(None)
+    run_id = store.record("q", RESULT, time.time(), fresh_until=time.time() + 60, flow="pipeline:abc")
+
+    assert store.lookup("q", "tools:abc") is None
+    assert store.lookup("q", "pipeline:def") is None
+    assert store.lookup("q", "pipeline:abc")["run_id"] == run_id
+    store.record_hit("q", run_id, "pipeline:abc")
+    assert [r["flow"] for r in store.history(query="q")] == ["pipeline:abc", "pipeline:abc"]
+
+
+def test_stores_from_before_flows_are_upgraded(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    old = sqlite3.connect(path)
+    old.execute(
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, query_key TEXT NOT NULL, "
+        "status TEXT NOT NULL, started_at REAL NOT NULL, finished_at REAL NOT NULL, "
+        "fresh_until REAL, memo_of INTEGER, data BLOB)"
+    )
+    old.execute(
+        "INSERT INTO runs (query, query_key, status, started_at, finished_at, fresh_until) VALUES ('q', 'q', 'success', 0, 0, ?)",
+        (time.time() + 60,),
+    )
+    old.commit()
+    old.close()
+
+    store = QueryStore(path)
+
+    assert store.lookup("q", "pipeline:abc") is None
+    assert [r["flow"] for r in store.history()] == [""]
+    store.record("q", RESULT, time.time(), fresh_until=time.time() + 60, flow="pipeline:abc")
+    assert store.lookup("q", "pipeline:abc") is not None
+
+
+def test_flow_version_covers_the_mode_and_the_tool_registry():
+    registry = ToolRegistry([StubTool("weather_tool")])
+    planner = PlannerAgent(None, registry)
+    tool_agent = ToolCallingAgent(None, registry, executor=None)
+
+    pipeline = flow_version(planner)
+    assert pipeline.startswith("pipeline:") and flow_version(tool_agent).startswith("tools:")
+    assert flow_version(PlannerAgent(None, ToolRegistry([StubTool("weather_tool")]))) == pipeline
+
+    registry.register(StubTool("news_tool"))
+    assert flow_version(planner) != pipeline
+
+
+def test_run_flow_does_not_reuse_answers_across_modes():
+    store = QueryStore(None)
+    registry = ToolRegistry([StubTool("weather_tool")])
+    store.record("q", RESULT, time.time(), fresh_until=time.time() + 60, flow=flow_version(PlannerAgent(None, registry)))
+
+    class Answering(ToolCallingAgent):
+        def run(self, query, use_async=False):
+            return {"status": "error", "error": "ran", "plan": [], "results": []}
+
+    executor = types.SimpleNamespace(tool_map={})
+    result = run_flow("q", Answering(None, registry, executor=None), executor, None, store=store)
+
+    assert result["error"] == "ran"
@@ -0,0 +1,65 @@
+from agents.summarizer import ResultSummarizer, compact_json, estimate_tokens
+
+
+def article(n, text="word"):
+    return {"title": f"Story {n}", "url": f"https://news.example/{n}", "description": " ".join([text] * 40)}
+
+
+def success(step, tool, output):
+    return {"step": step, "tool": tool, "status": "success", "output": output}
+
+
+def test_duplicates_are_removed_within_and_across_steps():
+    summarizer = ResultSummarizer()
+    syndicated = dict(article(1), title="Story 1 (syndicated)")
+    results = [
+        success(1, "news_tool", {"articles": [article(1), syndicated, article(2)]}),
+        success(2, "news_tool", {"articles": [article(2), article(3)]}),
+    ]
+
+    first, second = summarizer.summarize(results)
+
+    assert [a["title"] for a in first["output"]["articles"]] == ["Story 1", "Story 2"]
+    assert [a["title"] for a in second["output"]["articles"]] == ["Story 3"]
+
+
+def test_empty_fields_are_dropped_and_floats_rounded():
+    (entry,) = ResultSummarizer().summarize([success(1, "weather_tool", {"city": "Pune", "temperature_c": 30.4567, "note": "", "alerts": []})])
+
+    assert entry["output"] == {"city": "Pune", "temperature_c": 30.46}
+
+
+def test_long_output_is_truncated_to_the_tool_budget():
+    summarizer = ResultSummarizer(budgets={"news_tool": 120})
+    output = {"articles": [article(n, "lorem ipsum") for n in range(20)]}
+
+    (entry,) = summarizer.summarize([success(1, "news_tool", output)])
+    fitted = entry["output"]
+
+    assert estimate_tokens(compact_json(fitted)) <= 120
+    kept = fitted["articles"]
+    # Trailing items go first, and the count of dropped ones is kept
+    assert [a["title"] for a in kept] == [f"Story {n}" for n in range(len(kept))]
+    assert 0 < len(kept) < 20
+    assert fitted["articles_omitted"] == 20 - len(kept)
+    assert all(a["description"].endswith("…") for a in kept)
+
+
+def test_short_output_is_left_alone():
+    output = {"symbol": "TCS.NS", "price": 3900.5}
+
+    (entry,) = ResultSummarizer().summarize([success(1, "stock_tool", output)])
+
+    assert entry["output"] == output
+
+
+def test_errors_are_passed_through():
+    results = [
+        {"step": 1, "tool": "news_tool", "status": "error", "error": "Step timed out"},
+        success(2, "wikipedia_tool", "Error executing WikipediaTool: boom"),
+    ]
+
+    assert ResultSummarizer().summarize(results) == [
+        {"step": 1, "tool": "news_tool", "error": "Step timed out"},
+        {"step": 2, "tool": "wikipedia_tool", "error": "Error executing WikipediaTool: boom"},
+    ]
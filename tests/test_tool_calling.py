@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from agents.executor import ExecutorAgent
+from agents.tool_calling import ToolCallingAgent
+from tools.base_tool import BaseTool
+
+
+class EchoTool(BaseTool):
+    name = "weather_tool"
+    description = "Echoes"
+
+    def execute(self, city=""):
+        if city == "Atlantis":
+            raise RuntimeError("Could not find coordinates")
+        return {"city": city, "temperature_c": 30}
+
+
+class ScriptedLLM:
+    """
+    Replies to chat_with_tools with `replies` in turn, keeping the messages
+    it was sent.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sent = []
+
+    def chat_with_tools(self, messages, tools):
+        self.sent.append([dict(m) for m in messages])
+        return self.replies.pop(0)
+
+
+def call(call_id, arguments, name="weather_tool"):
+    return {"id": call_id, "name": name, "arguments": arguments}
+
+
+def agent(replies, **kwargs):
+    llm = ScriptedLLM(replies)
+    return ToolCallingAgent(llm, [EchoTool()], ExecutorAgent(None, [EchoTool()]), **kwargs), llm
+
+
+def test_tool_calls_become_executor_steps():
+    steps = ToolCallingAgent._steps([call("a", '{"city": "Pune"}'), call("b", "not json"), call("c", "[1, 2]")], first_step=4)
+
+    assert [s["step"] for s in steps] == [4, 5, 6]
+    assert [s["args"] for s in steps] == [{"city": "Pune"}, {}, {}]
+    assert all(s["tool"] == "weather_tool" and s["depends_on"] == [] and s["source"] == "tool_call" for s in steps)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_results_go_back_as_tool_messages_for_the_answer(use_async):
+    tool_agent, llm = agent([
+        {"content": None, "tool_calls": [call("a", '{"city": "Pune"}'), call("b", '{"city": "Atlantis"}')]},
+        {"content": "- Pune is 30°C\n- Atlantis was not found", "tool_calls": []},
+    ])
+
+    result = tool_agent.run("weather in Pune and Atlantis", use_async=use_async)
+
+    assert result["status"] == "success"
+    assert result["answer"]["answer_points"] == ["Pune is 30°C", "Atlantis was not found"]
+    assert [(s["step"], s["args"]) for s in result["plan"]] == [(1, {"city": "Pune"}), (2, {"city": "Atlantis"})]
+    assert [r["status"] for r in result["results"]] == ["success", "error"]
+
+    assistant, pune, atlantis = llm.sent[1][2:]
+    assert [c["id"] for c in assistant["tool_calls"]] == ["a", "b"]
+    assert (pune["tool_call_id"], json.loads(pune["content"])) == ("a", {"city": "Pune", "temperature_c": 30})
+    assert atlantis["tool_call_id"] == "b" and "Could not find coordinates" in json.loads(atlantis["content"])["error"]
+
+
+def test_later_rounds_continue_the_step_numbering():
+    tool_agent, _ = agent([
+        {"content": None, "tool_calls": [call("a", '{"city": "Pune"}')]},
+        {"content": None, "tool_calls": [call("b", '{"city": "Mumbai"}')]},
+        {"content": "- done", "tool_calls": []},
+    ])
+
+    result = tool_agent.run("weather in Pune, then Mumbai")
+
+    assert [s["step"] for s in result["plan"]] == [1, 2]
+    assert [r["step"] for r in result["results"]] == [1, 2]
+
+
+def test_llm_errors_and_endless_rounds_fail_the_query():
+    failed, _ = agent([{"content": None, "tool_calls": [], "error": "provider down"}])
+    endless, _ = agent([{"content": None, "tool_calls": [call(str(n), '{"city": "Pune"}')]} for n in range(2)], max_rounds=2)
+
+    assert failed.run("weather in Pune") == {"status": "error", "error": "provider down", "plan": [], "results": []}
+    result = endless.run("weather in Pune")
+    assert result["status"] == "error" and len(result["results"]) == 2
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from agents.verifier import VerifierAgent
+
+
+class FakeLLM:
+    def __init__(self, chunks=(), error=None, reply='{"answer_points": ["from the blocking call"]}'):
+        self.chunks = list(chunks)
+        self.error = error
+        self.reply = reply
+        self.blocking_calls = 0
+
+    def stream(self, messages, json_mode=False):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+    def chat_completion(self, messages, json_mode=False):
+        self.blocking_calls += 1
+        return self.reply
+
+
+RESULTS = [{"step": 1, "tool": "weather_tool", "status": "success", "output": {"city": "Pune", "temperature_c": 31}}]
+
+
+def verify(llm, stream=True):
+    return VerifierAgent(llm, stream=stream).run("weather in Pune", RESULTS)
+
+
+@pytest.mark.parametrize("response", [
+    '{"answer_points": ["Pune is 31°C"], "success": true}',
+    '```json\n{"final_answer": "Pune is 31°C", "success": true}\n```',
+    '{"success": false}',
+    "not JSON at all",
+])
+def test_streamed_reply_is_used_whatever_its_shape(response):
+    llm = FakeLLM(chunks=[response[:10], response[10:]])
+
+    assert verify(llm) == response.replace("```json", "").replace("```", "").strip()
+    assert llm.blocking_calls == 0
+
+
+def test_failed_stream_falls_back_to_one_blocking_call():
+    llm = FakeLLM(chunks=['{"answer_points": ["Pu'], error=ConnectionError("reset"))
+
+    assert json.loads(verify(llm)) == {"answer_points": ["from the blocking call"]}
+    assert llm.blocking_calls == 1
+
+
+def test_empty_stream_falls_back_to_one_blocking_call():
+    llm = FakeLLM(chunks=[])
+
+    verify(llm)
+    assert llm.blocking_calls == 1
+
+
+def test_without_streaming_one_blocking_call():
+    llm = FakeLLM(chunks=['{"answer_points": ["unused"]}'])
+
+    assert json.loads(verify(llm, stream=False)) == {"answer_points": ["from the blocking call"]}
+    assert llm.blocking_calls == 1
@@ -1,10 +1,20 @@
+import asyncio
+import functools
 from abc import ABC, abstractmethod
-from typing import Any, Dict
-from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from core.tracing import bind
+
+# Runs blocking tools for `aexecute`. Not the loop's default executor, which
+# asyncio.run joins on exit: a step abandoned after its timeout would then
+# still hold up the whole run until the blocking call returned
+_blocking_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="blocking-tool")
 
 class BaseTool(ABC):
     name: str
     description: str
+    # Seconds a result stays fresh in the tool cache; 0 disables caching
+    cache_ttl: float = 0
 
     @abstractmethod
     def execute(self, **kwargs) -> Any:
@@ -13,6 +23,36 @@ class BaseTool(ABC):
         """
         pass
 
+    async def aexecute(self, **kwargs) -> Any:
+        """
+        Async version of execute. Tools with a native async client override
+        this; everything else runs the blocking execute on a worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_blocking_pool, bind(functools.partial(self.execute, **kwargs)))
+
+    def is_cacheable(self, output: Any) -> bool:
+        """
+        Whether a result may be cached. Error strings never are, nor are
+        mappings (city -> reading, symbol -> quote) where any entry failed.
+        """
+        if isinstance(output, str):
+            return not output.startswith("Error")
+        if isinstance(output, dict):
+            return "error" not in output and not any(isinstance(value, dict) and "error" in value for value in output.values())
+        return True
+
+    def to_points(self, output: Any) -> List[str]:
+        """
+        Renders a successful result as answer bullet points, for answers
+        that skip the verifier. An empty list means "let the verifier do it".
+        """
+        if isinstance(output, str):
+            return [line for line in output.splitlines() if line.strip()]
+        if isinstance(output, dict):
+            return [f"{key}: {value}" for key, value in output.items()]
+        return []
+
     def to_schema(self) -> Dict[str, Any]:
         """
         Returns the JSON schema for the tool.
@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .base_tool import BaseTool
+from core.tracing import current_span
+from core.singleflight import SingleFlight
+
+# Returned by cache backends on a miss, since None is a legitimate tool output
+MISS = object()
+
+
+def normalize_args(value: Any) -> Any:
+    """
+    Canonical form of tool arguments so that "Pune", " pune " and "PUNE"
+    share one cache entry.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: normalize_args(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_args(v) for v in value]
+    return value
+
+
+def make_key(tool_name: str, args: Dict[str, Any]) -> str:
+    return f"{tool_name}:{json.dumps(normalize_args(args), sort_keys=True, default=str)}"
+
+
+def expires_at(tool: Optional[BaseTool], args: Dict[str, Any], output: Any, fetched_at: float) -> Optional[float]:
+    """
+    Until when a tool output counts as fresh (epoch seconds): the expiry of
+    its cache entry when the tool is cached, since a cache hit may already
+    be old, else `fetched_at` plus the tool's TTL. None if the output may
+    not be reused at all.
+    """
+    if tool is None or tool.cache_ttl <= 0 or not tool.is_cacheable(output):
+        return None
+    if isinstance(tool, CachedTool):
+        return tool.cache.expires_at(make_key(tool.name, args))
+    return fetched_at + tool.cache_ttl
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISS
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """
+        When the entry expires (epoch seconds), or None if it is not cached.
+        Unlike `get`, this leaves the stats and LRU order alone.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None and entry[0] > time.time() else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+class SQLiteCache:
+    """
+    On-disk LRU cache so results survive restarts. Values are stored as JSON,
+    which covers everything the tools return.
+    """
+
+    def __init__(self, path: str = ".cache/tool_cache.sqlite3", max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return MISS
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return MISS
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            overflow = size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self._stats["evictions"] += overflow
+            self._conn.commit()
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """
+        When the entry expires (epoch seconds), or None if it is not cached.
+        Unlike `get`, this leaves the stats and LRU order alone.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None and row[0] > time.time() else None
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            return dict(self._stats, size=size)
+
+
+class CachedTool(BaseTool):
+    """
+    Wraps a tool so identical calls within the tool's `cache_ttl` are served
+    from the cache instead of the upstream API.
+    """
+
+    def __init__(self, tool: BaseTool, cache, ttl: Optional[float] = None):
+        self.tool = tool
+        self.cache = cache
+        self.name = tool.name
+        self.description = tool.description
+        self.cache_ttl = tool.cache_ttl if ttl is None else ttl
+        # Concurrent misses for the same call share one upstream request
+        self._flights = SingleFlight()
+
+    def __getattr__(self, item):
+        # Anything not defined here (helpers, constants) comes from the tool
+        if item in ("tool", "_flights"):
+            raise AttributeError(item)
+        return getattr(self.tool, item)
+
+    def to_schema(self) -> Dict[str, Any]:
+        return self.tool.to_schema()
+
+    def is_cacheable(self, output: Any) -> bool:
+        return self.tool.is_cacheable(output)
+
+    def to_points(self, output: Any) -> List[str]:
+        return self.tool.to_points(output)
+
+    def _store(self, key: str, output: Any) -> Any:
+        if self.cache_ttl > 0 and self.is_cacheable(output):
+            self.cache.set(key, output, self.cache_ttl)
+        return output
+
+    async def _astore(self, key: str, pending) -> Any:
+        return self._store(key, await pending)
+
+    def execute(self, **kwargs) -> Any:
+        if self.cache_ttl <= 0:
+            return self.tool.execute(**kwargs)
+        key = make_key(self.name, kwargs)
+        output = self.cache.get(key)
+        current_span().set(cache_hit=output is not MISS)
+        if output is MISS:
+            output = self._flights.do(key, lambda: self._store(key, self.tool.execute(**kwargs)))
+        return output
+
+    async def aexecute(self, **kwargs) -> Any:
+        if self.cache_ttl <= 0:
+            return await self.tool.aexecute(**kwargs)
+        key = make_key(self.name, kwargs)
+        output = self.cache.get(key)
+        current_span().set(cache_hit=output is not MISS)
+        if output is MISS:
+            output = await self._flights.ado(key, lambda: self._astore(key, self.tool.aexecute(**kwargs)))
+        return output
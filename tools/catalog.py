@@ -0,0 +1,128 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from .base_tool import BaseTool
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "catalog.json")
+
+# Where each tool lives. Adding a tool means adding it here and running
+# `python -m tools.catalog` to refresh catalog.json
+TOOL_CLASSES = {
+    "weather_tool": "tools.weather_tool:WeatherTool",
+    "github_tool": "tools.github_tool:GitHubTool",
+    "news_tool": "tools.news_tool:NewsTool",
+    "wikipedia_tool": "tools.wikipedia_tool:WikipediaTool",
+    "stock_tool": "tools.stock_tool:StockTool",
+}
+
+
+def _import_class(target: str):
+    module_name, class_name = target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class LazyTool(BaseTool):
+    """
+    Stands in for a tool using only its catalog entry (name, description,
+    schema, cache TTL). The tool module and its dependencies are imported
+    the first time the tool actually runs.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.name = spec["name"]
+        self.description = spec["description"]
+        self.cache_ttl = spec.get("cache_ttl", 0)
+        self._tool: Optional[BaseTool] = None
+        self._load_lock = threading.Lock()
+
+    def __getattr__(self, item):
+        # Anything not in the catalog (helpers, constants) needs the real tool
+        if item in ("spec", "_tool", "_load_lock"):
+            raise AttributeError(item)
+        return getattr(self.load(), item)
+
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+
+    def load(self) -> BaseTool:
+        if self._tool is None:
+            with self._load_lock:
+                if self._tool is None:
+                    self._tool = _import_class(self.spec["class"])()
+        return self._tool
+
+    def to_schema(self) -> Dict[str, Any]:
+        return self.spec["schema"]
+
+    def is_cacheable(self, output: Any) -> bool:
+        return self.load().is_cacheable(output)
+
+    def to_points(self, output: Any) -> List[str]:
+        return self.load().to_points(output)
+
+    def execute(self, **kwargs) -> Any:
+        return self.load().execute(**kwargs)
+
+    async def aexecute(self, **kwargs) -> Any:
+        return await self.load().aexecute(**kwargs)
+
+
+def build_catalog(classes: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Imports every tool and captures what the agents need to plan with it.
+    """
+    specs = []
+    for name, target in (classes or TOOL_CLASSES).items():
+        tool = _import_class(target)()
+        specs.append({
+            "name": tool.name,
+            "class": target,
+            "description": tool.description,
+            "cache_ttl": tool.cache_ttl,
+            "schema": tool.to_schema(),
+        })
+    return specs
+
+
+def load_tools(path: str = CATALOG_PATH, names: Optional[Iterable[str]] = None) -> List[LazyTool]:
+    """
+    Lazy tools for every catalog entry (or just `names`). Falls back to
+    building the catalog in memory when catalog.json is missing.
+    """
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            specs = json.load(f)
+    else:
+        specs = build_catalog()
+    wanted = set(names) if names is not None else None
+    return [LazyTool(spec) for spec in specs if wanted is None or spec["name"] in wanted]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh or check the tool catalog (tools/catalog.json)")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if catalog.json is out of date instead of rewriting it")
+    args = parser.parse_args()
+
+    specs = build_catalog()
+    if args.check:
+        with open(CATALOG_PATH, encoding="utf-8") as f:
+            current = json.load(f)
+        if current != specs:
+            print("tools/catalog.json is out of date; run `python -m tools.catalog`")
+            sys.exit(1)
+        print("tools/catalog.json is up to date")
+        return
+    with open(CATALOG_PATH, "w", encoding="utf-8") as f:
+        json.dump(specs, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Wrote {len(specs)} tools to {CATALOG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import difflib
+import json
+import os
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(__file__), "data", "gazetteer.json")
+
+# How close a misspelling must be to a known name to count as a match. Kept
+# high: a fuzzy hit is trusted without asking the geocoding API, so a real
+# but unknown town must not snap onto a known one a letter away
+FUZZY_CUTOFF = 0.9
+
+# Country names for the codes in the bundled gazetteer, so "Pune, India"
+# matches a place recorded only as "IN"
+COUNTRY_NAMES = {
+    "AE": ("united arab emirates", "uae"),
+    "AU": ("australia",),
+    "BD": ("bangladesh",),
+    "CA": ("canada",),
+    "CN": ("china",),
+    "DE": ("germany",),
+    "FR": ("france",),
+    "GB": ("united kingdom", "uk", "england", "great britain"),
+    "HK": ("hong kong",),
+    "IN": ("india",),
+    "JP": ("japan",),
+    "LK": ("sri lanka",),
+    "NP": ("nepal",),
+    "PK": ("pakistan",),
+    "RU": ("russia",),
+    "SG": ("singapore",),
+    "US": ("united states", "usa", "us", "america"),
+}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = "".join(c if c.isalnum() else " " for c in text.casefold())
+    return " ".join(text.split())
+
+
+def split_place(name: str) -> Tuple[str, Optional[str]]:
+    """
+    The folded city and region of "Portland, Maine" ("portland", "maine").
+    The region is None when there is none.
+    """
+    city, _, region = name.partition(",")
+    return _fold(city), _fold(region) or None
+
+
+def normalize_place(name: str) -> str:
+    """
+    Folds case, accents and punctuation so "Bengaluru", "bengaluru " and
+    "Bengalūru" share one key. A trailing region is kept, so "Portland,
+    Maine" and "Portland, Oregon" stay apart.
+    """
+    city, region = split_place(name)
+    return f"{city}, {region}" if region else city
+
+
+def in_region(place: Dict[str, Any], region: str) -> bool:
+    """
+    Whether `place` lies in `region`: its country code, a name of that
+    country, or its first-level division (state, province) as the geocoding
+    API reports them.
+    """
+    code = (place.get("country_code") or "").upper()
+    names = {code.casefold(), *COUNTRY_NAMES.get(code, ())}
+    names.update(_fold(place.get(field) or "") for field in ("country", "admin1"))
+    return region in names - {""}
+
+
+class GeocodeIndex:
+    """
+    Local city -> coordinates lookup so weather requests usually skip the
+    geocoding API. Seeded from a gazetteer (the bundled JSON file, or a
+    GeoNames dump via `load_geonames`), then grown with every remote lookup,
+    which is persisted to `index_path`.
+    """
+
+    def __init__(self, gazetteer_path: Optional[str] = BUNDLED_GAZETTEER, index_path: Optional[str] = ".cache/geocode_index.json"):
+        self.index_path = index_path
+        # Every place sharing a name, biggest first
+        self._places: Dict[str, List[Dict[str, Any]]] = {}
+        self._aliases: Dict[str, str] = {}
+        # Remote results by the full query, region included
+        self._queries: Dict[str, Dict[str, Any]] = {}
+        self._learned: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "fuzzy_hits": 0, "misses": 0}
+
+        if gazetteer_path and os.path.exists(gazetteer_path):
+            with open(gazetteer_path, encoding="utf-8") as f:
+                self._load(json.load(f))
+        if index_path and os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self._learned = json.load(f)
+            for query, place in self._learned.items():
+                self._remember(query, place)
+
+    def _add(self, place: Dict[str, Any], aliases: Iterable[str] = ()):
+        key = normalize_place(place["name"])
+        # A gazetteer can list several towns with the same name; a bare name
+        # resolves to the biggest, a region picks among them
+        places = self._places.setdefault(key, [])
+        places.append(place)
+        places.sort(key=lambda p: p.get("population", 0), reverse=True)
+        for alias in aliases:
+            alias_key = normalize_place(alias)
+            if alias_key and alias_key != key:
+                self._aliases.setdefault(alias_key, key)
+
+    def _remember(self, query: str, place: Dict[str, Any]):
+        self._queries[normalize_place(query)] = place
+        if not any(p == place for p in self._places.get(normalize_place(place["name"]), [])):
+            self._add(place)
+
+    def _load(self, entries: Iterable[Dict[str, Any]]):
+        for entry in entries:
+            place = {k: v for k, v in entry.items() if k != "aliases"}
+            self._add(place, entry.get("aliases", []))
+
+    def load_geonames(self, path: str, min_population: int = 15000):
+        """
+        Adds cities from a GeoNames dump such as cities15000.txt
+        (https://download.geonames.org/export/dump/).
+        """
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) < 15:
+                    continue
+                population = int(cols[14] or 0)
+                if population < min_population:
+                    continue
+                aliases = [cols[2]] + [a for a in cols[3].split(",") if a.isascii()]
+                entries.append({
+                    "name": cols[1],
+                    "latitude": float(cols[4]),
+                    "longitude": float(cols[5]),
+                    "country_code": cols[8],
+                    "population": population,
+                    "aliases": aliases,
+                })
+        with self._lock:
+            self._load(entries)
+
+    def lookup(self, city: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"name", "latitude", "longitude", ...} or None on a miss.
+        "City, Region" only matches a place in that region; when the index
+        has the name but not there, it is a miss for the geocoding API.
+        """
+        key, region = split_place(city)
+        if not key:
+            return None
+        with self._lock:
+            place = self._queries.get(normalize_place(city))
+            if place is None:
+                places = self._places.get(self._aliases.get(key, key), [])
+                if region:
+                    places = [p for p in places if in_region(p, region)]
+                place = places[0] if places else None
+            if place is not None:
+                self._stats["hits"] += 1
+                return dict(place)
+
+            # A misspelled name with a region is left to the geocoding API,
+            # which can check it against that region
+            if region is None:
+                # Only compare against names sharing the first letter; keeps
+                # fuzzy matching cheap even with a full GeoNames dump loaded
+                candidates = [k for k in list(self._places) + list(self._aliases) if k[:1] == key[:1]]
+                match = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+                if match:
+                    self._stats["fuzzy_hits"] += 1
+                    return dict(self._places[self._aliases.get(match[0], match[0])][0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def add(self, city: str, location: Dict[str, Any]):
+        """
+        Records a remote geocoding result under the full query, region and
+        all, and under the returned name, and writes it to the persistent
+        index.
+        """
+        place = {
+            "name": location["name"],
+            "latitude": location["latitude"],
+            "longitude": location["longitude"],
+            "country_code": location.get("country_code"),
+        }
+        # Kept so later "City, Region" lookups can match the place
+        for field in ("country", "admin1"):
+            if location.get(field):
+                place[field] = location[field]
+        with self._lock:
+            self._remember(city, place)
+            self._learned[city] = place
+            if self.index_path:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._learned, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, places=sum(map(len, self._places.values())), aliases=len(self._aliases))
+
+
+_index: Optional[GeocodeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_geocode_index() -> GeocodeIndex:
+    """
+    Process-wide index. Set GEONAMES_PATH to extend the bundled gazetteer
+    with a GeoNames dump.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = GeocodeIndex()
+                if os.getenv("GEONAMES_PATH"):
+                    index.load_geonames(os.getenv("GEONAMES_PATH"))
+                _index = index
+    return _index
@@ -1,11 +1,14 @@
-import requests
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .base_tool import BaseTool
+from core.http import get_pool
+
+SEARCH_URL = "https://api.github.com/search/repositories"
 
 class GitHubTool(BaseTool):
     name = "github_tool"
     description = "Searches for GitHub repositories and returns details (stars, description). Args: query (str)"
+    cache_ttl = 3600  # 1 hour
 
     def to_schema(self) -> Dict[str, Any]:
         return {
@@ -26,37 +29,59 @@ class GitHubTool(BaseTool):
             }
         }
 
-    def execute(self, query: str) -> str:
+    @staticmethod
+    def _request(query: str):
+        params = {"q": query, "sort": "stars", "order": "desc", "per_page": 3}
+        headers = {"Accept": "application/vnd.github.v3+json"}
+
+        # Use token if available to avoid rate limits
+        token = os.getenv("GITHUB_TOKEN")
+        if token and token != "optional_github_token_here":
+            headers["Authorization"] = f"token {token}"
+        return params, headers
+
+    @staticmethod
+    def _format(query: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        repositories = [
+            {
+                "name": item["full_name"],
+                "stars": item["stargazers_count"],
+                "description": item.get("description"),
+                "language": item.get("language"),
+                "url": item["html_url"],
+            }
+            for item in data.get("items", [])
+        ]
+        return {"query": query, "total_count": data.get("total_count", len(repositories)), "repositories": repositories}
+
+    def to_points(self, output: Any) -> List[str]:
+        if not output["repositories"]:
+            return [f"No repositories found for query: {output['query']}"]
+        return [
+            f"**{repo['name']}** ({repo['stars']} stars): {repo['description'] or 'No description'} ({repo['url']})"
+            for repo in output["repositories"]
+        ]
+
+    def execute(self, query: str) -> Any:
+        try:
+            params, headers = self._request(query)
+            response = get_pool().get(SEARCH_URL, params=params, headers=headers)
+
+            if response.status_code != 200:
+                return f"Error searching GitHub: {response.status_code} - {response.text}"
+
+            return self._format(query, response.json())
+        except Exception as e:
+            return f"Error executing GitHubTool: {str(e)}"
+
+    async def aexecute(self, query: str) -> Any:
         try:
-            url = f"https://api.github.com/search/repositories?q={query}&sort=stars&order=desc&per_page=3"
-            headers = {"Accept": "application/vnd.github.v3+json"}
-            
-            # Use token if available to avoid rate limits
-            token = os.getenv("GITHUB_TOKEN")
-            if token and token != "optional_github_token_here":
-                headers["Authorization"] = f"token {token}"
-            
-            response = requests.get(url, headers=headers)
-            
+            params, headers = self._request(query)
+            response = await get_pool().aget(SEARCH_URL, params=params, headers=headers)
+
             if response.status_code != 200:
                 return f"Error searching GitHub: {response.status_code} - {response.text}"
-            
-            data = response.json()
-            items = data.get("items", [])
-            
-            if not items:
-                return f"No repositories found for query: {query}"
-            
-            results = []
-            for item in items:
-                repo_info = (
-                    f"Name: {item['full_name']}\n"
-                    f"Stars: {item['stargazers_count']}\n"
-                    f"Description: {item['description']}\n"
-                    f"URL: {item['html_url']}\n"
-                )
-                results.append(repo_info)
-            
-            return "\n---\n".join(results)
+
+            return self._format(query, response.json())
         except Exception as e:
             return f"Error executing GitHubTool: {str(e)}"
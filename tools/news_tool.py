@@ -1,11 +1,15 @@
-import requests
 import os
 from typing import Dict, Any, List
 from .base_tool import BaseTool
+from core.http import get_pool
+
+TOP_HEADLINES_URL = "https://gnews.io/api/v4/top-headlines"
+SEARCH_URL = "https://gnews.io/api/v4/search"
 
 class NewsTool(BaseTool):
     name = "news_tool"
     description = "Fetches top news from India (GNews). Args: query (optional str), count (int, default 5)"
+    cache_ttl = 300  # 5 minutes
 
     def to_schema(self) -> Dict[str, Any]:
         return {
@@ -30,41 +34,64 @@ class NewsTool(BaseTool):
             }
         }
 
-    def execute(self, query: str = None, count: int = 5) -> str:
+    @staticmethod
+    def _request(api_key: str, query: str = None, count: int = 5):
+        url = TOP_HEADLINES_URL
+        params = {
+            "token": api_key,
+            "country": "in",
+            "lang": "en",
+            "max": count
+        }
+
+        if query:
+            url = SEARCH_URL
+            params["q"] = query
+            del params["country"]
+        return url, params
+
+    @staticmethod
+    def _format(status_code: int, data: Dict[str, Any], query: str = None) -> Any:
+        if status_code != 200:
+            return f"Error from GNews API: {data.get('errors', 'Unknown error')}"
+
+        articles = [
+            {
+                "title": art["title"],
+                "source": art.get("source", {}).get("name", "Unknown"),
+                "published_at": art.get("publishedAt"),
+                "description": art.get("description"),
+                "url": art["url"],
+            }
+            for art in data.get("articles", [])
+        ]
+        return {"query": query, "articles": articles}
+
+    def to_points(self, output: Any) -> List[str]:
+        if not output["articles"]:
+            return ["No news found."]
+        return [f"[{art['source']}] {art['title']} ({art['url']})" for art in output["articles"]]
+
+    def execute(self, query: str = None, count: int = 5) -> Any:
         api_key = os.getenv("GNEWS_API_KEY")
         if not api_key:
             return "Error: GNEWS_API_KEY not found in .env"
 
         try:
-            url = "https://gnews.io/api/v4/top-headlines"
-            params = {
-                "token": api_key,
-                "country": "in",
-                "lang": "en",
-                "max": count
-            }
-            
-            if query:
-                url = "https://gnews.io/api/v4/search"
-                params["q"] = query
-                del params["country"] 
-            
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if response.status_code != 200:
-                return f"Error from GNews API: {data.get('errors', 'Unknown error')}"
-
-            articles = data.get("articles", [])
-            if not articles:
-                return "No news found."
-
-            results = []
-            for art in articles:
-                source = art.get("source", {}).get("name", "Unknown")
-                results.append(f"- [{source}] {art['title']} ({art['url']})")
+            url, params = self._request(api_key, query, count)
+            response = get_pool().get(url, params=params)
+            return self._format(response.status_code, response.json(), query)
+        except Exception as e:
+            return f"Error executing NewsTool: {str(e)}"
 
-            return "\n".join(results)
+    async def aexecute(self, query: str = None, count: int = 5) -> Any:
+        api_key = os.getenv("GNEWS_API_KEY")
+        if not api_key:
+            return "Error: GNEWS_API_KEY not found in .env"
 
+        try:
+            url, params = self._request(api_key, query, count)
+            response = await get_pool().aget(url, params=params)
+            return self._format(response.status_code, response.json(), query)
         except Exception as e:
             return f"Error executing NewsTool: {str(e)}"
@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .base_tool import BaseTool
+
+
+class ToolRegistry:
+    """
+    The set of tools the agents can use. `version` changes whenever a tool
+    is added, replaced or removed, so anything derived from the tool list
+    (like the planner prompt) can be rebuilt only when it is stale.
+    """
+
+    def __init__(self, tools: Iterable[BaseTool] = ()):
+        self._tools: Dict[str, BaseTool] = {}
+        self._lock = threading.Lock()
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+        self.version = 0
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: BaseTool):
+        with self._lock:
+            self._tools[tool.name] = tool
+            self._changed()
+
+    def unregister(self, name: str):
+        with self._lock:
+            if self._tools.pop(name, None) is not None:
+                self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._schemas = None
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        """
+        Tool schemas for the current version, built once.
+        """
+        with self._lock:
+            if self._schemas is None:
+                self._schemas = [tool.to_schema() for tool in self._tools.values()]
+            return self._schemas
+
+    def __iter__(self) -> Iterator[BaseTool]:
+        return iter(list(self._tools.values()))
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
@@ -1,10 +1,78 @@
-import yfinance as yf
-from typing import Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from .base_tool import BaseTool
+from core.tracing import bind, span
+
+# Common corrections map
+CORRECTIONS = {
+    "LICIND.NS": "LICI.NS",
+    "LIC": "LICI.NS",
+    "RELIANCE": "RELIANCE.NS",
+    "TCS": "TCS.NS",
+    "INFY": "INFY.NS",
+    "HDFCBANK": "HDFCBANK.NS",
+    "SBI": "SBIN.NS",
+    "SBIN": "SBIN.NS",
+    "TATAMOTORS": "TATAMOTORS.NS",
+    "ZOMATO": "ZOMATO.NS"
+}
+
+NOT_FOUND = "No stock data found. Ensure correct suffix (.NS for NSE, .BO for BSE)."
+
+# Company name and currency barely change, so they are cached far longer than prices
+METADATA_TTL = 24 * 3600
+
+_metadata: Dict[str, tuple] = {}
+_metadata_lock = threading.Lock()
+
+
+def _yfinance():
+    # yfinance pulls in pandas and numpy (~0.5s); only pay for it when a
+    # stock is actually looked up
+    import yfinance
+    return yfinance
+
+
+def _fetch_metadata(symbol: str) -> Dict[str, str]:
+    yf = _yfinance()
+    try:
+        with span("yahoo info", symbol=symbol):
+            info = yf.Ticker(symbol).info
+        return {"name": info.get("longName") or symbol, "currency": info.get("currency", "INR")}
+    except Exception:
+        return {"name": symbol, "currency": None}
+
+
+def get_metadata(symbols: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns name/currency per symbol, fetching only the ones not cached yet
+    (in parallel, since yfinance has no bulk metadata call).
+    """
+    now = time.time()
+    with _metadata_lock:
+        cached = {s: entry[1] for s, entry in _metadata.items() if s in symbols and entry[0] > now}
+    missing = [s for s in symbols if s not in cached]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            fetched = dict(zip(missing, pool.map(bind(_fetch_metadata), missing)))
+        with _metadata_lock:
+            for symbol, meta in fetched.items():
+                # Don't pin a failed lookup for a whole day
+                if meta["currency"] is not None:
+                    _metadata[symbol] = (now + METADATA_TTL, meta)
+        cached.update(fetched)
+    return cached
+
 
 class StockTool(BaseTool):
     name = "stock_tool"
-    description = "Fetches stock price for a given symbol. Use .NS for NSE (e.g. RELIANCE.NS) and .BO for BSE (e.g. TCS.BO). Args: symbol (str)"
+    description = (
+        "Fetches stock prices. Use .NS for NSE (e.g. RELIANCE.NS) and .BO for BSE (e.g. TCS.BO). "
+        "Args: symbol (str) for one stock, or symbols (list of str) to fetch several stocks in a single step"
+    )
+    cache_ttl = 30  # 30 seconds
 
     def to_schema(self) -> Dict[str, Any]:
         return {
@@ -18,64 +86,122 @@ class StockTool(BaseTool):
                         "symbol": {
                             "type": "string",
                             "description": "The stock symbol (e.g., AAPL, RELIANCE.NS, TCS.BO)"
+                        },
+                        "symbols": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Several stock symbols fetched together (e.g., [\"RELIANCE.NS\", \"TCS.NS\", \"INFY.NS\"])"
                         }
                     },
-                    "required": ["symbol"]
+                    "required": []
                 }
             }
         }
 
-    def execute(self, symbol: str) -> str:
-        # Common corrections map
-        CORRECTIONS = {
-            "LICIND.NS": "LICI.NS",
-            "LIC": "LICI.NS",
-            "RELIANCE": "RELIANCE.NS",
-            "TCS": "TCS.NS",
-            "INFY": "INFY.NS",
-            "HDFCBANK": "HDFCBANK.NS",
-            "SBI": "SBIN.NS",
-            "SBIN": "SBIN.NS",
-            "TATAMOTORS": "TATAMOTORS.NS",
-            "ZOMATO": "ZOMATO.NS"
-        }
-        
+    @staticmethod
+    def _clean(symbol: str) -> str:
         # Auto correct common mistakes
         clean_symbol = symbol.upper().strip()
-        if clean_symbol in CORRECTIONS:
-            clean_symbol = CORRECTIONS[clean_symbol]
-        
-        # Helper to fetch price
-        def fetch_price(sym):
+        return CORRECTIONS.get(clean_symbol, clean_symbol)
+
+    @staticmethod
+    def _download_prices(symbols: List[str]) -> Dict[str, float]:
+        """
+        Latest close for every symbol, in one bulk Yahoo request.
+        """
+        if not symbols:
+            return {}
+        yf = _yfinance()
+        try:
+            with span("yahoo download", symbols=len(symbols)):
+                data = yf.download(symbols, period="5d", interval="1d", group_by="ticker", auto_adjust=False, progress=False, threads=True)
+        except Exception:
+            return {}
+        if data is None or data.empty:
+            return {}
+
+        prices = {}
+        multi_index = hasattr(data.columns, "levels")
+        for symbol in symbols:
             try:
-                ticker = yf.Ticker(sym)
-                if hasattr(ticker, "fast_info") and "last_price" in ticker.fast_info:
-                    val = ticker.fast_info["last_price"]
-                    if val is not None: return val
-                
-                hist = ticker.history(period="1d")
-                if not hist.empty:
-                    return hist["Close"].iloc[-1]
-            except:
-                pass
-            return None
-
-        # 1. Try exact/corrected symbol
-        price = fetch_price(clean_symbol)
-        
-        # 2. If failed and no suffix, try adding .NS (NSE is default for India)
-        if price is None and "." not in clean_symbol:
-            clean_symbol = f"{clean_symbol}.NS"
-            price = fetch_price(clean_symbol)
-
-        if price is not None:
-             try:
-                 ticker = yf.Ticker(clean_symbol)
-                 info = ticker.info
-                 currency = info.get('currency', 'INR')
-                 long_name = info.get('longName', clean_symbol)
-                 return f"Stock: {long_name} ({clean_symbol})\nPrice: {currency} {price:.2f}"
-             except:
-                 return f"Stock: {clean_symbol}\nPrice: {price:.2f}"
-
-        return f"No stock data found for symbol: {symbol}. Ensure correct suffix (.NS for NSE, .BO for BSE)."
+                frame = data[symbol] if multi_index else data
+                close = frame["Close"].dropna()
+            except KeyError:
+                continue
+            if not close.empty:
+                prices[symbol] = float(close.iloc[-1])
+        return prices
+
+    def fetch(self, symbols: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Prices and metadata for many symbols, keyed by the symbol as given.
+        Symbols without a suffix that Yahoo doesn't know are retried as NSE
+        (.NS) in a second bulk request.
+        """
+        cleaned = {symbol: self._clean(symbol) for symbol in symbols}
+        prices = self._download_prices(sorted(set(cleaned.values())))
+
+        # If failed and no suffix, try adding .NS (NSE is default for India)
+        retry = {s: f"{c}.NS" for s, c in cleaned.items() if c not in prices and "." not in c}
+        if retry:
+            prices.update(self._download_prices(sorted(set(retry.values()))))
+            cleaned.update({s: c for s, c in retry.items() if c in prices})
+
+        metadata = get_metadata(sorted({c for c in cleaned.values() if c in prices}))
+        results = {}
+        for symbol, clean_symbol in cleaned.items():
+            if clean_symbol not in prices:
+                results[symbol] = None
+                continue
+            meta = metadata.get(clean_symbol, {})
+            results[symbol] = {
+                "symbol": clean_symbol,
+                "name": meta.get("name", clean_symbol),
+                "currency": meta.get("currency"),
+                "price": prices[clean_symbol],
+            }
+        return results
+
+    @staticmethod
+    def _format(symbol: str, quote: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if quote is None:
+            return {"symbol": symbol, "error": NOT_FOUND}
+        return dict(quote, price=round(quote["price"], 2))
+
+    def to_points(self, output: Any) -> List[str]:
+        quotes = output.values() if "symbol" not in output else [output]
+        points = []
+        for quote in quotes:
+            if "error" in quote:
+                points.append(f"{quote['symbol']}: {quote['error']}")
+            elif quote.get("currency"):
+                points.append(f"{quote['name']} ({quote['symbol']}): {quote['currency']} {quote['price']:.2f}")
+            else:
+                points.append(f"{quote['symbol']}: {quote['price']:.2f}")
+        return points
+
+    def execute(self, symbol: str = None, symbols: List[str] = None) -> Any:
+        """
+        One quote dict for `symbol` (an error string if it has none); a
+        mapping of symbol -> quote when `symbols` is given, where symbols
+        without data map to {"symbol", "error"}.
+        """
+        requested = list(symbols or [])
+        if symbol:
+            requested.insert(0, symbol)
+        if not requested:
+            return "Error: provide a stock symbol or a list of symbols."
+
+        try:
+            quotes = self.fetch(requested)
+        except Exception as e:
+            return f"Error executing StockTool: {str(e)}"
+        # One answer per company, even if it was asked for twice
+        unique = {}
+        for s in requested:
+            unique.setdefault(self._clean(s), s)
+        if not symbols:
+            if quotes[requested[0]] is None:
+                return f"Error: {requested[0]}: {NOT_FOUND}"
+            return self._format(requested[0], quotes[requested[0]])
+        return {s: self._format(s, quotes[s]) for s in unique.values()}
@@ -1,10 +1,21 @@
-import requests
-from typing import Dict, Any, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from .base_tool import BaseTool
+from core.http import get_pool
+from core.tracing import bind
+from .geocode_index import get_geocode_index, in_region, normalize_place, split_place
+
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 
 class WeatherTool(BaseTool):
     name = "weather_tool"
-    description = "Fetches current weather for a given city name. Args: city (str)"
+    description = (
+        "Fetches current weather. Args: city (str) for one city, or cities (list of str) "
+        "to fetch several cities in a single step"
+    )
+    cache_ttl = 600  # 10 minutes
 
     def to_schema(self) -> Dict[str, Any]:
         return {
@@ -18,38 +29,177 @@ class WeatherTool(BaseTool):
                         "city": {
                             "type": "string",
                             "description": "The name of the city to get weather for"
+                        },
+                        "cities": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Several city names fetched together in one forecast request"
                         }
                     },
-                    "required": ["city"]
+                    "required": []
                 }
             }
         }
 
-    def execute(self, city: str) -> str:
+    @staticmethod
+    def _geocode_params(city: str) -> Dict[str, Any]:
+        # The API searches names only; for "City, Region" fetch several
+        # candidates and let _pick keep the one in that region
+        name, _, region = city.partition(",")
+        count = 10 if region.strip() else 1
+        return {"name": name.strip(), "count": count, "language": "en", "format": "json"}
+
+    @staticmethod
+    def _pick(city: str, geo_res: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        _, region = split_place(city)
+        results = geo_res.get("results") or []
+        if region:
+            results = [result for result in results if in_region(result, region)]
+        return results[0] if results else None
+
+    @staticmethod
+    def _forecast_params(locations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Open-Meteo takes comma separated coordinate lists for multi-location forecasts
+        return {
+            "latitude": ",".join(str(location["latitude"]) for location in locations),
+            "longitude": ",".join(str(location["longitude"]) for location in locations),
+            "current_weather": "true",
+        }
+
+    @staticmethod
+    def _split_forecasts(weather_res: Any, count: int) -> List[Dict[str, Any]]:
+        """
+        One forecast per requested location; a single location comes back as
+        a bare object rather than a list.
+        """
+        if isinstance(weather_res, dict):
+            weather_res = [weather_res] if count == 1 else []
+        return list(weather_res) + [{} for _ in range(count - len(weather_res))]
+
+    @staticmethod
+    def _format(location: Dict[str, Any], weather_res: Dict[str, Any]) -> Any:
+        city_name = location["name"]
+        if "current_weather" not in weather_res:
+            return f"Error: Could not fetching weather data for {city_name}"
+
+        current = weather_res["current_weather"]
+        return {
+            "city": city_name,
+            "temperature_c": current["temperature"],
+            "windspeed_kmh": current["windspeed"],
+        }
+
+    @staticmethod
+    def _to_mapping(cities: List[str], locations: Dict[str, Any], forecasts: Dict[str, Any]) -> Dict[str, Any]:
+        results = {}
+        for city in cities:
+            location = locations.get(city)
+            if location is None:
+                results[city] = {"error": f"Could not find coordinates for city: {city}"}
+                continue
+            current = forecasts.get(city, {}).get("current_weather")
+            if not current:
+                results[city] = {"error": f"Could not fetch weather data for {location['name']}"}
+                continue
+            results[city] = {
+                "city": location["name"],
+                "temperature_c": current["temperature"],
+                "windspeed_kmh": current["windspeed"],
+            }
+        return results
+
+    @staticmethod
+    def _requested(city: str = None, cities: List[str] = None) -> List[str]:
+        requested = list(cities or [])
+        if city:
+            requested.insert(0, city)
+        # "Pune" and "pune " are the same city; "Portland, Maine" and
+        # "Portland, Oregon" are not
+        unique = {}
+        for name in requested:
+            unique.setdefault(normalize_place(name), name)
+        return list(unique.values())
+
+    def _geocode(self, city: str) -> Optional[Dict[str, Any]]:
+        # Local index first; the geocoding API only on a miss
+        location = get_geocode_index().lookup(city)
+        if location is None:
+            geo_res = get_pool().get(GEOCODE_URL, params=self._geocode_params(city)).json()
+            location = self._pick(city, geo_res)
+            if location is None:
+                return None
+            get_geocode_index().add(city, location)
+        return location
+
+    async def _ageocode(self, city: str) -> Optional[Dict[str, Any]]:
+        location = get_geocode_index().lookup(city)
+        if location is None:
+            geo_res = (await get_pool().aget(GEOCODE_URL, params=self._geocode_params(city))).json()
+            location = self._pick(city, geo_res)
+            if location is None:
+                return None
+            get_geocode_index().add(city, location)
+        return location
+
+    def fetch(self, cities: List[str]):
+        """
+        Resolves every city (index misses are geocoded in parallel), then gets
+        all forecasts in one request. Returns (locations, forecasts) keyed by city.
+        """
+        with ThreadPoolExecutor(max_workers=min(8, len(cities))) as pool:
+            locations = dict(zip(cities, pool.map(bind(self._geocode), cities)))
+        found = [city for city in cities if locations[city] is not None]
+        if not found:
+            return locations, {}
+        weather_res = get_pool().get(FORECAST_URL, params=self._forecast_params([locations[c] for c in found])).json()
+        return locations, dict(zip(found, self._split_forecasts(weather_res, len(found))))
+
+    async def afetch(self, cities: List[str]):
+        resolved = await asyncio.gather(*(self._ageocode(city) for city in cities))
+        locations = dict(zip(cities, resolved))
+        found = [city for city in cities if locations[city] is not None]
+        if not found:
+            return locations, {}
+        weather_res = (await get_pool().aget(FORECAST_URL, params=self._forecast_params([locations[c] for c in found]))).json()
+        return locations, dict(zip(found, self._split_forecasts(weather_res, len(found))))
+
+    def _result(self, requested: List[str], as_mapping: bool, locations, forecasts) -> Any:
+        if as_mapping:
+            return self._to_mapping(requested, locations, forecasts)
+
+        # A single city returns its reading directly rather than a mapping
+        city = requested[0]
+        if locations[city] is None:
+            return f"Error: Could not find coordinates for city: {city}"
+        return self._format(locations[city], forecasts[city])
+
+    def to_points(self, output: Any) -> List[str]:
+        # A single reading, or a mapping of requested city -> reading
+        readings = output.values() if "city" not in output else [output]
+        points = []
+        for reading in readings:
+            if "error" in reading:
+                points.append(reading["error"])
+            else:
+                points.append(f"Current weather in {reading['city']}: {reading['temperature_c']}°C, Wind: {reading['windspeed_kmh']} km/h")
+        return points
+
+    def execute(self, city: str = None, cities: List[str] = None) -> Any:
+        requested = self._requested(city, cities)
+        if not requested:
+            return "Error: provide a city or a list of cities."
+        try:
+            locations, forecasts = self.fetch(requested)
+            return self._result(requested, bool(cities), locations, forecasts)
+        except Exception as e:
+            return f"Error executing WeatherTool: {str(e)}"
+
+    async def aexecute(self, city: str = None, cities: List[str] = None) -> Any:
+        requested = self._requested(city, cities)
+        if not requested:
+            return "Error: provide a city or a list of cities."
         try:
-            # 1. Geocode
-            geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1&language=en&format=json"
-            geo_res = requests.get(geo_url).json()
-
-            if not geo_res.get("results"):
-                return f"Error: Could not find coordinates for city: {city}"
-            
-            location = geo_res["results"][0]
-            lat = location["latitude"]
-            lon = location["longitude"]
-            city_name = location["name"]
-
-            # 2. Weather
-            weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-            weather_res = requests.get(weather_url).json()
-
-            if "current_weather" not in weather_res:
-                return f"Error: Could not fetching weather data for {city_name}"
-
-            current = weather_res["current_weather"]
-            temp = current["temperature"]
-            wind = current["windspeed"]
-            
-            return f"Current weather in {city_name}: {temp}°C, Wind: {wind} km/h"
+            locations, forecasts = await self.afetch(requested)
+            return self._result(requested, bool(cities), locations, forecasts)
         except Exception as e:
             return f"Error executing WeatherTool: {str(e)}"
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+# Summaries change rarely; refetch after a week
+MAX_AGE = 7 * 24 * 3600
+
+
+def normalize_title(text: str) -> str:
+    """
+    "Alan_Turing", "alan turing " and "Alan Turing" share one key.
+    """
+    return " ".join(text.replace("_", " ").casefold().split())
+
+
+class ArticleStore:
+    """
+    Local copy of Wikipedia summaries we have already fetched, so repeat
+    lookups need no network. Articles are stored zlib-compressed under their
+    canonical title; `aliases` maps search queries and redirect titles to
+    that canonical title, which doubles as the search -> title cache.
+    """
+
+    def __init__(self, path: Optional[str] = ".cache/wikipedia.sqlite3", max_age: float = MAX_AGE):
+        self.path = path or ":memory:"
+        self.max_age = max_age
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "title TEXT PRIMARY KEY, data BLOB NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, title TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def resolve(self, query: str) -> Optional[str]:
+        """
+        Title previously resolved for `query`, if any, even when the stored
+        article has gone stale.
+        """
+        key = normalize_title(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT a.data FROM articles a JOIN aliases l ON l.title = a.title WHERE l.alias = ?",
+                (key,),
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0]))["title"] if row else None
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored article for a query or title, or None if it is unknown or
+        older than `max_age`.
+        """
+        key = normalize_title(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT a.data, a.fetched_at FROM articles a "
+                "JOIN aliases l ON l.title = a.title WHERE l.alias = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            data, fetched_at = row
+            if time.time() - fetched_at > self.max_age:
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return json.loads(zlib.decompress(data))
+
+    def put(self, article: Dict[str, Any], aliases: Iterable[str] = ()):
+        """
+        Stores an article under its title and every alias it was reached by.
+        """
+        title = normalize_title(article["title"])
+        data = zlib.compress(json.dumps(article, ensure_ascii=False).encode("utf-8"))
+        keys = {title} | {normalize_title(a) for a in aliases if a}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles (title, data, fetched_at) VALUES (?, ?, ?)",
+                (title, data, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO aliases (alias, title) VALUES (?, ?)",
+                [(key, title) for key in keys],
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (articles,) = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()
+            (aliases,) = self._conn.execute("SELECT COUNT(*) FROM aliases").fetchone()
+            return dict(self._stats, articles=articles, aliases=aliases)
+
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_article_store() -> ArticleStore:
+    """
+    Process-wide store at WIKIPEDIA_STORE_PATH (default .cache/wikipedia.sqlite3).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore(os.getenv("WIKIPEDIA_STORE_PATH", ".cache/wikipedia.sqlite3"))
+    return _store
@@ -1,10 +1,21 @@
-import wikipedia
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional
+from urllib.parse import quote
 from .base_tool import BaseTool
+from core.http import get_pool
+from .wikipedia_store import get_article_store
+
+SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/{}"
+SEARCH_URL = "https://en.wikipedia.org/w/rest.php/v1/search/title"
+# Wikimedia asks API clients to identify themselves
+HEADERS = {"User-Agent": "AI-Operations-Assistant/1.0 (https://github.com/jayeshkaushik1/GenAI-Intern-Assignment)"}
+SUMMARY_SENTENCES = 3
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
 class WikipediaTool(BaseTool):
     name = "wikipedia_tool"
     description = "Searches Wikipedia for a summary of a topic. Args: query (str)"
+    cache_ttl = 6 * 3600  # 6 hours
 
     def to_schema(self) -> Dict[str, Any]:
         return {
@@ -25,19 +36,126 @@ class WikipediaTool(BaseTool):
             }
         }
 
-    def execute(self, query: str) -> str:
+    def to_points(self, output: Any) -> List[str]:
+        if output.get("ambiguous"):
+            return [f"'{output['query']}' is ambiguous on Wikipedia. Possible options: {', '.join(output['options'])}"]
+        if not output.get("found"):
+            return [f"No Wikipedia results found for: {output['query']}"]
+        return [f"**{output['title']}**: {output['summary']}"]
+
+    @staticmethod
+    def _summary_url(title: str) -> str:
+        return SUMMARY_URL.format(quote(title.replace(" ", "_"), safe=""))
+
+    @staticmethod
+    def _search_params(query: str, limit: int) -> Dict[str, Any]:
+        return {"q": query, "limit": limit}
+
+    @staticmethod
+    def _titles(search_res: Dict[str, Any]) -> List[str]:
+        return [page["title"] for page in search_res.get("pages", [])]
+
+    @staticmethod
+    def _article(data: Dict[str, Any]) -> Dict[str, Any]:
+        sentences = SENTENCE_END.split(data.get("extract", "").strip())
+        return {"title": data["title"], "summary": " ".join(sentences[:SUMMARY_SENTENCES])}
+
+    @staticmethod
+    def _output(query: str, article: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if article is None:
+            return {"query": query, "found": False}
+        if article.get("ambiguous"):
+            return {"query": query, "found": False, "ambiguous": True, "options": article["options"]}
+        return {"query": query, "found": True, "title": article["title"], "summary": article["summary"]}
+
+    def _fetch_summary(self, title: str) -> Optional[Dict[str, Any]]:
+        response = get_pool().get(self._summary_url(title), headers=HEADERS)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _search(self, query: str, limit: int) -> List[str]:
+        response = get_pool().get(SEARCH_URL, params=self._search_params(query, limit), headers=HEADERS)
+        response.raise_for_status()
+        return self._titles(response.json())
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Local store first. Otherwise the query is tried as a page title, which
+        is a single request for most topics (redirects are followed); only when
+        there is no such page does a title search run first.
+        """
+        store = get_article_store()
+        article = store.get(query)
+        if article is not None:
+            return article
+
+        title = store.resolve(query) or query
+        data = self._fetch_summary(title)
+        if data is None:
+            titles = self._search(query, 1)
+            if not titles:
+                return None
+            title = titles[0]
+            data = self._fetch_summary(title)
+            if data is None:
+                return None
+
+        if data.get("type") == "disambiguation":
+            options = [t for t in self._search(data["title"], 6) if t != data["title"]][:5]
+            article = {"title": data["title"], "ambiguous": True, "options": options}
+        else:
+            article = self._article(data)
+        store.put(article, [query, title])
+        return article
+
+    async def _afetch_summary(self, title: str) -> Optional[Dict[str, Any]]:
+        # httpx does not follow redirects unless asked; requests does by default
+        response = await get_pool().aget(self._summary_url(title), headers=HEADERS, follow_redirects=True)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def _asearch(self, query: str, limit: int) -> List[str]:
+        response = await get_pool().aget(SEARCH_URL, params=self._search_params(query, limit), headers=HEADERS)
+        response.raise_for_status()
+        return self._titles(response.json())
+
+    async def alookup(self, query: str) -> Optional[Dict[str, Any]]:
+        store = get_article_store()
+        article = store.get(query)
+        if article is not None:
+            return article
+
+        title = store.resolve(query) or query
+        data = await self._afetch_summary(title)
+        if data is None:
+            titles = await self._asearch(query, 1)
+            if not titles:
+                return None
+            title = titles[0]
+            data = await self._afetch_summary(title)
+            if data is None:
+                return None
+
+        if data.get("type") == "disambiguation":
+            options = [t for t in await self._asearch(data["title"], 6) if t != data["title"]][:5]
+            article = {"title": data["title"], "ambiguous": True, "options": options}
+        else:
+            article = self._article(data)
+        store.put(article, [query, title])
+        return article
+
+    def execute(self, query: str) -> Any:
+        try:
+            return self._output(query, self.lookup(query))
+        except Exception as e:
+            return f"Error executing WikipediaTool: {str(e)}"
+
+    async def aexecute(self, query: str) -> Any:
         try:
-            # Search for the query to get the best match
-            search_results = wikipedia.search(query)
-            if not search_results:
-                return f"No Wikipedia results found for: {query}"
-            
-            page_title = search_results[0]
-            summary = wikipedia.summary(page_title, sentences=3)
-            return f"Wikipedia Summary for '{page_title}':\n{summary}"
-        except wikipedia.exceptions.DisambiguationError as e:
-            return f"Wikipedia query is ambiguous. Possible options: {e.options[:5]}"
-        except wikipedia.exceptions.PageError:
-            return f"Wikipedia page not found for: {query}"
+            return self._output(query, await self.alookup(query))
         except Exception as e:
             return f"Error executing WikipediaTool: {str(e)}"